@@ -0,0 +1,33 @@
+"""
+ACP Einsatzplanung – Planungs- und DB-Logik ohne Streamlit.
+
+Der Import ist billig und ohne Nebenwirkungen: Untermodule (und damit pandas, numpy,
+mysql.connector) werden erst beim ersten Zugriff geladen, z. B. ``acp.parse_user_time``
+oder ``from acp import planung``. Die Oberfläche (app.py) und die CLI (python -m acp)
+setzen darauf auf.
+"""
+import importlib
+
+_SUBMODULES = ('zeit', 'db', 'migrationen', 'planung', 'stammdaten', 'auswertung', 'autoplanung', 'kalender', 'vorwaermen', 'profil', 'cli')
+_EXPORTS = {
+    'parse_user_time': 'zeit', 'calculate_arbeitszeit': 'zeit', 'float_to_input_str': 'zeit', 'format_duration_str': 'zeit',
+    'parse_time_series': 'zeit', 'format_time_series': 'zeit', 'calculate_arbeitszeit_series': 'zeit',
+    'ConnectionPool': 'db', 'PoolTimeout': 'db', 'pool_from_config': 'db',
+    'run_migrations': 'migrationen',
+    'find_overlaps': 'planung', 'find_double_bookings': 'planung', 'find_absence_conflicts': 'planung',
+    'build_plan_grid': 'planung', 'save_einsaetze_to_db': 'planung',
+    'build_uebersicht': 'auswertung',
+    'auto_planen': 'autoplanung',
+}
+
+__all__ = [*_SUBMODULES, *_EXPORTS]
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,72 @@
+"""Auswertung: Monatsdaten laden und die Tag x Mitarbeiter-Übersicht aufbauen."""
+import numpy as np
+import pandas as pd
+
+from .planung import expand_abwesenheiten
+from .zeit import GERMAN_WEEKDAYS, month_bounds, format_time_series, format_duration_series
+
+def fetch_aggregated_data(conn, selected_month_str):
+    # Nur der gewählte Monat, gefiltert in der DB (Index auf Datum)
+    von, bis = month_bounds(selected_month_str)
+    query_einsaetze = "SELECT Mitarbeiter, Zeit, Datum, Objekt, MA_Slot, Anfang, Ende, Pause FROM einsaetze WHERE Mitarbeiter != '' AND Datum >= %s AND Datum <= %s"
+    df_einsaetze = pd.read_sql(query_einsaetze, conn, params=(von, bis))
+    if not df_einsaetze.empty:
+        df_einsaetze['Datum'] = pd.to_datetime(df_einsaetze['Datum'])
+    query_uk = "SELECT Mitarbeiter, Von, Bis, Status FROM urlaub_krank WHERE Von <= %s AND Bis >= %s"
+    df_uk = expand_abwesenheiten(pd.read_sql(query_uk, conn, params=(bis, von)), von, bis)
+    return df_einsaetze, df_uk
+
+def fetch_month_catalogue(conn):
+    df = pd.read_sql("SELECT Monat FROM monatskatalog ORDER BY Monat DESC", conn)
+    return df['Monat'].tolist()
+
+def fetch_mitarbeiter_monat(conn, selected_month_str):
+    return pd.read_sql("SELECT Mitarbeiter, Art, Wert FROM mitarbeiter_monat WHERE Monat = %s", conn, params=(selected_month_str,))
+
+def build_uebersicht(df_work, df_absense, employees, start_date, end_date, nur_verfuegbar=False):
+    """
+    Tag x Mitarbeiter-Übersicht, spaltenweise berechnet.
+    Mitarbeiter- und Verfügbarkeitsfilter greifen vor dem Aufbau, nicht danach.
+    """
+    tage = pd.date_range(start_date, end_date)
+    n_tage, n_ma = len(tage), len(employees)
+    wt = tage.weekday
+    tag_anzeige = np.where(wt >= 5, "🟥 ", "") + tage.strftime('%d.%m.%Y').to_numpy(dtype=object) + " (" + np.array(GERMAN_WEEKDAYS, dtype=object)[wt] + ")"
+
+    # Kreuzprodukt Tage x Mitarbeiter ohne Merge
+    df = pd.DataFrame({
+        'Datum': np.repeat(tage.to_numpy(), n_ma),
+        'Datum_Anzeige': np.repeat(tag_anzeige, n_ma),
+        'Name': np.tile(np.asarray(employees, dtype=object), n_tage),
+    })
+
+    work_cols = ['Datum', 'Mitarbeiter', 'Objekt', 'MA_Slot', 'Anfang', 'Ende', 'Pause', 'Zeit']
+    work = df_work[work_cols] if not df_work.empty else pd.DataFrame(columns=work_cols)
+    absense = df_absense[['Datum', 'Mitarbeiter', 'Status']] if not df_absense.empty else pd.DataFrame(columns=['Datum', 'Mitarbeiter', 'Status'])
+    work = work[work['Mitarbeiter'].isin(employees)].rename(columns={'Mitarbeiter': 'Name'})
+    absense = absense[absense['Mitarbeiter'].isin(employees)].rename(columns={'Mitarbeiter': 'Name'})
+    work = work.assign(Datum=pd.to_datetime(work['Datum']))
+    absense = absense.assign(Datum=pd.to_datetime(absense['Datum']))
+
+    if nur_verfuegbar:
+        belegt = pd.concat([work[['Datum', 'Name']], absense[['Datum', 'Name']]]).drop_duplicates()
+        frei = df.merge(belegt, on=['Datum', 'Name'], how='left', indicator=True)['_merge'].to_numpy() == 'left_only'
+        df = df[frei]
+        for c in ['Typ', 'Einteilung', 'Von', 'Bis', 'Pause', 'Dauer']: df[c] = "-"
+        return df.sort_values(by=['Datum', 'Name'], kind='stable').reset_index(drop=True)
+
+    df = df.merge(work, on=['Datum', 'Name'], how='left').merge(absense, on=['Datum', 'Name'], how='left')
+    has_work = df['Objekt'].notna().to_numpy()
+    has_abs = ~has_work & df['Status'].notna().to_numpy()
+    status = df['Status'].astype(object).to_numpy()
+
+    df['Typ'] = np.select([has_work, has_abs], ["Arbeit", status], "-")
+    einteilung = df['Objekt'].astype(str) + " (" + df['MA_Slot'].astype(str) + ")"
+    df['Einteilung'] = np.where(has_work, einteilung.to_numpy(dtype=object), "-")
+    df['Von'] = np.where(has_work, format_time_series(df['Anfang']), "-")
+    df['Bis'] = np.where(has_work, format_time_series(df['Ende']), "-")
+    pause = pd.to_numeric(df['Pause'], errors='coerce').to_numpy(dtype=float)
+    pause_str = np.char.mod('%.2f', np.nan_to_num(pause)).astype(object)
+    df['Pause'] = np.where(has_work & ~np.isnan(pause), pause_str, "-")
+    df['Dauer'] = np.select([has_work, has_abs], [format_duration_series(df['Zeit']), "Tag"], "-")
+    return df.sort_values(by=['Datum', 'Name'], kind='stable').reset_index(drop=True)
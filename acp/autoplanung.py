@@ -0,0 +1,196 @@
+"""
+Auto-Planen: leere Slots eines Monats vorschlagsweise besetzen.
+
+Das Ergebnis ist nur ein Vorschlag (Zeilen wie im Planungsraster); übernommen wird er
+erst über den normalen Speicherweg mit allen Prüfungen.
+"""
+import numpy as np
+import pandas as pd
+
+from .zeit import DATE_FORMAT, calculate_arbeitszeit_series
+from .planung import expand_abwesenheiten, fetch_abwesenheiten, fetch_einsaetze_for_objects, _shift_intervals
+
+SCHICHT_FELDER = ['Anfang', 'Ende', 'Pause']
+
+def schicht_vorlagen(df_vorlage):
+    """Häufigste Schicht (Anfang, Ende, Pause) je Objekt, Slot und Wochentag aus bisherigen Einsätzen."""
+    df = df_vorlage[(df_vorlage['Anfang'].fillna(0) != 0) | (df_vorlage['Ende'].fillna(0) != 0)]
+    if df.empty: return pd.DataFrame(columns=['Objekt', 'MA_Slot', 'Wochentag', *SCHICHT_FELDER])
+    df = df.assign(Wochentag=pd.to_datetime(df['Datum']).dt.weekday, Pause=df['Pause'].fillna(0.0))
+    n = df.groupby(['Objekt', 'MA_Slot', 'Wochentag', *SCHICHT_FELDER]).size().rename('n').reset_index()
+    n = n.sort_values('n', ascending=False, kind='stable').drop_duplicates(['Objekt', 'MA_Slot', 'Wochentag'])
+    return n.drop(columns='n')
+
+def offene_schichten(df_saved, slots_by_obj, d_start, d_end, vorlagen):
+    """
+    Alle Zellen (Datum, Objekt, MA_Slot) des Monats ohne Mitarbeiter. Zeiten aus dem Plan,
+    sonst aus der Vorlage des Slots für diesen Wochentag; Zellen ganz ohne Zeiten bleiben außen vor.
+    """
+    tage = pd.date_range(d_start, d_end).date
+    grid = pd.concat([pd.MultiIndex.from_product([tage, [obj], slots], names=['Datum', 'Objekt', 'MA_Slot']).to_frame(index=False)
+                      for obj, slots in slots_by_obj.items() if len(slots)], ignore_index=True)
+    if grid.empty: return grid.assign(**{c: [] for c in [*SCHICHT_FELDER, 'Zeit']})
+    grid['Wochentag'] = pd.to_datetime(grid['Datum']).dt.weekday
+
+    if not df_saved.empty:
+        saved = df_saved.drop_duplicates(['Datum', 'Objekt', 'MA_Slot'], keep='last')[['Datum', 'Objekt', 'MA_Slot', 'Mitarbeiter', *SCHICHT_FELDER]]
+        grid = grid.merge(saved, on=['Datum', 'Objekt', 'MA_Slot'], how='left')
+        grid = grid[grid['Mitarbeiter'].fillna('').astype(str).str.strip() == ''].drop(columns='Mitarbeiter')
+    else:
+        grid = grid.assign(**{c: np.nan for c in SCHICHT_FELDER})
+
+    ohne_zeit = (grid['Anfang'].fillna(0) == 0) & (grid['Ende'].fillna(0) == 0)
+    v = grid[['Objekt', 'MA_Slot', 'Wochentag']].merge(vorlagen, on=['Objekt', 'MA_Slot', 'Wochentag'], how='left')
+    for c in SCHICHT_FELDER:
+        grid[c] = np.where(ohne_zeit, v[c].to_numpy(dtype=float), grid[c].to_numpy(dtype=float))
+    grid['Pause'] = grid['Pause'].fillna(0.0)
+    grid = grid[(grid['Anfang'].fillna(0) != 0) | (grid['Ende'].fillna(0) != 0)].drop(columns='Wochentag')
+    grid['Zeit'] = calculate_arbeitszeit_series(grid['Anfang'], grid['Ende'], grid['Pause'])
+    return grid.sort_values(['Datum', 'Anfang', 'Objekt', 'MA_Slot'], kind='stable').reset_index(drop=True)
+
+def _augmentieren(j, adj, schicht_ma, ma_schicht, vorg):
+    """Augmentierender Pfad ab Mitarbeiter j (Suche über bereits vergebene Schichten). True bei Erfolg."""
+    besucht = np.zeros(len(schicht_ma), dtype=bool)
+    stapel = [j]
+    while stapel:
+        k = stapel.pop()
+        kand = adj(k)
+        kand = kand[~besucht[kand]]
+        if not kand.size: continue
+        besucht[kand] = True
+        vorg[kand] = k
+        frei = kand[schicht_ma[kand] < 0]
+        if frei.size:
+            i = frei[0]
+            while True:
+                k = vorg[i]; alt = ma_schicht[k]
+                schicht_ma[i] = k; ma_schicht[k] = i
+                if alt < 0: return True
+                i = alt
+        stapel.extend(schicht_ma[kand].tolist())
+    return False
+
+def zuordnen(moeglich, reihenfolge):
+    """
+    Maximale Zuordnung Schicht -> Mitarbeiter auf der Matrix moeglich[schicht, mitarbeiter].
+    Mitarbeiter werden in der Reihenfolge aufsteigender Kosten (bisherige Stunden) per
+    augmentierendem Pfad aufgenommen; hängen die Kosten nur am Mitarbeiter, liefert dieser
+    Greedy auf dem Transversal-Matroid eine maximale Zuordnung mit minimalen Kosten.
+    Rückgabe: Array Schicht -> Mitarbeiterindex (-1 = unbesetzt)
+    """
+    n, e = moeglich.shape
+    schicht_ma = np.full(n, -1); ma_schicht = np.full(e, -1); vorg = np.full(n, -1)
+    spalten = np.ascontiguousarray(moeglich.T)
+    cache = {}
+    def adj(k):
+        if k not in cache: cache[k] = np.flatnonzero(spalten[k])
+        return cache[k]
+    offen = n
+    for j in reihenfolge:
+        if not offen: break
+        if _augmentieren(j, adj, schicht_ma, ma_schicht, vorg): offen -= 1
+    return schicht_ma
+
+def auto_planen(offen, mitarbeiter, df_abwesenheit, df_belegt, d_start, d_end):
+    """
+    Besetzt offene Schichten Tag für Tag. Ein Mitarbeiter kommt für eine Schicht in Frage, wenn
+    Vertrag und Ausweis am Tag gültig sind (leer = unbegrenzt), keine Abwesenheit vorliegt und
+    sich keine bestehende oder bereits vorgeschlagene Schicht überschneidet (Nachtschichten über
+    Mitternacht inklusive). Unter den Kandidaten gehen Schichten bevorzugt an Mitarbeiter mit den
+    wenigsten Monatsstunden.
+
+    offen:          offene_schichten(...)
+    mitarbeiter:    Mitarbeitername, Vertrag_bis, Ausweis_gueltig_bis
+    df_abwesenheit: Zeiträume (Mitarbeiter, Von, Bis, Status)
+    df_belegt:      bestehende Einsätze aller Objekte (Datum, Anfang, Ende, Mitarbeiter, Zeit), Monat ± 1 Tag
+    Rückgabe: offen mit Spalte Mitarbeiter ('' = keine passende Besetzung gefunden)
+    """
+    ergebnis = offen.assign(Mitarbeiter='')
+    ma = mitarbeiter.dropna(subset=['Mitarbeitername'])
+    ma = ma[ma['Mitarbeitername'].astype(str).str.strip() != ''].drop_duplicates('Mitarbeitername')
+    if offen.empty or ma.empty: return ergebnis
+    namen = ma['Mitarbeitername'].to_numpy()
+    code = pd.Index(namen)
+    tag0 = np.datetime64(pd.Timestamp(d_start).date(), 'D').astype(np.int64)
+
+    # Gültigkeit als letzter erlaubter Tag (Tage seit 1970), leer/ungültig = unbegrenzt
+    gueltig = np.full(len(namen), np.iinfo(np.int64).max)
+    for c in ['Vertrag_bis', 'Ausweis_gueltig_bis']:
+        d = pd.to_datetime(ma[c], format=DATE_FORMAT, errors='coerce').to_numpy().astype('datetime64[D]')
+        gueltig = np.where(np.isnat(d), gueltig, np.minimum(gueltig, d.astype(np.int64)))
+
+    # Abwesenheiten als Matrix Mitarbeiter x Tag des Monats
+    n_tage = (pd.Timestamp(d_end) - pd.Timestamp(d_start)).days + 1
+    abwesend = np.zeros((len(namen), n_tage), dtype=bool)
+    tage_uk = expand_abwesenheiten(df_abwesenheit, d_start, d_end)
+    if not tage_uk.empty:
+        tage_uk = tage_uk[tage_uk['Status'].fillna('').astype(str).str.strip() != '']
+        m = code.get_indexer(tage_uk['Mitarbeiter'])
+        t = tage_uk['Datum'].to_numpy().astype('datetime64[D]').astype(np.int64) - tag0
+        ok = (m >= 0) & (t >= 0) & (t < n_tage)
+        abwesend[m[ok], t[ok]] = True
+
+    # Belegte Intervalle nach Starttag, Stunden des Monats je Mitarbeiter
+    stunden = np.zeros(len(namen))
+    belegt = {}
+    b = df_belegt[df_belegt['Mitarbeiter'].fillna('').astype(str).str.strip() != '']
+    if not b.empty:
+        m = code.get_indexer(b['Mitarbeiter'])
+        b = b[m >= 0]; m = m[m >= 0]
+    if not b.empty:
+        b_s, b_e = _shift_intervals(b)
+        b_tag = np.floor(b_s).astype(np.int64)
+        im_monat = (b_tag >= tag0) & (b_tag < tag0 + n_tage)
+        np.add.at(stunden, m[im_monat], b['Zeit'].fillna(0.0).to_numpy(dtype=float)[im_monat])
+        for t in np.unique(b_tag):
+            sel = b_tag == t
+            belegt[int(t)] = [(m[sel], b_s[sel], b_e[sel])]
+
+    s_s, s_e = _shift_intervals(ergebnis)
+    s_tag = np.floor(s_s).astype(np.int64)
+    zeit = ergebnis['Zeit'].to_numpy(dtype=float)
+    zuordnung = np.full(len(ergebnis), -1)
+
+    for t in np.unique(s_tag):
+        rest = np.flatnonzero(s_tag == t)
+        basis = (gueltig >= t) & ~abwesend[:, t - tag0]
+        while rest.size:
+            moeglich = np.broadcast_to(basis, (rest.size, len(namen))).copy()
+            # Überschneidungen: nur Schichten, die am Vortag, am Tag selbst oder am Folgetag beginnen
+            fenster = [x for tt in (t - 1, t, t + 1) for x in belegt.get(int(tt), [])]
+            if fenster:
+                f_m = np.concatenate([x[0] for x in fenster])
+                f_s = np.concatenate([x[1] for x in fenster]); f_e = np.concatenate([x[2] for x in fenster])
+                r, c = np.nonzero((s_s[rest, None] < f_e[None, :]) & (f_s[None, :] < s_e[rest, None]))
+                moeglich[r, f_m[c]] = False
+            kandidaten = np.flatnonzero(moeglich.any(axis=0))
+            reihenfolge = kandidaten[np.argsort(stunden[kandidaten], kind='stable')]
+            treffer = zuordnen(moeglich, reihenfolge)
+            besetzt = treffer >= 0
+            if not besetzt.any(): break
+            idx = rest[besetzt]; wer = treffer[besetzt]
+            zuordnung[idx] = wer
+            np.add.at(stunden, wer, zeit[idx])
+            belegt.setdefault(int(t), []).append((wer, s_s[idx], s_e[idx]))
+            # Übrige Schichten des Tages: weitere Runde (z. B. zweite, nicht überlappende Schicht)
+            rest = rest[~besetzt]
+
+    ergebnis['Mitarbeiter'] = np.where(zuordnung >= 0, namen[np.maximum(zuordnung, 0)], '')
+    return ergebnis
+
+def vorschlag_erstellen(conn, df_saved, slots_by_obj, d_start, d_end):
+    """
+    Lädt Vorlagen (Vormonat + Monat), Mitarbeiter, Abwesenheiten und alle Einsätze des Monats
+    und rechnet den Vorschlag. Rückgabe wie auto_planen.
+    """
+    objekte = list(slots_by_obj)
+    vormonat = (pd.Timestamp(d_start) - pd.DateOffset(months=1)).date()
+    vorlagen = schicht_vorlagen(fetch_einsaetze_for_objects(conn, objekte, vormonat, d_end))
+    offen = offene_schichten(df_saved, slots_by_obj, d_start, d_end, vorlagen)
+    if offen.empty: return offen.assign(Mitarbeiter=pd.Series(dtype=object))
+    mitarbeiter = pd.read_sql("SELECT Mitarbeitername, Vertrag_bis, Ausweis_gueltig_bis FROM mitarbeiter_verzeichnis", conn)
+    von = (pd.Timestamp(d_start) - pd.Timedelta(days=1)).strftime(DATE_FORMAT)
+    bis = (pd.Timestamp(d_end) + pd.Timedelta(days=1)).strftime(DATE_FORMAT)
+    belegt = pd.read_sql("SELECT Datum, Anfang, Ende, Mitarbeiter, Zeit FROM einsaetze WHERE Datum >= %s AND Datum <= %s AND Mitarbeiter IS NOT NULL AND Mitarbeiter != ''",
+                         conn, params=(von, bis))
+    return auto_planen(offen, mitarbeiter, fetch_abwesenheiten(conn, d_start, d_end), belegt, d_start, d_end)
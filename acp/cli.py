@@ -0,0 +1,128 @@
+"""
+Kommandozeile für Massenoperationen ohne Streamlit-Server.
+
+    python -m acp migrieren
+    python -m acp zeit-neu 2025-03 [--objekt NAME] [--dry-run]
+    python -m acp pruefen 2025-03
+    python -m acp kalender [--ziel DIR] [--alle]
+
+Die DB-Zugangsdaten kommen aus dem [mysql]-Abschnitt der Streamlit-Secrets
+(Standard: .streamlit/secrets.toml, änderbar mit --secrets), die Kalender-Feeds
+aus dem [ics]-Abschnitt (verzeichnis, geheimnis).
+"""
+import argparse
+import sys
+import tomllib
+from datetime import timedelta
+
+DEFAULT_SECRETS = '.streamlit/secrets.toml'
+
+def load_secrets(path):
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+def load_mysql_config(path):
+    return load_secrets(path)['mysql']
+
+def cmd_migrieren(conn, args):
+    from .migrationen import run_migrations
+    run_migrations(conn)
+    print("Schema ist aktuell.")
+    return 0
+
+def cmd_zeit_neu(conn, args):
+    """Zeit aller Einsätze eines Monats aus Anfang/Ende/Pause neu berechnen; nur abweichende Zeilen schreiben."""
+    import pandas as pd
+    from .db import bump_table_version, bump_mitarbeiter_version
+    from .planung import refresh_mitarbeiter_monat
+    from .zeit import calculate_arbeitszeit_series, month_bounds
+
+    von, bis = month_bounds(args.monat)
+    query = "SELECT EinsatzID, Mitarbeiter, Anfang, Ende, Pause, Zeit FROM einsaetze WHERE Datum >= %s AND Datum <= %s"
+    params = [von, bis]
+    if args.objekt: query += " AND Objekt = %s"; params.append(args.objekt)
+    df = pd.read_sql(query, conn, params=params)
+    for c in ['Anfang', 'Ende', 'Pause', 'Zeit']:
+        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0.0)
+    df['Zeit_neu'] = calculate_arbeitszeit_series(df['Anfang'], df['Ende'], df['Pause'])
+    geaendert = df[(df['Zeit_neu'] - df['Zeit']).abs() > 1e-9]
+    print(f"{len(df)} Einsätze geprüft, {len(geaendert)} mit abweichender Zeit.")
+    if geaendert.empty or args.dry_run: return 0
+
+    cursor = conn.cursor()
+    try:
+        cursor.executemany("UPDATE einsaetze SET Zeit = %s, Version = Version + 1 WHERE EinsatzID = %s",
+                           [(float(z), int(i)) for z, i in zip(geaendert['Zeit_neu'], geaendert['EinsatzID'])])
+        refresh_mitarbeiter_monat(cursor, [args.monat], geaendert['Mitarbeiter'].dropna())
+        bump_mitarbeiter_version(cursor, geaendert['Mitarbeiter'].dropna())
+        bump_table_version(cursor, 'einsaetze', 'mitarbeiter_monat')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+    print("Gespeichert.")
+    return 0
+
+def cmd_pruefen(conn, args):
+    """Ganzen Monat prüfen: Einsätze während Abwesenheiten und Überschneidungen zwischen Objekten."""
+    import pandas as pd
+    from .planung import expand_abwesenheiten, build_absence_index, find_absence_conflicts, find_overlaps, fetch_abwesenheiten
+    from .zeit import month_bounds
+
+    von, bis = month_bounds(args.monat)
+    # Vortag/Folgetag mitladen, damit Nachtschichten über die Monatsgrenze erkannt werden
+    rand_von = von - timedelta(days=1); rand_bis = bis + timedelta(days=1)
+    query = "SELECT Datum, Objekt, MA_Slot, Anfang, Ende, Mitarbeiter FROM einsaetze WHERE Datum >= %s AND Datum <= %s AND Mitarbeiter IS NOT NULL AND Mitarbeiter != ''"
+    df = pd.read_sql(query, conn, params=(rand_von, rand_bis))
+    df['Datum'] = pd.to_datetime(df['Datum'])
+    im_monat = df[(df['Datum'].dt.date >= von) & (df['Datum'].dt.date <= bis)]
+
+    df_uk = expand_abwesenheiten(fetch_abwesenheiten(conn, von, bis), von, bis)
+    konflikte = find_absence_conflicts(build_absence_index(df_uk), im_monat)
+    # Paare innerhalb des Monats werden von beiden Seiten gefunden; find_overlaps meldet sie nur einmal
+    konflikte += find_overlaps(im_monat, df, nur_andere_objekte=True)
+    konflikte.sort(key=lambda c: (c[0], c[1]))
+    for tag, ma, msg in konflikte:
+        print(f"{tag.strftime('%d.%m.%Y')}\t{ma}\t{msg}")
+    print(f"{len(im_monat)} Einsätze geprüft, {len(konflikte)} Konflikte.", file=sys.stderr)
+    return 1 if konflikte else 0
+
+def cmd_kalender(conn, args):
+    """iCal-Feeds der Mitarbeiter mit geänderter Planversion neu schreiben (z. B. per Cron nach Importen)."""
+    from .kalender import aktualisiere_feeds
+    ics = load_secrets(args.secrets).get('ics', {})
+    if 'geheimnis' not in ics: print("Kein [ics]-Abschnitt mit 'geheimnis' in den Secrets.", file=sys.stderr); return 2
+    ziel = args.ziel or ics.get('verzeichnis')
+    if not ziel: print("Zielverzeichnis fehlt (--ziel oder [ics] verzeichnis).", file=sys.stderr); return 2
+    print(f"{aktualisiere_feeds(conn, ziel, ics['geheimnis'], alle=args.alle)} Kalender-Feeds geschrieben.")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m acp', description="ACP Einsatzplanung – Massenoperationen")
+    parser.add_argument('--secrets', default=DEFAULT_SECRETS, help=f"Pfad zur secrets.toml (Standard: {DEFAULT_SECRETS})")
+    sub = parser.add_subparsers(dest='befehl', required=True)
+
+    p = sub.add_parser('migrieren', help="Ausstehende Schema-Migrationen ausführen")
+    p.set_defaults(func=cmd_migrieren)
+
+    p = sub.add_parser('zeit-neu', help="Zeit eines Monats aus Anfang/Ende/Pause neu berechnen")
+    p.add_argument('monat', help="YYYY-MM")
+    p.add_argument('--objekt', help="Nur dieses Objekt")
+    p.add_argument('--dry-run', action='store_true', help="Nur zählen, nichts schreiben")
+    p.set_defaults(func=cmd_zeit_neu)
+
+    p = sub.add_parser('pruefen', help="Monat auf Abwesenheits- und Doppelbuchungskonflikte prüfen")
+    p.add_argument('monat', help="YYYY-MM")
+    p.set_defaults(func=cmd_pruefen)
+
+    p = sub.add_parser('kalender', help="iCal-Feeds (.ics) geänderter Mitarbeiter neu schreiben")
+    p.add_argument('--ziel', help="Zielverzeichnis (Standard: [ics] verzeichnis)")
+    p.add_argument('--alle', action='store_true', help="Alle Feeds neu schreiben")
+    p.set_defaults(func=cmd_kalender)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from .db import pool_from_config
+    pool = pool_from_config(load_mysql_config(args.secrets))
+    with pool.connection() as conn:
+        return args.func(conn, args)
@@ -0,0 +1,174 @@
+"""Verbindungspool, Schema-Konstanten und Tabellen-Versionen (MySQL/TiDB)."""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+OBJECT_COLUMN_NAME = 'Objektname'
+MA_SLOT_COLUMN_NAME = 'MA_Slot'
+DB_DATE_COL = 'Datum'
+ART_ARBEITSSTUNDEN = 'Arbeitsstunden'
+# MySQL-Fehlernummer für verletzten eindeutigen Schlüssel (Duplicate entry)
+ER_DUP_ENTRY = 1062
+# Tabellen, deren Caches über tabellen_version invalidiert werden
+VERSIONED_TABLES = ['mitarbeiter_verzeichnis', 'standorte', 'urlaub_krank', 'einsaetze', 'mitarbeiter_monat', 'monatskatalog']
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    """
+    Prozessweiter Pool für MySQL/TiDB-Verbindungen.
+    Verbindungen werden über Reruns und Sessions hinweg wiederverwendet,
+    nach längerem Leerlauf per Ping geprüft und bei Bedarf neu aufgebaut.
+    """
+    def __init__(self, config, size=5, timeout=10.0, ping_after=30.0):
+        self._config = config
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {'in_use': 0, 'created': 0, 'waits': 0, 'reconnects': 0}
+
+    def _count(self, key, delta=1):
+        with self._lock: self._stats[key] += delta
+
+    def _connect(self):
+        import mysql.connector  # erst bei der ersten Verbindung laden
+        conn = mysql.connector.connect(**self._config)
+        self._count('created')
+        return conn
+
+    def _checkout(self):
+        try: conn, last_used = self._idle.get_nowait()
+        except queue.Empty: return self._connect()
+        if time.monotonic() - last_used < self.ping_after: return conn
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Exception:
+            # Verbindung vom Server geschlossen (wait_timeout, Failover) -> neu verbinden
+            try: conn.close()
+            except Exception: pass
+            self._count('reconnects')
+            return self._connect()
+
+    def acquire(self):
+        if not self._slots.acquire(blocking=False):
+            self._count('waits')
+            if not self._slots.acquire(timeout=self.timeout):
+                raise PoolTimeout(f"Keine freie Verbindung nach {self.timeout:g} s (Pool-Größe {self.size})")
+        try: conn = self._checkout()
+        except Exception: self._slots.release(); raise
+        self._count('in_use')
+        return conn
+
+    def try_acquire(self, reserve=0):
+        """Verbindung ohne Warten, und nur wenn danach noch `reserve` Plätze frei bleiben (Hintergrundarbeit); sonst None."""
+        with self._lock:
+            if self._stats['in_use'] + 1 + reserve > self.size: return None
+        if not self._slots.acquire(blocking=False): return None
+        try: conn = self._checkout()
+        except Exception: self._slots.release(); raise
+        self._count('in_use')
+        return conn
+
+    def release(self, conn):
+        try:
+            # Offene (Lese-)Transaktion beenden, sonst sieht der nächste Nutzer einen alten Snapshot
+            conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except Exception:
+            try: conn.close()
+            except Exception: pass
+        finally:
+            self._count('in_use', -1)
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try: yield conn
+        finally: self.release(conn)
+
+    def stats(self):
+        with self._lock: s = dict(self._stats)
+        s['idle'] = self._idle.qsize()
+        s['size'] = self.size
+        return s
+
+class Leihverbindung:
+    """
+    Verbindung für eine Ladeaufgabe in einem Hilfsthread, erst beim ersten Zugriff geholt: eine freie
+    Pool-Verbindung (mit Reserve), sonst exklusiv die Verbindung des wartenden Aufrufers (über `sperre`).
+    Aus dem Cache bediente Aufgaben belegen so gar keine Verbindung, und ein voller Pool blockiert nie.
+    """
+    def __init__(self, pool, haupt, sperre, reserve=1, wrap=None):
+        self._pool = pool
+        self._haupt = haupt
+        self._sperre = sperre
+        self._reserve = reserve
+        self._wrap = wrap
+        self._conn = None
+        self._geliehen = None
+
+    def _holen(self):
+        if self._conn is None:
+            conn = self._pool.try_acquire(self._reserve)
+            if conn is None:
+                self._sperre.acquire()
+                self._conn = self._haupt
+            else:
+                self._geliehen = conn
+                self._conn = self._wrap(conn) if self._wrap else conn
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._holen(), name)
+
+    def freigeben(self):
+        if self._geliehen is not None: self._pool.release(self._geliehen)
+        elif self._conn is not None: self._sperre.release()
+        self._conn = self._geliehen = None
+
+def pool_from_config(config):
+    """Pool aus einem [mysql]-Abschnitt; pool_*-Einstellungen dürfen darin stehen, gehen aber nicht an connect()."""
+    config = dict(config)
+    size = int(config.pop('pool_size', 5))
+    timeout = float(config.pop('pool_timeout', 10))
+    ping_after = float(config.pop('pool_ping_after', 30))
+    config.pop('pool_name', None)
+    return ConnectionPool(config, size=size, timeout=timeout, ping_after=ping_after)
+
+def bump_table_version(cursor, *tables):
+    tables = sorted(set(tables))
+    ph = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"UPDATE tabellen_version SET Version = Version + 1 WHERE Tabelle IN ({ph})", tables)
+
+def bump_mitarbeiter_version(cursor, mitarbeiter):
+    """Planversion je Mitarbeiter hochzählen ('Mein Plan'-Cache, iCal-Feeds); läuft in der Transaktion des Aufrufers."""
+    mas = sorted({m for m in mitarbeiter if isinstance(m, str) and m})
+    if not mas: return
+    cursor.executemany("INSERT IGNORE INTO mitarbeiter_plan_version (Mitarbeiter, Version) VALUES (%s, 0)", [(m,) for m in mas])
+    ph = ', '.join(['%s'] * len(mas))
+    cursor.execute(f"UPDATE mitarbeiter_plan_version SET Version = Version + 1 WHERE Mitarbeiter IN ({ph})", mas)
+
+def fetch_mitarbeiter_versionen(conn, mitarbeiter=None):
+    """{Mitarbeiter: Planversion}; fehlende Mitarbeiter haben Version 0."""
+    cursor = conn.cursor()
+    try:
+        if mitarbeiter is None: cursor.execute("SELECT Mitarbeiter, Version FROM mitarbeiter_plan_version")
+        else:
+            if not mitarbeiter: return {}
+            cursor.execute(f"SELECT Mitarbeiter, Version FROM mitarbeiter_plan_version WHERE Mitarbeiter IN ({', '.join(['%s'] * len(mitarbeiter))})", list(mitarbeiter))
+        return {m: int(v) for m, v in cursor.fetchall()}
+    finally: cursor.close()
+
+def fetch_table_versions(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT Tabelle, Version FROM tabellen_version")
+        return {t: int(v) for t, v in cursor.fetchall()}
+    finally: cursor.close()
@@ -0,0 +1,108 @@
+"""
+CSV-Export für Excel (Semikolon, UTF-8 mit BOM): einzelner Monatsplan und Sammelexport
+mehrerer Objekte/Monate als ZIP. Der Sammelexport liest die Einsätze blockweise per fetchmany,
+hält nur einen Objekt-Monat unkomprimiert im Speicher und schreibt das ZIP in eine temporäre
+Datei – der Speicherbedarf beim Erzeugen bleibt flach, unabhängig vom gewählten Zeitraum.
+"""
+import csv
+import io
+import os
+import re
+import tempfile
+import zipfile
+from datetime import timedelta
+
+import pandas as pd
+
+from .zeit import DATE_FORMAT, GERMAN_WEEKDAYS, float_to_input_str, format_duration_str, format_month_display, month_bounds, natural_sort_key
+from .planung import PLAN_GRID_FIELDS
+
+EXPORT_CHUNK = 5000
+EXPORT_FELDER = ['Datum', 'Objekt', 'MA_Slot', 'Anfang', 'Ende', 'Pause', 'Mitarbeiter', 'Zeit']
+
+def plan_csv(df_plan, total_hours):
+    """Planungsraster eines Objekt-Monats als CSV (Bytes) inkl. Summenzeile."""
+    csv_string = df_plan.to_csv(sep=';', index=False)
+    csv_string += f"\n;Gesamtstunden (Monat):;{format_duration_str(total_hours)}"
+    return csv_string.encode('utf-8-sig')
+
+def _dateiname(text):
+    return re.sub(r'[\\/:*?"<>|]+', '_', str(text)).strip() or '_'
+
+def _zahl(v):
+    return '' if v is None or pd.isna(v) else float(v)
+
+def _objekt_monat_csv(zf, obj, monat, zeilen, slots):
+    """
+    Einen Objekt-Monat im Layout des Planungsrasters (wie der Einzelexport) ins ZIP schreiben –
+    direkt per csv.writer statt über build_plan_grid, damit viele kleine Monate billig bleiben.
+    Liefert die Stunden des Objekt-Monats.
+    """
+    slots = slots or sorted({r[2] for r in zeilen if r[2]}, key=natural_sort_key)
+    zellen = {(str(r[0])[:10], r[2]): r for r in zeilen}
+    text = io.StringIO()
+    w = csv.writer(text, delimiter=';', lineterminator='\n')
+    w.writerow(['Datum', 'Datum_Tag', *[f'{s}_{f}' for s in slots for f in PLAN_GRID_FIELDS]])
+    tag, bis = month_bounds(monat)
+    while tag <= bis:
+        d = tag.strftime(DATE_FORMAT)
+        zeile = [d, f"{'🟥 ' if tag.weekday() >= 5 else ''}{tag:%d.%m.%Y} ({GERMAN_WEEKDAYS[tag.weekday()]})"]
+        for s in slots:
+            r = zellen.get((d, s))
+            if r is None: zeile += [''] * len(PLAN_GRID_FIELDS)
+            else: zeile += [r[6] or '', float_to_input_str(r[3]), float_to_input_str(r[4]), _zahl(r[5]), _zahl(r[7])]
+        w.writerow(zeile)
+        tag += timedelta(days=1)
+    total = sum(float(r[7] or 0.0) for r in zeilen)
+    text.write(f"\n;Gesamtstunden (Monat):;{format_duration_str(total)}")
+    zf.writestr(f"{_dateiname(obj)}/Einsatzplan_{_dateiname(obj)}_{monat}.csv", text.getvalue().encode('utf-8-sig'))
+    return total
+
+def export_zip(conn, von, bis, objekte=None, slots_by_obj=None, chunk=EXPORT_CHUNK):
+    """
+    Sammelexport: je Objekt und Monat eine CSV-Datei (Layout wie der Einzelexport, mit
+    Summenzeile) plus Summen.csv mit den Stunden je Objekt und Monat.
+    objekte: Liste oder None für alle Objekte; slots_by_obj: Slot-Reihenfolge je Objekt (sonst aus den Daten).
+    Rückgabe: ZIP als lesbare Datei (io.BufferedReader am Anfang, wie st.download_button sie annimmt);
+    der Aufrufer schließt sie, danach verschwindet die temporäre Datei.
+    """
+    slots_by_obj = slots_by_obj or {}
+    where, params = ["Datum >= %s", "Datum <= %s"], [von.strftime(DATE_FORMAT), bis.strftime(DATE_FORMAT)]
+    if objekte:
+        where.append(f"Objekt IN ({', '.join(['%s'] * len(objekte))})"); params += list(objekte)
+    query = f"SELECT {', '.join(EXPORT_FELDER)} FROM einsaetze WHERE {' AND '.join(where)} ORDER BY Objekt, Datum, MA_Slot"
+
+    ziel = tempfile.TemporaryFile()
+    summen = []
+    cursor = conn.cursor()
+    try:
+        with zipfile.ZipFile(ziel, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            cursor.execute(query, params)
+            aktuell, zeilen = None, []
+            while True:
+                block = cursor.fetchmany(chunk)
+                for row in block:
+                    key = (row[1], str(row[0])[:7])
+                    if key != aktuell and zeilen:
+                        summen.append((*aktuell, _objekt_monat_csv(zf, *aktuell, zeilen, slots_by_obj.get(aktuell[0]))))
+                        zeilen = []
+                    aktuell = key
+                    zeilen.append(row)
+                if not block: break
+            if zeilen:
+                summen.append((*aktuell, _objekt_monat_csv(zf, *aktuell, zeilen, slots_by_obj.get(aktuell[0]))))
+
+            text = io.StringIO()
+            w = csv.writer(text, delimiter=';', lineterminator='\n')
+            w.writerow(['Objekt', 'Monat', 'Gesamtstunden'])
+            objekt_summe = {}
+            for obj, monat, total in summen:
+                w.writerow([obj, format_month_display(monat), format_duration_str(total)])
+                objekt_summe[obj] = objekt_summe.get(obj, 0.0) + total
+            for obj, total in objekt_summe.items():
+                w.writerow([obj, 'Gesamt', format_duration_str(total)])
+            zf.writestr('Summen.csv', text.getvalue().encode('utf-8-sig'))
+        ziel.flush(); ziel.seek(0)
+        # Eigener Lese-Handle auf dieselbe (namenlose) Datei: sie lebt, bis auch dieser geschlossen ist
+        return open(os.dup(ziel.fileno()), 'rb')
+    finally: cursor.close(); ziel.close()
@@ -0,0 +1,126 @@
+"""
+iCalendar-Feeds (.ics) je Mitarbeiter für 'Mein Plan'.
+
+Je Mitarbeiter eine Datei <token>.ics; das Token ist ein HMAC über den Namen, die URL ist also
+nicht erratbar und kann ohne Login im Handy-Kalender abonniert werden. Neu geschrieben werden nur
+Feeds, deren Planversion (mitarbeiter_plan_version) sich seit dem letzten Lauf geändert hat.
+Ausliefern z. B. über das static/-Verzeichnis der App (Streamlit: server.enableStaticServing = true)
+oder einen beliebigen Webserver.
+"""
+import hashlib
+import hmac
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from .db import fetch_mitarbeiter_versionen
+from .zeit import to_minutes, format_duration_series, MINUTEN_PRO_TAG
+
+PRODID = '-//ACP//Einsatzplanung//DE'
+FEED_TAGE_ZURUECK = 31
+FEED_CHUNK = 500
+
+def feed_token(mitarbeiter, geheimnis):
+    return hmac.new(geheimnis.encode('utf-8'), mitarbeiter.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+def _text(s):
+    return str(s).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+def _falten(zeile):
+    """Inhaltszeile nach RFC 5545 auf 75 Oktette falten, ohne UTF-8-Zeichen zu zerteilen."""
+    b = zeile.encode('utf-8')
+    if len(b) <= 75: return zeile
+    teile, start, laenge = [], 0, 75
+    while start < len(b):
+        ende = min(start + laenge, len(b))
+        while ende < len(b) and (b[ende] & 0xC0) == 0x80: ende -= 1
+        teile.append(b[start:ende].decode('utf-8'))
+        start, laenge = ende, 74  # Folgezeilen beginnen mit einem Leerzeichen
+    return '\r\n '.join(teile)
+
+def _ical_zeit(werte, unit):
+    # datetime64 -> 'YYYYMMDDTHHMMSS' bzw. 'YYYYMMDD' für eine ganze Spalte
+    return np.char.replace(np.char.replace(np.datetime_as_string(werte, unit=unit), '-', ''), ':', '').astype(object)
+
+def ics_feed(df, mitarbeiter, jetzt=None):
+    """
+    Kalender aus Zeilen wie fetch_mein_plan. Zeiten sind lokale ('floating') Uhrzeiten, Nachtschichten
+    enden am Folgetag; Einsätze ohne Anfang/Ende werden Ganztagstermine.
+    """
+    stempel = (jetzt or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+    zeilen = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+              _falten(f'X-WR-CALNAME:{_text("Einsatzplan " + mitarbeiter)}'), 'X-PUBLISHED-TTL:PT1H']
+    if not df.empty:
+        datum = pd.to_datetime(df['Datum']).dt.normalize().to_numpy(dtype='datetime64[m]')
+        a = to_minutes(df['Anfang']); e = to_minutes(df['Ende'])
+        ganztags = (a == 0) & (e == 0)
+        beginn = _ical_zeit(datum + a, 's')
+        ende = _ical_zeit(datum + e + MINUTEN_PRO_TAG * (e < a), 's')
+        tag = _ical_zeit(datum, 'D'); folgetag = _ical_zeit(datum + MINUTEN_PRO_TAG, 'D')
+        pause = format_duration_series(df['Pause']); zeit = format_duration_series(df['Zeit'])
+        for i, (obj, slot) in enumerate(zip(df['Objekt'].to_numpy(dtype=object), df['MA_Slot'].to_numpy(dtype=object))):
+            uid = hashlib.sha1(f"{mitarbeiter}|{obj}|{slot}".encode('utf-8')).hexdigest()[:16]
+            zeilen += ['BEGIN:VEVENT', f'UID:{tag[i]}-{uid}@acp', f'DTSTAMP:{stempel}']
+            if ganztags[i]: zeilen += [f'DTSTART;VALUE=DATE:{tag[i]}', f'DTEND;VALUE=DATE:{folgetag[i]}']
+            else: zeilen += [f'DTSTART:{beginn[i]}', f'DTEND:{ende[i]}']
+            # Nur Freitextzeilen können länger als 75 Oktette werden
+            zeilen += [_falten(f'SUMMARY:{_text(f"{obj} ({slot})")}'), _falten(f'LOCATION:{_text(obj)}'),
+                       f'DESCRIPTION:Pause: {pause[i]}\\nArbeitszeit: {zeit[i]}', 'TRANSP:OPAQUE', 'END:VEVENT']
+    zeilen.append('END:VCALENDAR')
+    return ('\r\n'.join(zeilen) + '\r\n').encode('utf-8')
+
+def _atomar_schreiben(pfad, daten):
+    tmp = f"{pfad}.tmp"
+    with open(tmp, 'wb') as f: f.write(daten)
+    os.replace(tmp, pfad)
+
+def fetch_feed_einsaetze(conn, mitarbeiter, ab):
+    """Einsätze ab Datum für mehrere Mitarbeiter in wenigen Abfragen (IN-Listen zu je FEED_CHUNK Namen)."""
+    teile = []
+    for i in range(0, len(mitarbeiter), FEED_CHUNK):
+        namen = mitarbeiter[i:i + FEED_CHUNK]
+        query = f"""
+            SELECT Mitarbeiter, Datum, Objekt, MA_Slot, Anfang, Ende, Pause, Zeit
+            FROM einsaetze
+            WHERE Datum >= %s AND Mitarbeiter IN ({', '.join(['%s'] * len(namen))})
+            ORDER BY Mitarbeiter, Datum, Objekt, MA_Slot
+        """
+        teile.append(pd.read_sql(query, conn, params=(ab, *namen)))
+    return pd.concat(teile, ignore_index=True) if teile else pd.DataFrame(columns=['Mitarbeiter', 'Datum', 'Objekt', 'MA_Slot', 'Anfang', 'Ende', 'Pause', 'Zeit'])
+
+def aktualisiere_feeds(conn, verzeichnis, geheimnis, heute=None, alle=False):
+    """
+    Feeds aller Mitarbeiter mit geänderter Planversion neu schreiben (alle=True: jeden Feed).
+    Der Stand (Version je Mitarbeiter) liegt neben, nicht in dem ausgelieferten Verzeichnis.
+    Rückgabe: Anzahl neu geschriebener Feeds.
+    """
+    heute = heute or date.today()
+    os.makedirs(verzeichnis, exist_ok=True)
+    stand_pfad = f"{os.path.normpath(verzeichnis)}.stand.json"
+    try:
+        with open(stand_pfad, encoding='utf-8') as f: stand = json.load(f)
+    except (FileNotFoundError, ValueError): stand = {}
+
+    # Versionen vor den Einsätzen lesen: der geschriebene Feed ist mindestens so neu wie der vermerkte Stand
+    versionen = fetch_mitarbeiter_versionen(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT Mitarbeitername FROM mitarbeiter_verzeichnis")
+        namen = {m for (m,) in cursor.fetchall() if m}
+    finally: cursor.close()
+    namen |= set(versionen)
+    faellig = sorted(m for m in namen if alle or stand.get(m) != versionen.get(m, 0))
+    if not faellig: return 0
+
+    df = fetch_feed_einsaetze(conn, faellig, heute - timedelta(days=FEED_TAGE_ZURUECK))
+    gruppen = dict(tuple(df.groupby('Mitarbeiter', sort=False)))
+    leer = df.iloc[0:0]
+    jetzt = datetime.now(timezone.utc)
+    for ma in faellig:
+        _atomar_schreiben(os.path.join(verzeichnis, f"{feed_token(ma, geheimnis)}.ics"), ics_feed(gruppen.get(ma, leer), ma, jetzt))
+        stand[ma] = versionen.get(ma, 0)
+    _atomar_schreiben(stand_pfad, json.dumps(stand, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return len(faellig)
@@ -0,0 +1,189 @@
+"""Schema-Migrationen (MySQL/TiDB)."""
+import pandas as pd
+
+from .db import OBJECT_COLUMN_NAME, MA_SLOT_COLUMN_NAME, ART_ARBEITSSTUNDEN, VERSIONED_TABLES
+
+# Jede Migration läuft genau einmal (Tabelle schema_version) und ist so geschrieben,
+# dass sie nach einem Abbruch gefahrlos erneut gestartet werden kann (DDL committet implizit).
+MIGRATION_BATCH_SIZE = 5000
+
+def _column_type(cursor, table, column):
+    cursor.execute("SELECT DATA_TYPE FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s", (table, column))
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+def _index_exists(cursor, table, index_name):
+    cursor.execute("SELECT 1 FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1", (table, index_name))
+    return cursor.fetchone() is not None
+
+def _m001_basistabellen(conn, cursor):
+    cursor.execute("""CREATE TABLE IF NOT EXISTS mitarbeiter_verzeichnis (ID INT AUTO_INCREMENT PRIMARY KEY, Mitarbeitername VARCHAR(255) UNIQUE, Geburtsdatum VARCHAR(20), Personalnummer VARCHAR(50), Bewacher_ID VARCHAR(50), Anstellung VARCHAR(50), Position VARCHAR(50), Vertrag_bis VARCHAR(20), Adresse VARCHAR(255), PLZ VARCHAR(20), Telefonnummer VARCHAR(50), Ausweis_gueltig_bis VARCHAR(20))""")
+    cursor.execute(f"""CREATE TABLE IF NOT EXISTS locations_spalte (ID INT AUTO_INCREMENT PRIMARY KEY, `{OBJECT_COLUMN_NAME}` VARCHAR(255), `{MA_SLOT_COLUMN_NAME}` VARCHAR(255), Ansprechpartner VARCHAR(255), Telefon VARCHAR(100))""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS urlaub_krank (ID INT AUTO_INCREMENT PRIMARY KEY, Datum VARCHAR(20), Mitarbeiter VARCHAR(255), Status VARCHAR(50), UNIQUE KEY ma_date (Datum, Mitarbeiter))""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS einsaetze (EinsatzID INT AUTO_INCREMENT PRIMARY KEY, Datum VARCHAR(20), Objekt VARCHAR(255), MA_Slot VARCHAR(255), Anfang DOUBLE, Ende DOUBLE, Pause DOUBLE, Mitarbeiter VARCHAR(255), Zeit DOUBLE)""")
+
+def _convert_datum_to_date(conn, cursor, table, pk):
+    """
+    VARCHAR-Datum -> DATE: neue Spalte anlegen, in PK-Bereichen befüllen, umbenennen.
+    Nicht lesbare Altwerte bleiben mit ihrem Schlüssel in <table>_datum_alt erhalten.
+    """
+    datum_typ = _column_type(cursor, table, 'Datum')
+    if datum_typ == 'date': return
+    if datum_typ is None:
+        # Abbruch nach DROP COLUMN: nur noch umbenennen
+        cursor.execute(f"ALTER TABLE {table} CHANGE COLUMN Datum_neu Datum DATE NULL")
+        return
+    if _column_type(cursor, table, 'Datum_neu') is None:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN Datum_neu DATE NULL AFTER Datum")
+    cursor.execute(f"SELECT MIN({pk}), MAX({pk}) FROM {table}")
+    lo, hi = cursor.fetchone()
+    if lo is not None:
+        for batch_start in range(lo, hi + 1, MIGRATION_BATCH_SIZE):
+            cursor.execute(
+                f"UPDATE {table} SET Datum_neu = STR_TO_DATE(LEFT(Datum, 10), %s) "
+                f"WHERE {pk} >= %s AND {pk} < %s AND Datum_neu IS NULL AND Datum REGEXP %s",
+                ('%Y-%m-%d', batch_start, batch_start + MIGRATION_BATCH_SIZE, '^[0-9]{4}-[0-9]{2}-[0-9]{2}'))
+            conn.commit()
+    # Vor dem DROP COLUMN: was nicht umgerechnet werden konnte, nicht verwerfen
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_datum_alt ({pk} INT PRIMARY KEY, Datum VARCHAR(20))")
+    cursor.execute(f"INSERT IGNORE INTO {table}_datum_alt ({pk}, Datum) SELECT {pk}, Datum FROM {table} WHERE Datum_neu IS NULL AND Datum IS NOT NULL")
+    conn.commit()
+    # TiDB kann keine Spalte löschen, die in einem zusammengesetzten Index steckt
+    if table == 'urlaub_krank' and _index_exists(cursor, table, 'ma_date'):
+        cursor.execute("ALTER TABLE urlaub_krank DROP INDEX ma_date")
+    cursor.execute(f"ALTER TABLE {table} DROP COLUMN Datum")
+    cursor.execute(f"ALTER TABLE {table} CHANGE COLUMN Datum_neu Datum DATE NULL")
+
+def _m002_datum_als_date(conn, cursor):
+    _convert_datum_to_date(conn, cursor, 'einsaetze', 'EinsatzID')
+    _convert_datum_to_date(conn, cursor, 'urlaub_krank', 'ID')
+    if not _index_exists(cursor, 'urlaub_krank', 'uq_uk_ma_datum'):
+        cursor.execute("ALTER TABLE urlaub_krank ADD UNIQUE KEY uq_uk_ma_datum (Mitarbeiter, Datum)")
+
+def _m003_einsatz_indizes(conn, cursor):
+    if not _index_exists(cursor, 'einsaetze', 'uq_einsatz_zelle'):
+        # Doppelte Planzellen (aus alten Speichervorgängen) bereinigen, neueste bleibt
+        cursor.execute("""DELETE e1 FROM einsaetze e1 JOIN einsaetze e2
+                          ON e1.Objekt = e2.Objekt AND e1.Datum = e2.Datum AND e1.MA_Slot = e2.MA_Slot AND e1.EinsatzID < e2.EinsatzID""")
+        conn.commit()
+        cursor.execute("ALTER TABLE einsaetze ADD UNIQUE KEY uq_einsatz_zelle (Objekt, Datum, MA_Slot)")
+    if not _index_exists(cursor, 'einsaetze', 'idx_einsatz_ma_datum'):
+        cursor.execute("ALTER TABLE einsaetze ADD INDEX idx_einsatz_ma_datum (Mitarbeiter, Datum)")
+
+def _m004_mitarbeiter_monat(conn, cursor):
+    # Vorberechnete Monatswerte je Mitarbeiter: Art = 'Arbeitsstunden' (Summe Zeit) oder Abwesenheits-Status (Anzahl Tage)
+    cursor.execute("CREATE TABLE IF NOT EXISTS mitarbeiter_monat (Monat CHAR(7), Mitarbeiter VARCHAR(255), Art VARCHAR(50), Wert DOUBLE, PRIMARY KEY (Monat, Mitarbeiter, Art))")
+    cursor.execute("DELETE FROM mitarbeiter_monat")
+    cursor.execute(f"""INSERT INTO mitarbeiter_monat (Monat, Mitarbeiter, Art, Wert)
+                       SELECT DATE_FORMAT(Datum, '%Y-%m'), Mitarbeiter, '{ART_ARBEITSSTUNDEN}', SUM(Zeit) FROM einsaetze
+                       WHERE Datum IS NOT NULL AND Mitarbeiter IS NOT NULL AND Mitarbeiter != '' GROUP BY DATE_FORMAT(Datum, '%Y-%m'), Mitarbeiter""")
+    cursor.execute("""INSERT INTO mitarbeiter_monat (Monat, Mitarbeiter, Art, Wert)
+                      SELECT DATE_FORMAT(Datum, '%Y-%m'), Mitarbeiter, Status, COUNT(*) FROM urlaub_krank
+                      WHERE Datum IS NOT NULL AND Status IS NOT NULL AND Status != '' GROUP BY DATE_FORMAT(Datum, '%Y-%m'), Mitarbeiter, Status""")
+
+def _m005_monatskatalog(conn, cursor):
+    # Alle Monate mit Einsätzen oder Abwesenheiten – Quelle für die Monatsauswahl der Auswertung
+    cursor.execute("CREATE TABLE IF NOT EXISTS monatskatalog (Monat CHAR(7) PRIMARY KEY)")
+    cursor.execute("""INSERT IGNORE INTO monatskatalog (Monat)
+                      SELECT DISTINCT DATE_FORMAT(Datum, '%Y-%m') FROM einsaetze WHERE Datum IS NOT NULL
+                      UNION SELECT DISTINCT DATE_FORMAT(Datum, '%Y-%m') FROM urlaub_krank WHERE Datum IS NOT NULL""")
+
+def _m006_tabellen_version(conn, cursor):
+    cursor.execute("CREATE TABLE IF NOT EXISTS tabellen_version (Tabelle VARCHAR(64) PRIMARY KEY, Version BIGINT NOT NULL DEFAULT 0)")
+    cursor.executemany("INSERT IGNORE INTO tabellen_version (Tabelle, Version) VALUES (%s, 0)", [(t,) for t in VERSIONED_TABLES])
+
+def _day_rows_to_intervals(df):
+    """Einzeltage (Mitarbeiter, Datum, Status) zu zusammenhängenden Zeiträumen gleichen Status verdichten."""
+    df = df.assign(Datum=pd.to_datetime(df['Datum'])).sort_values(['Mitarbeiter', 'Datum'])
+    neu = ((df['Datum'].diff().dt.days != 1) | (df['Status'] != df['Status'].shift()) | (df['Mitarbeiter'] != df['Mitarbeiter'].shift()))
+    grp = df.groupby(neu.cumsum())
+    return pd.DataFrame({'Mitarbeiter': grp['Mitarbeiter'].first(), 'Von': grp['Datum'].min().dt.date, 'Bis': grp['Datum'].max().dt.date, 'Status': grp['Status'].first()})
+
+def _m007_abwesenheit_zeitraeume(conn, cursor):
+    # urlaub_krank: eine Zeile pro Tag -> eine Zeile pro Zeitraum (Mitarbeiter, Von, Bis, Status).
+    # Die Tageszeilen bleiben als urlaub_krank_tage erhalten.
+    if _column_type(cursor, 'urlaub_krank', 'Von') is not None: return
+    cursor.execute("DROP TABLE IF EXISTS urlaub_krank_neu")
+    cursor.execute("""CREATE TABLE urlaub_krank_neu (ID INT AUTO_INCREMENT PRIMARY KEY, Mitarbeiter VARCHAR(255) NOT NULL, Von DATE NOT NULL, Bis DATE NOT NULL, Status VARCHAR(50),
+                      INDEX idx_uk_ma_zeitraum (Mitarbeiter, Von, Bis), INDEX idx_uk_zeitraum (Von, Bis))""")
+    cursor.execute("SELECT DISTINCT Mitarbeiter FROM urlaub_krank WHERE Mitarbeiter IS NOT NULL AND Datum IS NOT NULL ORDER BY Mitarbeiter")
+    mitarbeiter = [row[0] for row in cursor.fetchall()]
+    # Batches nach Mitarbeitern, damit nie die ganze Historie im Speicher liegt
+    batch = max(1, MIGRATION_BATCH_SIZE // 366)
+    for i in range(0, len(mitarbeiter), batch):
+        mas = mitarbeiter[i:i + batch]
+        ph = ', '.join(['%s'] * len(mas))
+        cursor.execute(f"SELECT Mitarbeiter, Datum, Status FROM urlaub_krank WHERE Mitarbeiter IN ({ph}) AND Datum IS NOT NULL", mas)
+        df = pd.DataFrame(cursor.fetchall(), columns=['Mitarbeiter', 'Datum', 'Status'])
+        if df.empty: continue
+        iv = _day_rows_to_intervals(df)
+        cursor.executemany("INSERT INTO urlaub_krank_neu (Mitarbeiter, Von, Bis, Status) VALUES (%s, %s, %s, %s)", list(iv.itertuples(index=False, name=None)))
+        conn.commit()
+    cursor.execute("RENAME TABLE urlaub_krank TO urlaub_krank_tage, urlaub_krank_neu TO urlaub_krank")
+
+def _m008_standorte(conn, cursor):
+    # locations_spalte (eine Zeile pro Slot, Stammdaten wiederholt) -> standorte + standort_slots.
+    # Die alte Tabelle bleibt als locations_spalte_alt erhalten.
+    cursor.execute("""CREATE TABLE IF NOT EXISTS standorte (ID INT AUTO_INCREMENT PRIMARY KEY, Name VARCHAR(255) NOT NULL, Ansprechpartner VARCHAR(255), Telefon VARCHAR(100),
+                      UNIQUE KEY uq_standort_name (Name))""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS standort_slots (ID INT AUTO_INCREMENT PRIMARY KEY, StandortID INT NOT NULL, MA_Slot VARCHAR(255) NOT NULL,
+                      UNIQUE KEY uq_standort_slot (StandortID, MA_Slot),
+                      CONSTRAINT fk_slot_standort FOREIGN KEY (StandortID) REFERENCES standorte (ID) ON DELETE CASCADE)""")
+    cursor.execute("INSERT IGNORE INTO tabellen_version (Tabelle, Version) VALUES ('standorte', 0)")
+    if _column_type(cursor, 'locations_spalte', OBJECT_COLUMN_NAME) is None: return
+    cursor.execute(f"""INSERT IGNORE INTO standorte (Name, Ansprechpartner, Telefon)
+                      SELECT `{OBJECT_COLUMN_NAME}`, MAX(NULLIF(Ansprechpartner, '')), MAX(NULLIF(Telefon, '')) FROM locations_spalte
+                      WHERE `{OBJECT_COLUMN_NAME}` IS NOT NULL AND `{OBJECT_COLUMN_NAME}` != '' GROUP BY `{OBJECT_COLUMN_NAME}`""")
+    cursor.execute(f"""INSERT IGNORE INTO standort_slots (StandortID, MA_Slot)
+                      SELECT DISTINCT s.ID, l.`{MA_SLOT_COLUMN_NAME}` FROM locations_spalte l JOIN standorte s ON s.Name = l.`{OBJECT_COLUMN_NAME}`
+                      WHERE l.`{MA_SLOT_COLUMN_NAME}` IS NOT NULL AND l.`{MA_SLOT_COLUMN_NAME}` != ''""")
+    conn.commit()
+    cursor.execute("RENAME TABLE locations_spalte TO locations_spalte_alt")
+
+def _m009_standort_region(conn, cursor):
+    if _column_type(cursor, 'standorte', 'Region') is None:
+        cursor.execute("ALTER TABLE standorte ADD COLUMN Region VARCHAR(100) NULL AFTER Name, ADD INDEX idx_standort_region (Region)")
+
+def _m010_einsatz_version(conn, cursor):
+    # Zeilenversion je Planzelle für optimistisches Sperren beim Speichern
+    if _column_type(cursor, 'einsaetze', 'Version') is None:
+        cursor.execute("ALTER TABLE einsaetze ADD COLUMN Version INT NOT NULL DEFAULT 0")
+
+def _m011_mitarbeiter_plan_version(conn, cursor):
+    # Planversion je Mitarbeiter: 'Mein Plan'-Cache und iCal-Feeds werden nur für geänderte Mitarbeiter erneuert
+    cursor.execute("CREATE TABLE IF NOT EXISTS mitarbeiter_plan_version (Mitarbeiter VARCHAR(255) PRIMARY KEY, Version BIGINT NOT NULL DEFAULT 0)")
+
+MIGRATIONS = [
+    (1, "Basistabellen", _m001_basistabellen),
+    (2, "Datum als DATE (einsaetze, urlaub_krank)", _m002_datum_als_date),
+    (3, "Indizes + eindeutige Planzelle (einsaetze)", _m003_einsatz_indizes),
+    (4, "Monatsaggregat je Mitarbeiter", _m004_mitarbeiter_monat),
+    (5, "Monatskatalog", _m005_monatskatalog),
+    (6, "Tabellen-Versionen für Cache-Invalidierung", _m006_tabellen_version),
+    (7, "Abwesenheiten als Zeiträume (urlaub_krank)", _m007_abwesenheit_zeitraeume),
+    (8, "Standorte und Slots normalisiert", _m008_standorte),
+    (9, "Region je Standort", _m009_standort_region),
+    (10, "Zeilenversion je Einsatz", _m010_einsatz_version),
+    (11, "Planversion je Mitarbeiter", _m011_mitarbeiter_plan_version),
+]
+
+def run_migrations(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (Version INT PRIMARY KEY, Beschreibung VARCHAR(255), Ausgefuehrt_am DATETIME)")
+        # Mehrere App-Instanzen: nur eine migriert, die anderen warten
+        cursor.execute("SELECT GET_LOCK('acp_schema_migration', 300)")
+        cursor.fetchone()
+        try:
+            cursor.execute("SELECT COALESCE(MAX(Version), 0) FROM schema_version")
+            current = cursor.fetchone()[0]
+            for version, beschreibung, migrate in MIGRATIONS:
+                if version <= current: continue
+                migrate(conn, cursor)
+                cursor.execute("INSERT INTO schema_version (Version, Beschreibung, Ausgefuehrt_am) VALUES (%s, %s, NOW())", (version, beschreibung))
+                conn.commit()
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('acp_schema_migration')")
+            cursor.fetchone()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
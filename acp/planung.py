@@ -0,0 +1,362 @@
+"""Planungslogik: Raster, Konfliktprüfungen (Abwesenheit, Doppelbuchung) und differenzielles Speichern."""
+import numpy as np
+import pandas as pd
+
+from .db import ART_ARBEITSSTUNDEN, ER_DUP_ENTRY, bump_table_version, bump_mitarbeiter_version
+from .zeit import DATE_FORMAT, natural_sort_key, GERMAN_WEEKDAYS, month_bounds, float_to_input_str, format_time_series, format_duration_series
+
+PLAN_KEY = ['Datum', 'Objekt', 'MA_Slot']
+PLAN_VALUES = ['Anfang', 'Ende', 'Pause', 'Mitarbeiter', 'Zeit']
+PLAN_GRID_FIELDS = ['Mitarbeiter', 'Anfang', 'Ende', 'Pause', 'Zeit']
+
+def expand_abwesenheiten(df_intervals, von, bis):
+    """Zeiträume (Von, Bis) auf Einzeltage innerhalb [von, bis] abbilden – nur für Tagesansichten."""
+    if df_intervals.empty: return pd.DataFrame(columns=['Mitarbeiter', 'Datum', 'Status'])
+    v = pd.to_datetime(df_intervals['Von']).clip(lower=pd.Timestamp(von)).to_numpy().astype('datetime64[D]')
+    b = pd.to_datetime(df_intervals['Bis']).clip(upper=pd.Timestamp(bis)).to_numpy().astype('datetime64[D]')
+    n = np.clip((b - v).astype(np.int64) + 1, 0, None)
+    idx = np.repeat(np.arange(len(df_intervals)), n)
+    offsets = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    return pd.DataFrame({
+        'Mitarbeiter': df_intervals['Mitarbeiter'].to_numpy()[idx],
+        'Datum': pd.to_datetime(v[idx] + offsets.astype('timedelta64[D]')),
+        'Status': df_intervals['Status'].to_numpy()[idx],
+    })
+
+def build_absence_index(urlaub_krank_df):
+    """
+    Einmal pro Speichervorgang: (Mitarbeiter, Datum) -> Status als Series mit MultiIndex.
+    Ersetzt das Filtern des kompletten urlaub_krank-Frames pro Zelle.
+    """
+    if urlaub_krank_df.empty:
+        return pd.Series([], dtype=object, index=pd.MultiIndex.from_arrays([[], []], names=['Mitarbeiter', 'Datum']))
+    status = urlaub_krank_df['Status'].fillna('').astype(str).str.strip()
+    df = urlaub_krank_df.loc[status != '', ['Mitarbeiter', 'Datum']].copy()
+    df['Datum'] = pd.to_datetime(df['Datum']).dt.strftime(DATE_FORMAT)
+    idx = pd.MultiIndex.from_frame(df, names=['Mitarbeiter', 'Datum'])
+    index = pd.Series(status[status != ''].to_numpy(), index=idx)
+    return index[~index.index.duplicated(keep='first')]
+
+def find_absence_conflicts(absence_index, df_rows):
+    """Alle geplanten Einsätze, die auf eine Abwesenheit fallen – ein Join statt Zelle für Zelle."""
+    if df_rows.empty or absence_index.empty: return []
+    df = df_rows[df_rows['Mitarbeiter'].fillna('').astype(str).str.strip() != '']
+    if df.empty: return []
+    keys = pd.MultiIndex.from_arrays([df['Mitarbeiter'], pd.to_datetime(df['Datum']).dt.strftime(DATE_FORMAT)])
+    status = absence_index.reindex(keys).to_numpy()
+    hit = pd.notna(status)
+    datum = pd.to_datetime(df['Datum']).dt.date.to_numpy()
+    conflicts = [(datum[i], df['Mitarbeiter'].iloc[i], f"⚠️ {status[i]}") for i in np.flatnonzero(hit)]
+    conflicts.sort(key=lambda c: (c[0], c[1]))
+    return conflicts
+
+def _shift_intervals(df):
+    """
+    Schichten als absolute Intervalle in Tagen seit 1970-01-01.
+    Nachtschichten (Ende < Anfang) laufen in den Folgetag hinein.
+    """
+    tag = pd.to_datetime(df['Datum']).to_numpy().astype('datetime64[D]').astype(np.int64).astype(float)
+    anfang = df['Anfang'].fillna(0.0).to_numpy(dtype=float)
+    ende = df['Ende'].fillna(0.0).to_numpy(dtype=float)
+    return tag + anfang, tag + ende + (ende < anfang)
+
+def _has_shift(df):
+    ma = df['Mitarbeiter'].fillna('').astype(str).str.strip()
+    return (ma != '') & ((df['Anfang'].fillna(0) != 0) | (df['Ende'].fillna(0) != 0))
+
+def find_overlaps(df_plan, df_other, nur_andere_objekte=False):
+    """
+    Alle Überschneidungen zwischen geplanten Schichten (df_plan) und bestehenden
+    Schichten (df_other) desselben Mitarbeiters. Beide Frames brauchen
+    Datum, Anfang, Ende, Mitarbeiter; df_other zusätzlich Objekt und MA_Slot.
+    nur_andere_objekte: Treffer im selben Objekt ignorieren (Abgleich eines Plans mit sich selbst);
+    Paare, die in beiden Richtungen gefunden werden, nur einmal melden.
+    Rückgabe: Liste (Datum, Mitarbeiter, Meldung), sortiert nach Datum.
+    """
+    p = df_plan[_has_shift(df_plan)]
+    o = df_other[_has_shift(df_other)] if not df_other.empty else df_other
+    if p.empty or o.empty: return []
+
+    codes, _ = pd.factorize(pd.concat([p['Mitarbeiter'], o['Mitarbeiter']], ignore_index=True))
+    p_code = codes[:len(p)].astype(float); o_code = codes[len(p):].astype(float)
+    p_s, p_e = _shift_intervals(p)
+    o_s, o_e = _shift_intervals(o)
+
+    # Sortierter Schlüssel (Mitarbeiter-Block, Start): Kandidaten für eine Schicht sind
+    # die Schichten desselben MA, die nach (Start - max. Schichtlänge) und vor ihrem Ende beginnen.
+    base = min(p_s.min(), o_s.min())
+    max_len = max(1.0, float((o_e - o_s).max()))
+    span = max(p_e.max(), o_e.max()) - base + max_len + 1.0
+    o_key = o_code * span + (o_s - base)
+    order = np.argsort(o_key, kind='stable')
+    o_key_sorted = o_key[order]
+    lo = np.searchsorted(o_key_sorted, p_code * span + (p_s - base) - max_len, side='right')
+    hi = np.searchsorted(o_key_sorted, p_code * span + (p_e - base), side='left')
+    counts = np.clip(hi - lo, 0, None)
+    if counts.sum() == 0: return []
+
+    p_idx = np.repeat(np.arange(len(p)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    o_idx = order[np.repeat(lo, counts) + offsets]
+    hit = np.maximum(p_s[p_idx], o_s[o_idx]) < np.minimum(p_e[p_idx], o_e[o_idx])
+    if nur_andere_objekte:
+        hit &= p['Objekt'].to_numpy()[p_idx] != o['Objekt'].to_numpy()[o_idx]
+    p_idx = p_idx[hit]; o_idx = o_idx[hit]
+
+    conflicts = []
+    p_datum = pd.to_datetime(p['Datum']).dt.date.to_numpy()
+    o_datum = pd.to_datetime(o['Datum']).dt.date.to_numpy()
+    if nur_andere_objekte and len(p_idx):
+        # Liegen beide Schichten eines Paares im Plan, wird es von beiden Seiten gefunden -> eine Richtung behalten
+        p_key = list(zip(p_datum, p['Objekt'], p['MA_Slot'])); o_key = list(zip(o_datum, o['Objekt'], o['MA_Slot']))
+        paare = {(p_key[i], o_key[j]) for i, j in zip(p_idx, o_idx)}
+        behalten = np.array([p_key[i] < o_key[j] or (o_key[j], p_key[i]) not in paare for i, j in zip(p_idx, o_idx)], dtype=bool)
+        p_idx = p_idx[behalten]; o_idx = o_idx[behalten]
+    for i, j in zip(p_idx, o_idx):
+        other = o.iloc[j]
+        t_start = float_to_input_str(other['Anfang'])
+        t_end = float_to_input_str(other['Ende'])
+        tag_info = "" if o_datum[j] == p_datum[i] else f", {o_datum[j].strftime('%d.%m.%Y')}"
+        conflicts.append((p_datum[i], p['Mitarbeiter'].iloc[i], f"Überschneidung mit '{other['Objekt']} ({other['MA_Slot']})' ({t_start}-{t_end}{tag_info})"))
+    conflicts.sort(key=lambda c: (c[0], c[1]))
+    return conflicts
+
+def find_double_bookings(conn, df_rows, current_objects):
+    """
+    Doppelbuchungs-Prüfung für einen kompletten Speichervorgang: lädt alle Einsätze
+    der betroffenen Mitarbeiter in nicht geladenen Objekten mit einer einzigen Abfrage
+    (inkl. Vortag/Folgetag für Nachtschichten) und gleicht sie in einem Durchlauf ab.
+    Zwischen den gerade bearbeiteten Objekten wird im Speicher gegen den Plan selbst geprüft.
+    """
+    if df_rows.empty: return []
+    plan = df_rows[_has_shift(df_rows)]
+    if plan.empty: return []
+
+    tage = pd.to_datetime(plan['Datum'])
+    von = (tage.min() - pd.Timedelta(days=1)).strftime(DATE_FORMAT)
+    bis = (tage.max() + pd.Timedelta(days=1)).strftime(DATE_FORMAT)
+    mas = sorted(plan['Mitarbeiter'].unique())
+    objs = sorted(current_objects)
+    ph_ma = ', '.join(['%s'] * len(mas)); ph_obj = ', '.join(['%s'] * len(objs))
+    query = f"SELECT Datum, Objekt, MA_Slot, Anfang, Ende, Mitarbeiter FROM einsaetze WHERE Mitarbeiter IN ({ph_ma}) AND Datum >= %s AND Datum <= %s AND Objekt NOT IN ({ph_obj})"
+    df_other = pd.read_sql(query, conn, params=(*mas, von, bis, *objs))
+    conflicts = find_overlaps(plan, df_other)
+    if len(objs) > 1: conflicts += find_overlaps(plan, plan, nur_andere_objekte=True)
+    conflicts.sort(key=lambda c: (c[0], c[1]))
+    return conflicts
+
+def build_plan_grid(df_saved, slots, d_start, d_end):
+    """
+    Planungsraster (ein Tag pro Zeile, fünf Spalten je Slot) mit einem einzigen Pivot
+    über (Datum x MA_Slot) statt einem Merge pro Slot.
+    Rückgabe: (df_plan, {slot: hat_inhalt})
+    """
+    rng = pd.date_range(d_start, d_end)
+    wt = rng.weekday
+    df_plan = pd.DataFrame({'Datum': rng.date})
+    # Wochentag im Datum Text für Anzeige (Wochenende markieren)
+    df_plan['Datum_Tag'] = np.where(wt >= 5, '🟥 ', '') + rng.strftime('%d.%m.%Y').to_numpy(dtype=object) + ' (' + np.array(GERMAN_WEEKDAYS, dtype=object)[wt] + ')'
+
+    df_m = df_saved[(df_saved['Datum'] >= d_start) & (df_saved['Datum'] <= d_end) & df_saved['MA_Slot'].isin(slots)]
+    df_m = df_m.drop_duplicates(['Datum', 'MA_Slot'], keep='last')
+    has_content = (df_m['Mitarbeiter'].notna() | (df_m['Anfang'] > 0)).groupby(df_m['MA_Slot']).any()
+    has_content = {s: bool(has_content.get(s, False)) for s in slots}
+
+    df_m = df_m.assign(Anfang=format_time_series(df_m['Anfang']), Ende=format_time_series(df_m['Ende']))
+    wide = df_m.pivot(index='Datum', columns='MA_Slot', values=PLAN_GRID_FIELDS)
+    wide = wide.reindex(index=df_plan['Datum'], columns=pd.MultiIndex.from_product([PLAN_GRID_FIELDS, slots]))
+    wide = wide.astype(object).where(wide.notna(), None)
+    wide.columns = [f'{slot}_{field}' for field, slot in wide.columns]
+    wide = wide.reset_index(drop=True)
+    for slot in slots:
+        for field in ['Pause', 'Zeit']:
+            wide[f'{slot}_{field}'] = pd.to_numeric(wide[f'{slot}_{field}'], errors='coerce')
+    ordered = [f'{slot}_{field}' for slot in slots for field in PLAN_GRID_FIELDS]
+    return pd.concat([df_plan, wide[ordered]], axis=1), has_content
+
+def fetch_einsaetze_for_objects(conn, object_names, start_date, end_date):
+    """Einsätze eines Zeitraums für ein oder mehrere Objekte mit einer Abfrage."""
+    ph = ', '.join(['%s'] * len(object_names))
+    query = f"SELECT * FROM einsaetze WHERE Objekt IN ({ph}) AND Datum >= %s AND Datum <= %s ORDER BY Objekt, Datum"
+    df = pd.read_sql(query, conn, params=(*object_names, start_date, end_date))
+    df['Datum'] = pd.to_datetime(df['Datum']).dt.date
+    return df
+
+def fetch_abwesenheiten(conn, start_date, end_date):
+    """Abwesenheits-Zeiträume, die [start_date, end_date] berühren."""
+    query = "SELECT ID, Mitarbeiter, Von, Bis, Status FROM urlaub_krank WHERE Von <= %s AND Bis >= %s"
+    return pd.read_sql(query, conn, params=(end_date, start_date))
+
+def fetch_mein_plan(conn, mitarbeiter, start_date, end_date):
+    query = """
+        SELECT Datum, Objekt, MA_Slot, Anfang, Ende, Pause, Zeit 
+        FROM einsaetze 
+        WHERE Mitarbeiter = %s AND Datum >= %s AND Datum <= %s
+        ORDER BY Datum
+    """
+    return pd.read_sql(query, conn, params=(mitarbeiter, start_date, end_date))
+
+def build_mein_plan(df):
+    """Anzeige-Tabelle für 'Mein Plan', spaltenweise formatiert."""
+    datum = pd.to_datetime(df['Datum'])
+    return pd.DataFrame({
+        'Datum': datum.dt.strftime('%d.%m.%Y').to_numpy(),
+        'Tag': np.array(GERMAN_WEEKDAYS, dtype=object)[datum.dt.weekday.to_numpy()],
+        'Objekt': df['Objekt'].to_numpy(),
+        'Position': df['MA_Slot'].to_numpy(),
+        'Von': format_time_series(df['Anfang']),
+        'Bis': format_time_series(df['Ende']),
+        'Dauer': format_duration_series(df['Zeit']),
+    })
+
+def _normalize_plan_rows(df):
+    df = df.copy()
+    df['Datum'] = pd.to_datetime(df['Datum']).dt.strftime(DATE_FORMAT)
+    for c in ['Anfang', 'Ende', 'Pause', 'Zeit']:
+        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0.0).astype(float)
+    df['Mitarbeiter'] = df['Mitarbeiter'].fillna('').astype(str)
+    return df
+
+def diff_einsaetze(df_new, df_old):
+    """
+    Vergleicht den bearbeiteten Plan mit dem geladenen Stand, Schlüssel (Datum, Objekt, MA_Slot).
+    Rückgabe: (neue Zeilen, geänderte Zeilen inkl. EinsatzID, zu löschende EinsatzIDs)
+    """
+    cols = PLAN_KEY + PLAN_VALUES
+    new = _normalize_plan_rows(df_new[cols]) if not df_new.empty else pd.DataFrame(columns=cols)
+    old = _normalize_plan_rows(df_old[cols + ['EinsatzID']]) if not df_old.empty else pd.DataFrame(columns=cols + ['EinsatzID'])
+
+    # Altlasten: mehrfach vorhandene Zellen bis auf eine entfernen
+    dup = old.duplicated(PLAN_KEY, keep='first')
+    delete_ids = old.loc[dup, 'EinsatzID'].tolist()
+    old = old[~dup]
+
+    m = new.merge(old, on=PLAN_KEY, how='outer', suffixes=('', '_alt'), indicator=True)
+    inserts = m.loc[m['_merge'] == 'left_only', cols]
+    delete_ids += m.loc[m['_merge'] == 'right_only', 'EinsatzID'].tolist()
+
+    both = m[m['_merge'] == 'both']
+    changed = both['Mitarbeiter'] != both['Mitarbeiter_alt']
+    for c in ['Anfang', 'Ende', 'Pause', 'Zeit']:
+        changed |= ~np.isclose(both[c].astype(float), both[f'{c}_alt'].astype(float), rtol=0.0, atol=1e-9)
+    updates = both.loc[changed, cols + ['EinsatzID']]
+    return inserts, updates, [int(i) for i in delete_ids]
+
+def refresh_mitarbeiter_monat(cursor, monate, mitarbeiter):
+    """
+    Aggregat mitarbeiter_monat für die betroffenen (Monat, Mitarbeiter) neu berechnen.
+    Läuft in der Transaktion des Aufrufers; nutzt den Index (Mitarbeiter, Datum).
+    """
+    mas = sorted({m for m in mitarbeiter if m})
+    if not mas: return
+    ph = ', '.join(['%s'] * len(mas))
+    for monat in sorted(set(monate)):
+        von, bis = month_bounds(monat)
+        cursor.execute(f"DELETE FROM mitarbeiter_monat WHERE Monat = %s AND Mitarbeiter IN ({ph})", (monat, *mas))
+        cursor.execute(f"""INSERT INTO mitarbeiter_monat (Monat, Mitarbeiter, Art, Wert)
+                           SELECT %s, Mitarbeiter, %s, SUM(Zeit) FROM einsaetze
+                           WHERE Mitarbeiter IN ({ph}) AND Datum >= %s AND Datum <= %s GROUP BY Mitarbeiter""",
+                       (monat, ART_ARBEITSSTUNDEN, *mas, von, bis))
+        # Abwesenheitstage: Zeiträume auf den Monat zuschneiden und zählen
+        cursor.execute(f"""SELECT Mitarbeiter, Von, Bis, Status FROM urlaub_krank
+                           WHERE Mitarbeiter IN ({ph}) AND Von <= %s AND Bis >= %s AND Status IS NOT NULL AND Status != ''""",
+                       (*mas, bis, von))
+        tage = {}
+        for ma, v, b, status in cursor.fetchall():
+            n = (min(pd.Timestamp(b), pd.Timestamp(bis)) - max(pd.Timestamp(v), pd.Timestamp(von))).days + 1
+            if n > 0: tage[(ma, status)] = tage.get((ma, status), 0) + n
+        if tage:
+            cursor.executemany("INSERT INTO mitarbeiter_monat (Monat, Mitarbeiter, Art, Wert) VALUES (%s, %s, %s, %s)",
+                               [(monat, ma, status, n) for (ma, status), n in sorted(tage.items())])
+
+def register_monate(cursor, monate):
+    """Monate ('YYYY-MM') in den Monatskatalog aufnehmen; läuft in der Transaktion des Aufrufers."""
+    monate = sorted(set(monate))
+    if monate: cursor.executemany("INSERT IGNORE INTO monatskatalog (Monat) VALUES (%s)", [(m,) for m in monate])
+
+class PlanKonflikt(Exception):
+    """Speichern abgebrochen: Zellen wurden seit dem Laden von anderen geändert. zellen: Liste von Dicts."""
+    def __init__(self, zellen):
+        super().__init__(f"{len(zellen)} Zelle(n) wurden zwischenzeitlich von anderen geändert")
+        self.zellen = zellen
+
+def _konflikt_zellen(conn, df_old, inserts, updates, delete_ids, object_names, start_date, end_date):
+    """Nach dem Rollback: welche der angefassten Zellen hat sich in der DB gegenüber dem geladenen Stand geändert?"""
+    ph = ', '.join(['%s'] * len(object_names))
+    aktuell = pd.read_sql(f"SELECT EinsatzID, Datum, Objekt, MA_Slot, Mitarbeiter, Version FROM einsaetze WHERE Objekt IN ({ph}) AND Datum >= %s AND Datum <= %s",
+                          conn, params=(*object_names, start_date, end_date))
+    aktuell['Datum'] = pd.to_datetime(aktuell['Datum']).dt.strftime(DATE_FORMAT)
+    nach_id = aktuell.set_index('EinsatzID')
+    nach_zelle = aktuell.set_index(PLAN_KEY)
+    alt = df_old.set_index('EinsatzID')
+    zellen = []
+    for i in list(updates['EinsatzID'].astype(int)) + list(delete_ids):
+        a = alt.loc[i]
+        datum = pd.Timestamp(a['Datum']).strftime(DATE_FORMAT)
+        if i not in nach_id.index:
+            zellen.append({'Datum': datum, 'Objekt': a['Objekt'], 'MA_Slot': a['MA_Slot'], 'Art': 'gelöscht', 'Mitarbeiter': None})
+        elif int(nach_id.at[i, 'Version']) != int(a['Version']):
+            zellen.append({'Datum': datum, 'Objekt': a['Objekt'], 'MA_Slot': a['MA_Slot'], 'Art': 'geändert', 'Mitarbeiter': nach_id.at[i, 'Mitarbeiter']})
+    for r in inserts.itertuples(index=False):
+        if (r.Datum, r.Objekt, r.MA_Slot) in nach_zelle.index:
+            zellen.append({'Datum': r.Datum, 'Objekt': r.Objekt, 'MA_Slot': r.MA_Slot, 'Art': 'neu angelegt', 'Mitarbeiter': nach_zelle.loc[(r.Datum, r.Objekt, r.MA_Slot), 'Mitarbeiter']})
+    zellen.sort(key=lambda z: (z['Datum'], z['Objekt'], natural_sort_key(z['MA_Slot'])))
+    return zellen
+
+def save_einsaetze_to_db(conn, df_einsaetze, df_saved, object_names, start_date, end_date):
+    """
+    Differenzielles Speichern eines Monats für ein oder mehrere Objekte: nur tatsächlich
+    geänderte Zellen werden geschrieben (INSERT/UPDATE/DELETE) – in einer kurzen Transaktion.
+
+    Optimistisch gesperrt über die Zeilenversion: UPDATE/DELETE greifen nur, wenn die Zelle noch
+    die geladene Version hat; ein INSERT auf eine inzwischen angelegte Zelle (eindeutiger Schlüssel)
+    zählt ebenso als Konflikt. Dann wird zurückgerollt und PlanKonflikt mit den betroffenen Zellen
+    geworfen – ohne auf andere Planer zu warten und ohne deren Änderungen zu überschreiben.
+    df_saved muss daher der Stand sein, auf dem der Plan bearbeitet wurde.
+    Rückgabe: {'neu': n, 'geaendert': n, 'geloescht': n}
+    """
+    if isinstance(object_names, str): object_names = [object_names]
+    df_old = df_saved
+    if not df_old.empty:
+        datum_alt = pd.to_datetime(df_old['Datum']).dt.date
+        df_old = df_old[df_old['Objekt'].isin(object_names) & (datum_alt >= start_date) & (datum_alt <= end_date)]
+    inserts, updates, delete_ids = diff_einsaetze(df_einsaetze, df_old)
+    version = dict(zip(df_old['EinsatzID'].astype(int), df_old['Version'].astype(int))) if not df_old.empty else {}
+    # Betroffene Mitarbeiter: neue Werte + vorherige Besetzung geänderter/gelöschter Zellen
+    betroffen = set(inserts['Mitarbeiter']) | set(updates['Mitarbeiter'])
+    if not df_old.empty:
+        alt = df_old[df_old['EinsatzID'].isin(set(updates['EinsatzID'].astype(int)) | set(delete_ids))]
+        betroffen |= set(alt['Mitarbeiter'].dropna())
+
+    cursor = conn.cursor()
+    konflikt = False
+    try:
+        if delete_ids:
+            cursor.executemany("DELETE FROM einsaetze WHERE EinsatzID = %s AND Version = %s", [(i, version[i]) for i in delete_ids])
+            konflikt = cursor.rowcount != len(delete_ids)
+        if not konflikt and not updates.empty:
+            data = [(r.Anfang, r.Ende, r.Pause, r.Mitarbeiter or None, r.Zeit, int(r.EinsatzID), version[int(r.EinsatzID)]) for r in updates.itertuples(index=False)]
+            cursor.executemany("UPDATE einsaetze SET Anfang = %s, Ende = %s, Pause = %s, Mitarbeiter = %s, Zeit = %s, Version = Version + 1 WHERE EinsatzID = %s AND Version = %s", data)
+            konflikt = cursor.rowcount != len(data)
+        if not konflikt and not inserts.empty:
+            data = [(r.Datum, r.Objekt, r.MA_Slot, r.Anfang, r.Ende, r.Pause, r.Mitarbeiter or None, r.Zeit) for r in inserts.itertuples(index=False)]
+            sql = "INSERT INTO einsaetze (Datum, Objekt, MA_Slot, Anfang, Ende, Pause, Mitarbeiter, Zeit) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+            try: cursor.executemany(sql, data)
+            except Exception as e:
+                # Nur eine inzwischen von jemand anderem angelegte Zelle ist ein Konflikt; andere Fehler gehen weiter
+                if getattr(e, 'errno', None) != ER_DUP_ENTRY: raise
+                konflikt = True
+            if not konflikt: register_monate(cursor, inserts['Datum'].str[:7])
+        if konflikt:
+            conn.rollback()
+        else:
+            refresh_mitarbeiter_monat(cursor, [start_date.strftime('%Y-%m')], betroffen)
+            bump_mitarbeiter_version(cursor, betroffen)
+            if delete_ids or not updates.empty or not inserts.empty:
+                bump_table_version(cursor, 'einsaetze', 'mitarbeiter_monat', *(['monatskatalog'] if not inserts.empty else []))
+            conn.commit()
+    except Exception as e: conn.rollback(); raise e
+    finally: cursor.close()
+    if konflikt:
+        raise PlanKonflikt(_konflikt_zellen(conn, df_old, inserts, updates, delete_ids, object_names, start_date, end_date))
+    return {'neu': len(inserts), 'geaendert': len(updates), 'geloescht': len(delete_ids)}
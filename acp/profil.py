@@ -0,0 +1,137 @@
+"""
+Leichtgewichtiges Profiling: Laufzeit und Zeilenzahl jeder SQL-Anweisung sowie Dauer
+der Seitenphasen (laden, raster, pruefen, speichern, anzeigen) pro Lauf.
+
+Ohne aktives Profil kostet phase() nur einen ContextVar-Zugriff, und Verbindungen
+werden gar nicht erst umhüllt – das Profiling kann daher im Betrieb eingeschaltet bleiben.
+"""
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+log = logging.getLogger('acp.profil')
+
+_aktiv = ContextVar('acp_profil', default=None)
+
+def _sql_name(sql):
+    return re.sub(r'\s+', ' ', str(sql)).strip()[:120]
+
+class Profil:
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.ende = None
+        self.phasen = []
+        self.sql = []
+
+    def gesamt_ms(self):
+        return ((self.ende or time.perf_counter()) - self.start) * 1000
+
+    def sql_summen(self):
+        """SQL-Anweisungen gruppiert: Anzahl, Summe ms, Summe Zeilen – langsamste zuerst."""
+        summen = {}
+        for s in self.sql:
+            z = summen.setdefault(s['sql'], {'sql': s['sql'], 'anzahl': 0, 'ms': 0.0, 'zeilen': 0})
+            z['anzahl'] += 1; z['ms'] += s['ms']; z['zeilen'] += s['zeilen']
+        return sorted(summen.values(), key=lambda z: z['ms'], reverse=True)
+
+    def zusammenfassung(self):
+        return {
+            'lauf': self.name,
+            'gesamt_ms': round(self.gesamt_ms(), 1),
+            'phasen': [{'phase': p['phase'], 'ms': round(p['ms'], 1)} for p in self.phasen],
+            'sql_anzahl': len(self.sql),
+            'sql_ms': round(sum(s['ms'] for s in self.sql), 1),
+            'sql_zeilen': sum(s['zeilen'] for s in self.sql),
+            'sql_langsamste': [{**z, 'ms': round(z['ms'], 1)} for z in self.sql_summen()[:5]],
+        }
+
+def starten(name):
+    """Profil für den aktuellen Lauf (Thread/Kontext) anlegen und aktivieren."""
+    profil = Profil(name)
+    _aktiv.set(profil)
+    return profil
+
+def beenden(profil):
+    """Profil abschließen und als eine JSON-Zeile loggen."""
+    profil.ende = time.perf_counter()
+    if _aktiv.get() is profil: _aktiv.set(None)
+    log.info(json.dumps(profil.zusammenfassung(), ensure_ascii=False, default=str))
+    if log.isEnabledFor(logging.DEBUG):
+        for s in profil.sql: log.debug(json.dumps({'lauf': profil.name, **s, 'ms': round(s['ms'], 2)}, ensure_ascii=False))
+    return profil
+
+def aktiv():
+    return _aktiv.get()
+
+@contextmanager
+def phase(name):
+    profil = _aktiv.get()
+    if profil is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try: yield
+    finally: profil.phasen.append({'phase': name, 'ms': (time.perf_counter() - t0) * 1000})
+
+class _Cursor:
+    """Cursor-Proxy: execute/executemany und das anschließende fetch* zählen als eine Anweisung."""
+    def __init__(self, cursor, profil):
+        self._cursor = cursor
+        self._profil = profil
+        self._eintrag = None
+
+    def _messen(self, fn, sql, *args):
+        self._eintrag = {'sql': _sql_name(sql), 'ms': 0.0, 'zeilen': 0}
+        self._profil.sql.append(self._eintrag)
+        t0 = time.perf_counter()
+        try: return fn(sql, *args)
+        finally:
+            self._eintrag['ms'] += (time.perf_counter() - t0) * 1000
+            # Schreibende Anweisungen: betroffene Zeilen; SELECT zählt über fetch*
+            if not self._eintrag['sql'][:6].upper() == 'SELECT':
+                self._eintrag['zeilen'] = max(getattr(self._cursor, 'rowcount', 0) or 0, 0)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._messen(lambda s, *a: self._cursor.execute(s, *a, **kwargs), sql, *args)
+
+    def executemany(self, sql, seq, *args, **kwargs):
+        return self._messen(lambda s, q, *a: self._cursor.executemany(s, q, *a, **kwargs), sql, seq, *args)
+
+    def _fetch(self, fn, *args):
+        t0 = time.perf_counter()
+        res = fn(*args)
+        if self._eintrag is not None:
+            self._eintrag['ms'] += (time.perf_counter() - t0) * 1000
+            if isinstance(res, list): self._eintrag['zeilen'] += len(res)
+            elif res is not None: self._eintrag['zeilen'] += 1
+        return res
+
+    def fetchall(self): return self._fetch(self._cursor.fetchall)
+    def fetchmany(self, *args): return self._fetch(self._cursor.fetchmany, *args)
+    def fetchone(self): return self._fetch(self._cursor.fetchone)
+
+    def __iter__(self): return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class _Verbindung:
+    """Verbindungs-Proxy: liefert gemessene Cursor, alles andere geht an die echte Verbindung."""
+    def __init__(self, conn, profil):
+        self._conn = conn
+        self._profil = profil
+
+    def cursor(self, *args, **kwargs):
+        return _Cursor(self._conn.cursor(*args, **kwargs), self._profil)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def verbindung(conn, profil=None):
+    """Verbindung für das (aktive) Profil umhüllen; ohne Profil unverändert zurück."""
+    profil = profil or _aktiv.get()
+    return _Verbindung(conn, profil) if profil is not None else conn
@@ -0,0 +1,198 @@
+"""Stammdaten: Standorte mit Slots, Mitarbeiter, Abwesenheiten."""
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from .db import OBJECT_COLUMN_NAME, MA_SLOT_COLUMN_NAME, bump_table_version, bump_mitarbeiter_version
+from .planung import refresh_mitarbeiter_monat, register_monate
+from .zeit import natural_sort_key, months_between
+
+ABWESENHEIT_STATUS = ["Urlaub", "Krank", "Ausfall", "Standby"]
+
+def fetch_standorte(conn):
+    """
+    Ein Eintrag pro Standort, Slots als Liste – bereits natürlich sortiert (MA2 vor MA10),
+    damit die Seiten weder gruppieren noch sortieren müssen.
+    """
+    df = pd.read_sql("SELECT ID, Name, Region, Ansprechpartner, Telefon FROM standorte ORDER BY Name", conn)
+    df_slots = pd.read_sql("SELECT StandortID, MA_Slot FROM standort_slots", conn)
+    slots = df_slots.groupby('StandortID')['MA_Slot'].agg(lambda s: sorted(s, key=natural_sort_key))
+    df[MA_SLOT_COLUMN_NAME] = [slots.get(i, []) for i in df['ID']]
+    return df.rename(columns={'Name': OBJECT_COLUMN_NAME})
+
+# Sortierungen der Abwesenheitsübersicht -> ORDER BY (nur feste Ausdrücke, nie Benutzereingaben)
+ABWESENHEIT_SORTIERUNG = {
+    "Neueste zuerst": "Von DESC, Mitarbeiter ASC, ID DESC",
+    "Älteste zuerst": "Von ASC, Mitarbeiter ASC, ID ASC",
+    "Mitarbeiter A-Z": "Mitarbeiter ASC, Von DESC, ID DESC",
+}
+
+def fetch_abwesenheiten_seite(conn, mitarbeiter, status, von, bis, sortierung, seite, seitengroesse):
+    """Eine Seite der Abwesenheitsübersicht: Filter, Sortierung und LIMIT/OFFSET laufen in der DB. Liefert (df, Gesamtzahl)."""
+    where, params = [], []
+    if mitarbeiter: where.append("Mitarbeiter = %s"); params.append(mitarbeiter)
+    if status: where.append("Status = %s"); params.append(status)
+    if bis: where.append("Von <= %s"); params.append(bis)
+    if von: where.append("Bis >= %s"); params.append(von)
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM urlaub_krank{where_sql}", params)
+        total = int(cursor.fetchone()[0])
+    finally: cursor.close()
+    query = (f"SELECT ID, Mitarbeiter, Von, Bis, Status FROM urlaub_krank{where_sql} "
+             f"ORDER BY {ABWESENHEIT_SORTIERUNG[sortierung]} LIMIT %s OFFSET %s")
+    df = pd.read_sql(query, conn, params=(*params, seitengroesse, (seite - 1) * seitengroesse))
+    return df, total
+
+def _neue_slot_namen(vorhandene, anzahl):
+    """Die nächsten freien Namen MA1, MA2, ... die noch nicht vergeben sind."""
+    vorhandene = set(vorhandene); namen = []; i = 1
+    while len(namen) < anzahl:
+        if f"MA{i}" not in vorhandene: namen.append(f"MA{i}")
+        i += 1
+    return namen
+
+def create_standort(conn, name, ansprechpartner, telefon, slot_anzahl, region=None):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("INSERT INTO standorte (Name, Region, Ansprechpartner, Telefon) VALUES (%s,%s,%s,%s)", (name, region or None, ansprechpartner, telefon))
+        standort_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO standort_slots (StandortID, MA_Slot) VALUES (%s,%s)", [(standort_id, s) for s in _neue_slot_namen([], slot_anzahl)])
+        bump_table_version(cursor, 'standorte')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+
+def delete_standort(conn, standort_id):
+    cursor = conn.cursor()
+    try: 
+        cursor.execute("DELETE FROM standort_slots WHERE StandortID = %s", (standort_id,))
+        cursor.execute("DELETE FROM standorte WHERE ID = %s", (standort_id,))
+        bump_table_version(cursor, 'standorte')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+
+def delete_all_standorte(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM standort_slots")
+        cursor.execute("DELETE FROM standorte")
+        bump_table_version(cursor, 'standorte')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+
+def update_standort(conn, standort_id, alter_name, neuer_name, neue_slot_anzahl, aktuelle_slots, neuer_ansprechpartner, neues_telefon, neue_region=None):
+    """
+    Stammdaten ändern und Slots anpassen: fehlende werden per executemany angelegt, überzählige
+    (von hinten) per executemany entfernt – aber nur, wenn auf ihnen keine Einsätze liegen.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE standorte SET Name = %s, Region = %s, Ansprechpartner = %s, Telefon = %s WHERE ID = %s",
+                       (neuer_name, neue_region or None, neuer_ansprechpartner, neues_telefon, standort_id))
+        
+        if alter_name != neuer_name: 
+            cursor.execute("SELECT DISTINCT Mitarbeiter FROM einsaetze WHERE Objekt = %s AND Mitarbeiter IS NOT NULL", (alter_name,))
+            bump_mitarbeiter_version(cursor, [m for (m,) in cursor.fetchall()])
+            cursor.execute("UPDATE einsaetze SET Objekt = %s, Version = Version + 1 WHERE Objekt = %s", (neuer_name, alter_name))
+            bump_table_version(cursor, 'einsaetze')
+            
+        aktuelle_slots = list(aktuelle_slots)
+        if neue_slot_anzahl > len(aktuelle_slots):
+            neu = _neue_slot_namen(aktuelle_slots, neue_slot_anzahl - len(aktuelle_slots))
+            cursor.executemany("INSERT INTO standort_slots (StandortID, MA_Slot) VALUES (%s,%s)", [(standort_id, s) for s in neu])
+        elif neue_slot_anzahl < len(aktuelle_slots):
+            weg = aktuelle_slots[neue_slot_anzahl:]
+            ph = ', '.join(['%s'] * len(weg))
+            cursor.execute(f"SELECT DISTINCT MA_Slot FROM einsaetze WHERE Objekt = %s AND MA_Slot IN ({ph})", (neuer_name, *weg))
+            belegt = sorted((row[0] for row in cursor.fetchall()), key=natural_sort_key)
+            if belegt:
+                raise ValueError(f"Slots mit Einsätzen können nicht entfernt werden: {', '.join(belegt)}")
+            cursor.executemany("DELETE FROM standort_slots WHERE StandortID = %s AND MA_Slot = %s", [(standort_id, s) for s in weg])
+        
+        bump_table_version(cursor, 'standorte')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+
+def save_abwesenheit(conn, mitarbeiter, von, bis, status):
+    """
+    Abwesenheit als ein Zeitraum speichern. Überlappende Einträge des Mitarbeiters werden
+    gekürzt bzw. geteilt (der neue Eintrag gewinnt, wie früher REPLACE pro Tag), angrenzende
+    mit gleichem Status verschmolzen. Alle Einfügungen gehen als ein Statement raus.
+    """
+    von = pd.Timestamp(von).date(); bis = pd.Timestamp(bis).date()
+    tag = relativedelta(days=1)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT ID, Von, Bis, Status FROM urlaub_krank WHERE Mitarbeiter = %s AND Von <= %s AND Bis >= %s",
+                       (mitarbeiter, bis + tag, von - tag))
+        delete_ids = []; inserts = []
+        neu_von, neu_bis = von, bis
+        for id_, v, b, s in cursor.fetchall():
+            v = pd.Timestamp(v).date(); b = pd.Timestamp(b).date()
+            if s == status:
+                delete_ids.append(id_)
+                neu_von = min(neu_von, v); neu_bis = max(neu_bis, b)
+            elif v <= bis and b >= von:
+                delete_ids.append(id_)
+                if v < von: inserts.append((mitarbeiter, v, von - tag, s))
+                if b > bis: inserts.append((mitarbeiter, bis + tag, b, s))
+        inserts.append((mitarbeiter, neu_von, neu_bis, status))
+        if delete_ids:
+            cursor.execute(f"DELETE FROM urlaub_krank WHERE ID IN ({', '.join(['%s'] * len(delete_ids))})", delete_ids)
+        cursor.executemany("INSERT INTO urlaub_krank (Mitarbeiter, Von, Bis, Status) VALUES (%s, %s, %s, %s)", inserts)
+        monate = months_between(min(i[1] for i in inserts), max(i[2] for i in inserts))
+        refresh_mitarbeiter_monat(cursor, monate, [mitarbeiter])
+        register_monate(cursor, monate)
+        bump_table_version(cursor, 'urlaub_krank', 'mitarbeiter_monat', 'monatskatalog')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+
+def delete_abwesenheiten(conn, ids):
+    """Mehrere Abwesenheiten mit einem DELETE ... IN löschen."""
+    ids = [int(i) for i in ids]
+    if not ids: return
+    ph = ', '.join(['%s'] * len(ids))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT Mitarbeiter, Von, Bis FROM urlaub_krank WHERE ID IN ({ph})", ids)
+        betroffen = cursor.fetchall()
+        cursor.execute(f"DELETE FROM urlaub_krank WHERE ID IN ({ph})", ids)
+        monate = {m for _, v, b in betroffen for m in months_between(v, b)}
+        refresh_mitarbeiter_monat(cursor, monate, [ma for ma, _, _ in betroffen])
+        bump_table_version(cursor, 'urlaub_krank', 'mitarbeiter_monat')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+
+def delete_mitarbeiter(conn, ma_name):
+    cursor = conn.cursor()
+    try: 
+        cursor.execute("DELETE FROM mitarbeiter_verzeichnis WHERE Mitarbeitername = %s", (ma_name,))
+        bump_table_version(cursor, 'mitarbeiter_verzeichnis')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
+
+def update_mitarbeiter(conn, altes_profil, new_vals):
+    cursor = conn.cursor()
+    try:
+        sql = """UPDATE mitarbeiter_verzeichnis SET Mitarbeitername=%s, Geburtsdatum=%s, Personalnummer=%s, Bewacher_ID=%s, Anstellung=%s, Position=%s, Vertrag_bis=%s, Adresse=%s, PLZ=%s, Telefonnummer=%s, Ausweis_gueltig_bis=%s WHERE Mitarbeitername=%s"""
+        v = (new_vals['Mitarbeitername'], new_vals['Geburtsdatum'], new_vals['Personalnummer'], new_vals['Bewacher_ID'], new_vals['Anstellung'], new_vals['Position'], new_vals['Vertrag_bis'], new_vals['Adresse'], new_vals['PLZ'], new_vals['Telefonnummer'], new_vals['Ausweis_gueltig_bis'], altes_profil['Mitarbeitername'])
+        cursor.execute(sql, v)
+        
+        if altes_profil['Mitarbeitername'] != new_vals['Mitarbeitername']:
+            cursor.execute("UPDATE urlaub_krank SET Mitarbeiter = %s WHERE Mitarbeiter = %s", (new_vals['Mitarbeitername'], altes_profil['Mitarbeitername']))
+            cursor.execute("UPDATE einsaetze SET Mitarbeiter = %s, Version = Version + 1 WHERE Mitarbeiter = %s", (new_vals['Mitarbeitername'], altes_profil['Mitarbeitername']))
+            cursor.execute("UPDATE mitarbeiter_monat SET Mitarbeiter = %s WHERE Mitarbeiter = %s", (new_vals['Mitarbeitername'], altes_profil['Mitarbeitername']))
+            bump_mitarbeiter_version(cursor, [altes_profil['Mitarbeitername'], new_vals['Mitarbeitername']])
+            bump_table_version(cursor, 'urlaub_krank', 'einsaetze', 'mitarbeiter_monat')
+            
+        bump_table_version(cursor, 'mitarbeiter_verzeichnis')
+        conn.commit()
+    except Exception: conn.rollback(); raise
+    finally: cursor.close()
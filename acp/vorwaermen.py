@@ -0,0 +1,78 @@
+"""
+Vorwärmen von Caches im Hintergrund.
+
+Ein Daemon-Thread je Prozess arbeitet in Runden eine Aufgabenliste ab – beim Start, periodisch
+(intervall) und kurz nach Speichervorgängen (anstossen(); mehrere Anstöße innerhalb der
+Verzögerung ergeben eine Runde). Welche Aufgaben es gibt, bestimmt der Aufrufer: die App kennt
+ihre gecachten Ladefunktionen.
+
+Gedrosselt, damit interaktive Abfragen immer Vorrang haben: eine Aufgabe nach der anderen, jede
+auf einer eigenen, sofort zurückgegebenen Pool-Verbindung, die nur genommen wird, wenn danach
+noch `reserve` Plätze frei bleiben; dazwischen `pause` Sekunden. Bleibt der Pool länger als
+`geduld` Sekunden ausgelastet, wird die Runde abgebrochen.
+"""
+import logging
+import threading
+import time
+
+_log = logging.getLogger('acp.vorwaermen')
+
+class Vorwaermer(threading.Thread):
+    def __init__(self, pool, aufgaben, intervall=900.0, pause=0.2, reserve=2, verzoegerung=3.0, geduld=60.0):
+        """aufgaben(conn) -> [(name, f), ...]; jedes f(conn) lädt ein Artefakt in den Cache."""
+        super().__init__(name='acp-vorwaermen', daemon=True)
+        self.pool = pool
+        self.aufgaben = aufgaben
+        self.intervall = intervall
+        self.pause = pause
+        self.reserve = min(reserve, pool.size - 1)
+        self.verzoegerung = verzoegerung
+        self.geduld = geduld
+        self._signal = threading.Event()
+        self._ende = threading.Event()
+        self.stats = {'runden': 0, 'aufgaben': 0, 'fehler': 0, 'abgebrochen': 0, 'letzte_runde': None, 'dauer_ms': 0.0}
+
+    def anstossen(self):
+        self._signal.set()
+
+    def stoppen(self):
+        self._ende.set(); self._signal.set()
+
+    def run(self):
+        while True:
+            if self._ende.wait(self.verzoegerung): return
+            self._signal.clear()
+            try: self._runde()
+            except Exception: _log.exception("Vorwärmen fehlgeschlagen")
+            self._signal.wait(self.intervall)
+
+    def _verbindung(self):
+        bis = time.monotonic() + self.geduld
+        while not self._ende.is_set():
+            conn = self.pool.try_acquire(self.reserve)
+            if conn is not None or time.monotonic() >= bis: return conn
+            self._ende.wait(max(self.pause, 0.05))
+        return None
+
+    def _runde(self):
+        start = time.monotonic()
+        conn = self._verbindung()
+        if conn is None: self.stats['abgebrochen'] += 1; return
+        try: aufgaben = list(self.aufgaben(conn))
+        finally: self.pool.release(conn)
+        erledigt = 0
+        for name, f in aufgaben:
+            if self._ende.wait(self.pause): return
+            conn = self._verbindung()
+            if conn is None:
+                self.stats['abgebrochen'] += 1
+                _log.info("Pool ausgelastet – Vorwärmen nach %d von %d Aufgaben abgebrochen", erledigt, len(aufgaben))
+                break
+            try: f(conn); erledigt += 1
+            except Exception as e: self.stats['fehler'] += 1; _log.warning("Vorwärmen '%s' fehlgeschlagen: %s", name, e)
+            finally: self.pool.release(conn)
+        self.stats['runden'] += 1
+        self.stats['aufgaben'] += erledigt
+        self.stats['letzte_runde'] = time.time()
+        self.stats['dauer_ms'] = (time.monotonic() - start) * 1000
+        _log.debug("Vorwärmen: %d Aufgaben in %.0f ms", erledigt, self.stats['dauer_ms'])
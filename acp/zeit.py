@@ -0,0 +1,148 @@
+"""Zeit- und Formathelfer der Einsatzplanung – ohne UI- und DB-Abhängigkeiten."""
+import re
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+DATE_FORMAT = '%Y-%m-%d'
+GERMAN_WEEKDAYS = ['Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So']
+GERMAN_MONTHS = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August", "September", "Oktober", "November", "Dezember"]
+
+def natural_sort_key(s):
+    """
+    Zerlegt String in Text und Zahlen für natürliche Sortierung.
+    Macht aus 'MA10' -> ['ma', 10, ''] und aus 'MA2' -> ['ma', 2, '']
+    Damit wird 2 vor 10 sortiert.
+    """
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', str(s))]
+
+def month_bounds(yyyy_mm):
+    y, m = yyyy_mm.split('-')
+    start = date(int(y), int(m), 1)
+    return start, start + relativedelta(months=1, days=-1)
+
+def format_month_display(yyyy_mm):
+    y, m = yyyy_mm.split('-')
+    return f"{GERMAN_MONTHS[int(m)-1]} {y}"
+
+def format_duration_str(hours_float):
+    if not hours_float or hours_float == 0: return "0 Std 0 Min"
+    h = int(hours_float)
+    m = int(round((hours_float - h) * 60))
+    if m == 60: h += 1; m = 0
+    return f"{h} Std {m} Min"
+
+def float_to_input_str(val):
+    if pd.isna(val) or val == 0: return ""
+    minutes = round(val * 24 * 60)
+    hours = int(minutes // 60)
+    mins = int(minutes % 60)
+    if hours >= 24: hours = 23; mins = 59
+    return f"{hours:02d}:{mins:02d}"
+
+# --- Spalten-Codec: ganze Spalten in NumPy, intern in ganzen Minuten ---
+# Gespeichert wird weiterhin der Tagesbruchteil (DOUBLE); gerechnet und gerundet wird in Minuten,
+# damit 23:59-Kappung und 60-Minuten-Überträge exakt sind. Texte entstehen über Nachschlagetabellen
+# bzw. einmal je unterschiedlichem Wert – Spalten im Plan haben nur wenige verschiedene Zeiten.
+MINUTEN_PRO_TAG = 24 * 60
+_HHMM = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(MINUTEN_PRO_TAG)], dtype=object)
+
+def _float_array(values):
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+
+def to_minutes(values):
+    """Tagesbruchteile -> ganze Minuten (int64); leer/NaN -> 0."""
+    return np.rint(np.nan_to_num(_float_array(values)) * MINUTEN_PRO_TAG).astype(np.int64)
+
+def _parse_minutes(val):
+    """parse_user_time in ganzen Minuten für einen (eindeutigen) Wert."""
+    s = str(val).strip().replace(',', '.')
+    try:
+        if ':' in s:
+            parts = s.split(':')
+            return int(parts[0]) * 60 + (int(parts[1]) if len(parts) > 1 else 0)
+        v = float(s)
+        if v >= 100: return int(v // 100) * 60 + int(v % 100)
+        return int(round(v * 60))
+    except (ValueError, OverflowError): return 0
+
+def parse_time_minutes(values):
+    """
+    parse_user_time für eine ganze Spalte, Ergebnis in Minuten seit Mitternacht (int64).
+    "18" / "18,5" -> Stunden, "1830" -> HHMM (ab 100), "18:30" -> HH:MM; leer/Unlesbares -> 0.
+    """
+    codes, uniq = pd.factorize(pd.Series(values, dtype=object))
+    minuten = np.array([_parse_minutes(v) for v in uniq] + [0], dtype=np.int64)
+    return minuten[codes]
+
+def parse_time_series(values):
+    """parse_user_time für eine ganze Spalte: Tagesbruchteile (float), auf Minuten gerundet."""
+    return parse_time_minutes(values) / MINUTEN_PRO_TAG
+
+def format_minutes(minuten, empty=None):
+    """Minuten -> 'HH:MM' (ab 24:00 auf 23:59 gekappt); empty markiert Zellen, die '' werden."""
+    m = np.minimum(np.asarray(minuten, dtype=np.int64), MINUTEN_PRO_TAG - 1)
+    neg = m < 0
+    out = _HHMM[np.where(neg, 0, m)]
+    if neg.any(): out[neg] = [f"{x // 60:02d}:{x % 60:02d}" for x in m[neg]]
+    return out if empty is None else np.where(empty, "", out)
+
+def format_time_series(values):
+    """Wie float_to_input_str, aber für eine ganze Spalte auf einmal (NumPy)."""
+    v = _float_array(values)
+    return format_minutes(to_minutes(v), np.isnan(v) | (v == 0))
+
+def format_duration_series(values):
+    """Wie format_duration_str, aber für eine ganze Spalte auf einmal (NumPy); Übertrag 60 Min -> 1 Std über ganze Minuten."""
+    t = np.rint(np.nan_to_num(_float_array(values)) * 60).astype(np.int64)
+    uniq, inv = np.unique(t, return_inverse=True)
+    h = np.sign(uniq) * (np.abs(uniq) // 60)
+    texte = np.array([f"{a} Std {b} Min" for a, b in zip(h, uniq - h * 60)], dtype=object)
+    return texte[inv.reshape(-1)]
+
+def calculate_arbeitszeit_series(anfang, ende, pause):
+    """calculate_arbeitszeit für ganze Spalten: Anfang/Ende als Tagesbruchteil, Pause in Stunden; Ergebnis in Stunden."""
+    a = to_minutes(anfang); e = to_minutes(ende)
+    p = np.rint(np.nan_to_num(_float_array(pause)) * 60).astype(np.int64)
+    dauer = e - a + MINUTEN_PRO_TAG * (e < a) - p
+    return np.where((a == 0) & (e == 0), 0.0, np.maximum(0, dauer) / 60.0)
+
+def safe_get_value(val):
+    if isinstance(val, (pd.Series, np.ndarray, list)):
+        if len(val) > 0:
+            if hasattr(val, 'iloc'): return val.iloc[0]
+            if hasattr(val, 'item'): return val.item()
+            return val[0]
+        return None
+    return val
+
+def parse_user_time(val_str):
+    val_str = safe_get_value(val_str)
+    if not val_str: return 0.0
+    s = str(val_str).strip().replace(',', '.')
+    try:
+        if ':' in s:
+            parts = s.split(':')
+            h = int(parts[0]); m = int(parts[1]) if len(parts) > 1 else 0
+            return (h + m/60.0) / 24.0
+        v = float(s)
+        if v >= 100: 
+            h = int(v // 100); m = int(v % 100)
+            return (h + m/60.0) / 24.0
+        return v / 24.0
+    except: return 0.0
+
+def calculate_arbeitszeit(anfang_zeit_float, ende_zeit_float, pause_zeit_std):
+    if anfang_zeit_float == 0.0 and ende_zeit_float == 0.0: return 0.0
+    if ende_zeit_float < anfang_zeit_float:
+        zeit_differenz = (ende_zeit_float + 1.0) - anfang_zeit_float
+    else:
+        zeit_differenz = ende_zeit_float - anfang_zeit_float
+    pause_als_tag_bruch = pause_zeit_std / 24.0
+    arbeitszeit_stunden = 24.0 * (zeit_differenz - pause_als_tag_bruch)
+    return max(0.0, arbeitszeit_stunden)
+
+def months_between(von, bis):
+    return pd.period_range(pd.Timestamp(von), pd.Timestamp(bis), freq='M').strftime('%Y-%m').tolist()
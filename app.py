@@ -1,20 +1,36 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import mysql.connector
 import os
-import re  # WICHTIG: Für die natürliche Sortierung der Zahlen
-from datetime import datetime, date, time as dt_time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, date
 import time
 from dateutil.relativedelta import relativedelta
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Planungs- und DB-Logik liegt im Paket acp (ohne UI, importierbar für Batch-Jobs und Benchmarks);
+# diese Datei ist nur die Streamlit-Oberfläche darüber.
+from acp.zeit import (DATE_FORMAT, month_bounds, format_month_display, format_duration_str,
+                      parse_time_series, calculate_arbeitszeit_series)
+from acp.db import (OBJECT_COLUMN_NAME, MA_SLOT_COLUMN_NAME, ART_ARBEITSSTUNDEN, pool_from_config, bump_table_version, fetch_table_versions,
+                    fetch_mitarbeiter_versionen, Leihverbindung)
+from acp.migrationen import run_migrations
+from acp import planung, stammdaten, auswertung, autoplanung, export, profil, kalender
+from acp.vorwaermen import Vorwaermer
+from acp.planung import (PLAN_GRID_FIELDS, PlanKonflikt, expand_abwesenheiten, build_absence_index, find_absence_conflicts,
+                         find_double_bookings, build_plan_grid, save_einsaetze_to_db)
+from acp.stammdaten import (ABWESENHEIT_STATUS, ABWESENHEIT_SORTIERUNG, create_standort, delete_standort, delete_all_standorte,
+                            update_standort, save_abwesenheit, delete_abwesenheiten, delete_mitarbeiter, update_mitarbeiter)
+from acp.auswertung import build_uebersicht
 
 # --- 1. PAGE CONFIG ---
 st.set_page_config(page_title="Digitale Einsatzplanung", layout="wide")
 
 # --- 2. KONSTANTEN ---
-DATE_FORMAT = '%Y-%m-%d'
-GERMAN_WEEKDAYS = ['Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So']
-GERMAN_MONTHS = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August", "September", "Oktober", "November", "Dezember"]
 LOGO_PATH = 'acp_logo.png'
 
 # --- BENUTZER & PASSWÖRTER (Admins) ---
@@ -24,30 +40,75 @@ ADMIN_CREDENTIALS = {
     'saki': 'saki123'
 }
 
-# --- 3. KONFIGURATION ---
-OBJECT_COLUMN_NAME = 'Objektname'
-MA_SLOT_COLUMN_NAME = 'MA_Slot'
-DB_DATE_COL = 'Datum'
-
-# --- 4. DATENBANK VERBINDUNG (MySQL/TiDB) ---
+# Obergrenze der je Monat vorgewärmten Objekte (siehe VORWÄRMEN)
+VORWAERMEN_MAX_OBJEKTE = 100
+
+# --- PROFILING ---
+# Per Umgebung (ACP_PROFILING=1) für alle Sitzungen oder per Schalter im Admin-Panel für die eigene Sitzung.
+# Zusammenfassung je Rerun geht als JSON-Zeile an den Logger 'acp.profil' (DEBUG: jede SQL-Anweisung einzeln).
+_profil_log = logging.getLogger('acp.profil')
+if not _profil_log.handlers:
+    _profil_log.addHandler(logging.StreamHandler())
+    _profil_log.setLevel(logging.DEBUG if os.environ.get('ACP_PROFILING') == 'debug' else logging.INFO)
+
+def profiling_aktiv():
+    return os.environ.get('ACP_PROFILING') in ('1', 'debug') or st.session_state.get('profiling', False)
+
+def profil_panel():
+    with st.sidebar.expander("Profiling"):
+        st.toggle("Für diese Sitzung messen", key='profiling')
+        lauf = st.session_state.get('profil_letzter')
+        if lauf is None: st.caption("Noch kein gemessener Lauf."); return
+        z = lauf.zusammenfassung()
+        st.caption(f"Letzter Lauf ({lauf.name}): {z['gesamt_ms']:.0f} ms gesamt · {z['sql_anzahl']} SQL in {z['sql_ms']:.0f} ms · {z['sql_zeilen']} Zeilen")
+        if lauf.phasen:
+            df_ph = pd.DataFrame(lauf.phasen).groupby('phase', sort=False)['ms'].agg(['count', 'sum']).reset_index()
+            df_ph.columns = ['Phase', 'Anzahl', 'ms']
+            st.dataframe(df_ph.round(1), hide_index=True, use_container_width=True)
+        if lauf.sql:
+            df_sql = pd.DataFrame(lauf.sql_summen()[:10]).rename(columns={'sql': 'SQL', 'anzahl': 'Anzahl', 'zeilen': 'Zeilen'})
+            st.dataframe(df_sql.round(1), hide_index=True, use_container_width=True)
+        vorher = st.session_state.get('profil_vorher')
+        if vorher is not None:
+            st.caption(f"Davor ({vorher.name}): {vorher.gesamt_ms():.0f} ms · {len(vorher.sql)} SQL")
+
+# --- 3. DATENBANK VERBINDUNG (MySQL/TiDB) ---
+@st.cache_resource
+def get_db_pool():
+    return pool_from_config(st.secrets["mysql"])
+
+@contextmanager
 def get_db_connection():
     try:
-        conn = mysql.connector.connect(**st.secrets["mysql"])
-        return conn
+        pool = get_db_pool()
+        conn = pool.acquire()
     except Exception as e:
         st.error(f"Datenbank-Verbindungsfehler: {e}")
         st.stop()
+    # Bei aktivem Profil misst ein Proxy jede Anweisung, sonst die rohe Verbindung
+    try: yield profil.verbindung(conn)
+    finally: pool.release(conn)
 
+def gleichzeitig(conn, *aufgaben):
+    """
+    Unabhängige Ladefunktionen f(conn) gleichzeitig ausführen und gemeinsam abwarten (Ergebnisse in
+    Reihenfolge): die Wartezeit ist die der langsamsten Abfrage statt der Summe. Jede Aufgabe bekommt
+    eine Leihverbindung aus dem Pool; Streamlit-Kontext (Session-State) und Profil gehen mit in die Threads.
+    """
+    if len(aufgaben) < 2: return [f(conn) for f in aufgaben]
+    pool = get_db_pool(); sperre = threading.Lock()
+    def ausfuehren(f):
+        leih = Leihverbindung(pool, conn, sperre, wrap=profil.verbindung)
+        try: return f(leih)
+        finally: leih.freigeben()
+    with ThreadPoolExecutor(len(aufgaben), thread_name_prefix='acp-laden', initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())) as ex:
+        futures = [ex.submit(contextvars.copy_context().run, ausfuehren, f) for f in aufgaben]
+        return [f.result() for f in futures]
+
+# --- SCHEMA-MIGRATIONEN ---
 def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""CREATE TABLE IF NOT EXISTS mitarbeiter_verzeichnis (ID INT AUTO_INCREMENT PRIMARY KEY, Mitarbeitername VARCHAR(255) UNIQUE, Geburtsdatum VARCHAR(20), Personalnummer VARCHAR(50), Bewacher_ID VARCHAR(50), Anstellung VARCHAR(50), Position VARCHAR(50), Vertrag_bis VARCHAR(20), Adresse VARCHAR(255), PLZ VARCHAR(20), Telefonnummer VARCHAR(50), Ausweis_gueltig_bis VARCHAR(20))""")
-    cursor.execute(f"""CREATE TABLE IF NOT EXISTS locations_spalte (ID INT AUTO_INCREMENT PRIMARY KEY, `{OBJECT_COLUMN_NAME}` VARCHAR(255), `{MA_SLOT_COLUMN_NAME}` VARCHAR(255), Ansprechpartner VARCHAR(255), Telefon VARCHAR(100))""")
-    cursor.execute("""CREATE TABLE IF NOT EXISTS urlaub_krank (ID INT AUTO_INCREMENT PRIMARY KEY, Datum VARCHAR(20), Mitarbeiter VARCHAR(255), Status VARCHAR(50), UNIQUE KEY ma_date (Datum, Mitarbeiter))""")
-    cursor.execute("""CREATE TABLE IF NOT EXISTS einsaetze (EinsatzID INT AUTO_INCREMENT PRIMARY KEY, Datum VARCHAR(20), Objekt VARCHAR(255), MA_Slot VARCHAR(255), Anfang DOUBLE, Ende DOUBLE, Pause DOUBLE, Mitarbeiter VARCHAR(255), Zeit DOUBLE)""")
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with get_db_connection() as conn:
+        run_migrations(conn)
 
 if 'db_initialized' not in st.session_state:
     try:
@@ -56,204 +117,124 @@ if 'db_initialized' not in st.session_state:
     except Exception as e:
         st.error(f"Fehler bei der DB-Initialisierung: {e}")
 
-# --- 5. HELPER & LOGIK ---
-
-def natural_sort_key(s):
-    """
-    Zerlegt String in Text und Zahlen für natürliche Sortierung.
-    Macht aus 'MA10' -> ['ma', 10, ''] und aus 'MA2' -> ['ma', 2, '']
-    Damit wird 2 vor 10 sortiert.
-    """
-    return [int(text) if text.isdigit() else text.lower() for text in re.split('(\d+)', str(s))]
+# --- 4. HELPER ---
 
 def to_bold(text):
     chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
     bold_chars = "𝐀𝐁𝐂𝐃𝐄𝐅𝐆𝐇𝐈𝐉𝐊𝐋𝐌𝐍𝐎𝐏𝐐𝐑𝐒𝐓𝐔𝐕𝐖𝐗𝐘𝐙𝐚𝐛𝐜𝐝𝐞𝐟𝐠𝐡𝐢𝐣𝐤𝐥𝐦𝐧𝐨𝐩𝐪𝐫𝐬𝐭𝐮𝐯𝐰𝐱𝐲𝐳𝟎𝟏𝟐𝟑𝟒𝟓𝟔𝟕𝟖𝟗"
     return text.translate(str.maketrans(chars, bold_chars))
 
-def format_duration_str(hours_float):
-    if not hours_float or hours_float == 0: return "0 Std 0 Min"
-    h = int(hours_float)
-    m = int(round((hours_float - h) * 60))
-    if m == 60: h += 1; m = 0
-    return f"{h} Std {m} Min"
-
-def float_to_input_str(val):
-    if pd.isna(val) or val == 0: return ""
-    minutes = round(val * 24 * 60)
-    hours = int(minutes // 60)
-    mins = int(minutes % 60)
-    if hours >= 24: hours = 23; mins = 59
-    return f"{hours:02d}:{mins:02d}"
-
-def safe_get_value(val):
-    if isinstance(val, (pd.Series, np.ndarray, list)):
-        if len(val) > 0:
-            if hasattr(val, 'iloc'): return val.iloc[0]
-            if hasattr(val, 'item'): return val.item()
-            return val[0]
-        return None
-    return val
-
-def parse_user_time(val_str):
-    val_str = safe_get_value(val_str)
-    if not val_str: return 0.0
-    s = str(val_str).strip().replace(',', '.')
-    try:
-        if ':' in s:
-            parts = s.split(':')
-            h = int(parts[0]); m = int(parts[1]) if len(parts) > 1 else 0
-            return (h + m/60.0) / 24.0
-        v = float(s)
-        if v >= 100: 
-            h = int(v // 100); m = int(v % 100)
-            return (h + m/60.0) / 24.0
-        return v / 24.0
-    except: return 0.0
-
-def calculate_arbeitszeit(anfang_zeit_float, ende_zeit_float, pause_zeit_std):
-    if anfang_zeit_float == 0.0 and ende_zeit_float == 0.0: return 0.0
-    if ende_zeit_float < anfang_zeit_float:
-        zeit_differenz = (ende_zeit_float + 1.0) - anfang_zeit_float
-    else:
-        zeit_differenz = ende_zeit_float - anfang_zeit_float
-    pause_als_tag_bruch = pause_zeit_std / 24.0
-    arbeitszeit_stunden = 24.0 * (zeit_differenz - pause_als_tag_bruch)
-    return max(0.0, arbeitszeit_stunden)
-
-def validate_einsatz(urlaub_krank_df, mitarbeiter_name, einsatz_datum):
-    mitarbeiter_name = safe_get_value(mitarbeiter_name)
-    if not mitarbeiter_name: return True, "OK"
-
-    if isinstance(einsatz_datum, str):
-        try: einsatz_datum = datetime.strptime(einsatz_datum, DATE_FORMAT).date()
-        except: pass 
-        
-    filter_date_str = einsatz_datum.strftime(DATE_FORMAT) 
-    eintrag = urlaub_krank_df[
-        (urlaub_krank_df['Datum'] == filter_date_str) & 
-        (urlaub_krank_df['Mitarbeiter'] == mitarbeiter_name)
-    ]
-    if not eintrag.empty:
-        status = eintrag['Status'].iloc[0]
-        if pd.notna(status) and status.strip() != "":
-            return False, f"⚠️ {status}"
-    return True, "OK"
-
-def check_double_booking(conn, mitarbeiter, datum, start_float, end_float, current_object):
-    mitarbeiter = safe_get_value(mitarbeiter)
-    if not mitarbeiter or (start_float == 0 and end_float == 0):
-        return False, ""
-    
-    if isinstance(datum, str):
-        try: datum = datetime.strptime(datum, DATE_FORMAT).date()
-        except: pass
+# --- 5. GECACHTE LADEFUNKTIONEN ---
 
-    date_str = datum.strftime(DATE_FORMAT)
-    s1 = start_float; e1 = end_float
-    if e1 < s1: e1 += 1.0 
-    
-    query = "SELECT Objekt, MA_Slot, Anfang, Ende FROM einsaetze WHERE Mitarbeiter = %s AND Datum = %s AND Objekt != %s"
-    df_conflicts = pd.read_sql(query, conn, params=(mitarbeiter, date_str, current_object))
-    
-    for _, row in df_conflicts.iterrows():
-        s2 = row['Anfang']; e2 = row['Ende']
-        if e2 < s2: e2 += 1.0
-        
-        if max(s1, s2) < min(e1, e2):
-            t_start = float_to_input_str(row['Anfang'])
-            t_end = float_to_input_str(row['Ende'])
-            return True, f"Überschneidung mit '{row['Objekt']} ({row['MA_Slot']})' ({t_start}-{t_end})"
-            
-    return False, ""
+# Caches sind über (Tabelle, Version) geschlüsselt: Ein Schreibvorgang erhöht in derselben
+# Transaktion die Version der berührten Tabellen (bump_table_version), jeder Rerun liest die
+# aktuellen Versionen einmal (refresh_table_versions) – auch andere App-Instanzen sehen
+# Änderungen damit sofort. Die TTL ist nur noch Rückfallebene.
+# Was der Vorwärmer (siehe VORWÄRMEN) lädt, läuft ohne Spinner: dort gibt es keine Seite.
 
-# --- 6. DATENBANK OPERATIONEN ---
+def refresh_table_versions(conn):
+    st.session_state['table_versions'] = fetch_table_versions(conn)
 
-@st.cache_data(ttl=60) 
-def load_data_from_db(_conn, table_name):
-    return pd.read_sql(f"SELECT * FROM {table_name}", _conn)
+def table_version(table_name):
+    return st.session_state.get('table_versions', {}).get(table_name, 0)
 
-@st.cache_data(ttl=5) 
-def load_einsaetze_for_object(_conn, object_name):
-    query = f"SELECT * FROM einsaetze WHERE Objekt = '{object_name}' ORDER BY Datum"
-    df = pd.read_sql(query, _conn)
-    df['Datum'] = pd.to_datetime(df['Datum']).dt.date
-    return df
+@st.cache_data(ttl=600, show_spinner=False)
+def load_data_from_db(_conn, table_name, version):
+    return pd.read_sql(f"SELECT * FROM {table_name}", _conn)
 
-def save_einsaetze_to_db(conn, df_einsaetze, object_name, start_date, end_date):
-    cursor = conn.cursor()
-    try:
-        s_str = start_date.strftime(DATE_FORMAT)
-        e_str = end_date.strftime(DATE_FORMAT)
-        cursor.execute("DELETE FROM einsaetze WHERE Objekt = %s AND Datum >= %s AND Datum <= %s", (object_name, s_str, e_str))
-        
-        if not df_einsaetze.empty:
-            data = []
-            for _, row in df_einsaetze.iterrows():
-                ma = safe_get_value(row['Mitarbeiter'])
-                data.append((row['Datum'], row['Objekt'], row['MA_Slot'], row['Anfang'], row['Ende'], row['Pause'], ma, row['Zeit']))
-            
-            sql = "INSERT INTO einsaetze (Datum, Objekt, MA_Slot, Anfang, Ende, Pause, Mitarbeiter, Zeit) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
-            cursor.executemany(sql, data)
-            
-        conn.commit()
-    except Exception as e: conn.rollback(); raise e
-    finally: cursor.close()
-
-# --- DB UPDATE ---
-
-def delete_standort(conn, objekt_name):
-    cursor = conn.cursor()
-    try: 
-        cursor.execute(f"DELETE FROM locations_spalte WHERE `{OBJECT_COLUMN_NAME}` = %s", (objekt_name,))
-        conn.commit()
-        return True
-    except: conn.rollback(); return False
-    finally: cursor.close()
-
-def update_standort(conn, alter_name, neuer_name, neue_slot_anzahl, aktuelle_slots, neuer_ansprechpartner, neues_telefon):
-    cursor = conn.cursor()
-    try:
-        sql_update_meta = f"UPDATE locations_spalte SET `{OBJECT_COLUMN_NAME}` = %s, Ansprechpartner = %s, Telefon = %s WHERE `{OBJECT_COLUMN_NAME}` = %s"
-        cursor.execute(sql_update_meta, (neuer_name, neuer_ansprechpartner, neues_telefon, alter_name))
-        
-        if alter_name != neuer_name: 
-            cursor.execute("UPDATE einsaetze SET Objekt = %s WHERE Objekt = %s", (neuer_name, alter_name))
-            
-        aktuelle_anzahl = len(aktuelle_slots)
-        if neue_slot_anzahl > aktuelle_anzahl:
-            for i in range(aktuelle_anzahl + 1, neue_slot_anzahl + 1):
-                cursor.execute(f"INSERT INTO locations_spalte (`{OBJECT_COLUMN_NAME}`, `{MA_SLOT_COLUMN_NAME}`, Ansprechpartner, Telefon) VALUES (%s,%s,%s,%s)", (neuer_name, f"MA{i}", neuer_ansprechpartner, neues_telefon))
-        
-        conn.commit()
-        return True
-    except Exception as e: conn.rollback(); st.error(f"Fehler: {e}"); return False
-    finally: cursor.close()
-
-def delete_mitarbeiter(conn, ma_name):
-    cursor = conn.cursor()
-    try: 
-        cursor.execute("DELETE FROM mitarbeiter_verzeichnis WHERE Mitarbeitername = %s", (ma_name,))
-        conn.commit()
-        return True
-    except: conn.rollback(); return False
-    finally: cursor.close()
-
-def update_mitarbeiter(conn, altes_profil, new_vals):
-    cursor = conn.cursor()
-    try:
-        sql = """UPDATE mitarbeiter_verzeichnis SET Mitarbeitername=%s, Geburtsdatum=%s, Personalnummer=%s, Bewacher_ID=%s, Anstellung=%s, Position=%s, Vertrag_bis=%s, Adresse=%s, PLZ=%s, Telefonnummer=%s, Ausweis_gueltig_bis=%s WHERE Mitarbeitername=%s"""
-        v = (new_vals['Mitarbeitername'], new_vals['Geburtsdatum'], new_vals['Personalnummer'], new_vals['Bewacher_ID'], new_vals['Anstellung'], new_vals['Position'], new_vals['Vertrag_bis'], new_vals['Adresse'], new_vals['PLZ'], new_vals['Telefonnummer'], new_vals['Ausweis_gueltig_bis'], altes_profil['Mitarbeitername'])
-        cursor.execute(sql, v)
-        
-        if altes_profil['Mitarbeitername'] != new_vals['Mitarbeitername']:
-            cursor.execute("UPDATE urlaub_krank SET Mitarbeiter = %s WHERE Mitarbeiter = %s", (new_vals['Mitarbeitername'], altes_profil['Mitarbeitername']))
-            cursor.execute("UPDATE einsaetze SET Mitarbeiter = %s WHERE Mitarbeiter = %s", (new_vals['Mitarbeitername'], altes_profil['Mitarbeitername']))
-            
-        conn.commit()
-        return True
-    except Exception as e: conn.rollback(); st.error(str(e)); return False
-    finally: cursor.close()
+def load_table(conn, table_name):
+    return load_data_from_db(conn, table_name, table_version(table_name))
+
+@st.cache_data(ttl=600, max_entries=24, show_spinner=False)
+def load_abwesenheiten(_conn, start_date, end_date, version):
+    return planung.fetch_abwesenheiten(_conn, start_date, end_date)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_standorte(_conn, version):
+    return stammdaten.fetch_standorte(_conn)
+
+@st.cache_data(ttl=600, max_entries=32)
+def load_abwesenheiten_seite(_conn, mitarbeiter, status, von, bis, sortierung, seite, seitengroesse, version):
+    return stammdaten.fetch_abwesenheiten_seite(_conn, mitarbeiter, status, von, bis, sortierung, seite, seitengroesse)
+
+# Ein Eintrag pro (Objektauswahl, Monat); die zuletzt benutzten bleiben, die ältesten fallen heraus (LRU).
+# Platz für die vorgewärmten Einzelobjekte zweier Monate plus die interaktiv gewählten Auswahlen.
+@st.cache_data(ttl=600, max_entries=2 * VORWAERMEN_MAX_OBJEKTE + 48, show_spinner=False)
+def load_einsaetze_for_objects(_conn, object_names, start_date, end_date, version):
+    return planung.fetch_einsaetze_for_objects(_conn, object_names, start_date, end_date)
+
+# Raster eines Objekts aus dem gespeicherten Stand; _df muss der Stand zu 'version' sein
+@st.cache_data(ttl=600, max_entries=2 * VORWAERMEN_MAX_OBJEKTE + 48, show_spinner=False)
+def load_plan_grid(_df, obj, slots, start_date, end_date, version):
+    return build_plan_grid(_df, list(slots), start_date, end_date)
+
+@st.cache_data(ttl=600, max_entries=12, show_spinner=False)
+def load_aggregated_data(_conn, selected_month_str, v_einsaetze, v_urlaub):
+    return auswertung.fetch_aggregated_data(_conn, selected_month_str)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_month_catalogue(_conn, version):
+    return auswertung.fetch_month_catalogue(_conn)
+
+# 'Mein Plan': je Mitarbeiter und Monat fertig formatiert, Schlüssel ist die Planversion des Mitarbeiters –
+# ein Speichern erneuert nur die Einträge der betroffenen Mitarbeiter, alle anderen bleiben gültig.
+@st.cache_data(ttl=3600, max_entries=2000, show_spinner=False)
+def load_mein_plan(_conn, mitarbeiter, start_date, end_date, version):
+    df = planung.fetch_mein_plan(_conn, mitarbeiter, start_date, end_date)
+    return planung.build_mein_plan(df), float(df['Zeit'].sum()) if not df.empty else 0.0
+
+def ics_config():
+    """[ics]-Abschnitt der Secrets (verzeichnis, geheimnis, optional basis_url) oder None."""
+    try: ics = st.secrets.get('ics')
+    except Exception: return None
+    return ics if ics and 'verzeichnis' in ics and 'geheimnis' in ics else None
+
+def feeds_aktualisieren(conn):
+    ics = ics_config()
+    if ics is None: return
+    try: kalender.aktualisiere_feeds(conn, ics['verzeichnis'], ics['geheimnis'])
+    except Exception as e: logging.getLogger('acp.kalender').warning("Kalender-Feeds nicht aktualisiert: %s", e)
+
+@st.cache_data(ttl=600, max_entries=12, show_spinner=False)
+def load_mitarbeiter_monat(_conn, selected_month_str, version):
+    return auswertung.fetch_mitarbeiter_monat(_conn, selected_month_str)
+
+# --- VORWÄRMEN ---
+# Ein Hintergrund-Thread je Prozess füllt die Caches für aktuellen und nächsten Monat (Raster je Objekt,
+# Auswertung, Stammdaten): beim Start, alle 15 Minuten und wenige Sekunden nach jedem Speichern.
+# Er nimmt nur Pool-Verbindungen, wenn zwei frei bleiben (acp.vorwaermen). ACP_VORWAERMEN=0 schaltet ihn ab.
+# Gestartet wird er im ersten Skriptlauf des Prozesses direkt nach den Migrationen – schon auf der
+# Anmeldeseite, bevor sich jemand einloggt (früher führt Streamlit keinen App-Code aus).
+# Er läuft ohne ScriptRunContext: alles, was er aufruft, muss show_spinner=False haben, sonst
+# protokolliert Streamlit bei jedem Aufruf 'missing ScriptRunContext'.
+
+def vorwaerm_aufgaben(conn):
+    v = fetch_table_versions(conn)
+    df_loc = load_standorte(conn, v.get('standorte', 0))
+    aufgaben = [('mitarbeiter', lambda c: load_data_from_db(c, 'mitarbeiter_verzeichnis', v.get('mitarbeiter_verzeichnis', 0))),
+                ('monate', lambda c: load_month_catalogue(c, v.get('monatskatalog', 0)))]
+    heute = date.today()
+    for monat in [heute.strftime('%Y-%m'), (heute + relativedelta(months=1)).strftime('%Y-%m')]:
+        d_start, d_end = month_bounds(monat)
+        for obj, slots in list(zip(df_loc[OBJECT_COLUMN_NAME], df_loc[MA_SLOT_COLUMN_NAME]))[:VORWAERMEN_MAX_OBJEKTE]:
+            def raster(c, obj=obj, slots=tuple(slots), d_start=d_start, d_end=d_end, ve=v.get('einsaetze', 0)):
+                load_plan_grid(load_einsaetze_for_objects(c, (obj,), d_start, d_end, ve), obj, slots, d_start, d_end, ve)
+            aufgaben.append((f"Raster {obj} {monat}", raster))
+        aufgaben += [
+            (f"Abwesenheiten {monat}", lambda c, d_start=d_start, d_end=d_end: load_abwesenheiten(c, d_start, d_end, v.get('urlaub_krank', 0))),
+            (f"Auswertung {monat}", lambda c, monat=monat: load_aggregated_data(c, monat, v.get('einsaetze', 0), v.get('urlaub_krank', 0))),
+            (f"Statistik {monat}", lambda c, monat=monat: load_mitarbeiter_monat(c, monat, v.get('mitarbeiter_monat', 0))),
+        ]
+    return aufgaben
+
+@st.cache_resource
+def get_vorwaermer():
+    if os.environ.get('ACP_VORWAERMEN') == '0': return None
+    vorwaermer = Vorwaermer(get_db_pool(), vorwaerm_aufgaben)
+    vorwaermer.start()
+    return vorwaermer
+
+if st.session_state.get('db_initialized'): get_vorwaermer()
 
 # --- LOGIN SYSTEM ---
 
@@ -283,14 +264,13 @@ def check_login():
                 # 2. Check Mitarbeiter (DB)
                 else:
                     try:
-                        conn = get_db_connection()
-                        cursor = conn.cursor()
-                        # Suche Mitarbeiter mit diesem Namen
-                        query = "SELECT Personalnummer FROM mitarbeiter_verzeichnis WHERE Mitarbeitername = %s"
-                        cursor.execute(query, (username,))
-                        result = cursor.fetchone()
-                        cursor.close()
-                        conn.close()
+                        with get_db_connection() as conn:
+                            cursor = conn.cursor()
+                            # Suche Mitarbeiter mit diesem Namen
+                            query = "SELECT Personalnummer FROM mitarbeiter_verzeichnis WHERE Mitarbeitername = %s"
+                            cursor.execute(query, (username,))
+                            result = cursor.fetchone()
+                            cursor.close()
 
                         if result:
                             stored_pnr = result[0]
@@ -317,39 +297,46 @@ def logout():
     st.rerun()
 
 # --- DIALOGE ---
+# st.dialog ist ein Fragment: ein Klick im Dialog führt nur den Dialog erneut aus, die Verbindung des
+# letzten Seitenlaufs ist dann längst zurück im Pool. Deshalb holt jeder Dialog beim Klick seine eigene.
 @st.dialog("Neuen Standort anlegen")
-def dialog_neuer_standort(conn):
+def dialog_neuer_standort():
     name = st.text_input("Name des Standorts:")
+    region = st.text_input("Region:")
     c1, c2 = st.columns(2)
     anspr = c1.text_input("Ansprechpartner:")
     tel = c2.text_input("Telefon:")
     count = st.number_input("Anzahl MA-Slots:", min_value=1, value=5)
     if st.button("Erstellen", type="primary"):
         if name:
-            cursor = conn.cursor()
             try:
-                for i in range(1, int(count)+1): 
-                    cursor.execute(f"INSERT INTO locations_spalte (`{OBJECT_COLUMN_NAME}`, `{MA_SLOT_COLUMN_NAME}`, Ansprechpartner, Telefon) VALUES (%s,%s,%s,%s)", (name, f"MA{i}", anspr, tel))
-                conn.commit(); st.success("OK"); load_data_from_db.clear(); time.sleep(0.5); st.rerun()
-            except Exception as e: conn.rollback(); st.error(str(e))
-            finally: cursor.close()
+                with get_db_connection() as conn: create_standort(conn, name, anspr, tel, int(count), region)
+                st.success("OK"); time.sleep(0.5); st.rerun()
+            except Exception as e: st.error(str(e))
 
 @st.dialog("Standort bearbeiten")
-def dialog_edit_standort(conn, name, slots, anspr, tel):
+def dialog_edit_standort(standort_id, name, slots, anspr, tel, region):
     st.write(f"Bearbeite: **{name}**")
     new_name = st.text_input("Name:", value=name)
+    new_region = st.text_input("Region:", value=region if isinstance(region, str) else "")
     c1, c2 = st.columns(2)
     new_anspr = c1.text_input("Ansprechpartner:", value=anspr if anspr else "")
     new_tel = c2.text_input("Telefon:", value=tel if tel else "")
     new_cnt = st.number_input("Slots:", min_value=1, value=len(slots))
     c_save, c_del = st.columns(2)
     if c_save.button("Speichern"):
-        if update_standort(conn, name, new_name, new_cnt, slots, new_anspr, new_tel): st.success("OK"); load_data_from_db.clear(); time.sleep(0.5); st.rerun()
+        try:
+            with get_db_connection() as conn: update_standort(conn, standort_id, name, new_name, new_cnt, slots, new_anspr, new_tel, new_region)
+            st.success("OK"); time.sleep(0.5); st.rerun()
+        except Exception as e: st.error(f"Fehler: {e}")
     if c_del.button("Löschen", type="primary"):
-        if delete_standort(conn, name): st.success("Gelöscht"); load_data_from_db.clear(); time.sleep(0.5); st.rerun()
+        try:
+            with get_db_connection() as conn: delete_standort(conn, standort_id)
+            st.success("Gelöscht"); time.sleep(0.5); st.rerun()
+        except Exception as e: st.error(f"Fehler: {e}")
 
 @st.dialog("Neuer Mitarbeiter")
-def dialog_neuer_mitarbeiter(conn):
+def dialog_neuer_mitarbeiter():
     with st.form("new_ma"):
         name = st.text_input("Name *")
         st.info("ℹ️ Die Personalnummer ist das Passwort für den Mitarbeiter-Login!")
@@ -359,18 +346,20 @@ def dialog_neuer_mitarbeiter(conn):
         adr=st.text_input("Adresse"); plz=st.text_input("PLZ")
         if st.form_submit_button("Speichern", type="primary"):
             if name and pnr:
-                cursor = conn.cursor()
-                try:
-                    cursor.execute("INSERT INTO mitarbeiter_verzeichnis (Mitarbeitername, Geburtsdatum, Personalnummer, Bewacher_ID, Anstellung, Position, Vertrag_bis, Adresse, PLZ, Telefonnummer, Ausweis_gueltig_bis) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
-                                     (name, geb.strftime(DATE_FORMAT), pnr, bid, anst, pos, vbis.strftime(DATE_FORMAT), adr, plz, tel, abis.strftime(DATE_FORMAT)))
-                    conn.commit(); st.success("OK"); load_data_from_db.clear(); time.sleep(0.5); st.rerun()
-                except Exception as e: conn.rollback(); st.error(str(e))
-                finally: cursor.close()
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute("INSERT INTO mitarbeiter_verzeichnis (Mitarbeitername, Geburtsdatum, Personalnummer, Bewacher_ID, Anstellung, Position, Vertrag_bis, Adresse, PLZ, Telefonnummer, Ausweis_gueltig_bis) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                                         (name, geb.strftime(DATE_FORMAT), pnr, bid, anst, pos, vbis.strftime(DATE_FORMAT), adr, plz, tel, abis.strftime(DATE_FORMAT)))
+                        bump_table_version(cursor, 'mitarbeiter_verzeichnis')
+                        conn.commit(); st.success("OK"); time.sleep(0.5); st.rerun()
+                    except Exception as e: conn.rollback(); st.error(str(e))
+                    finally: cursor.close()
             else:
                 st.error("Name und Personalnummer sind Pflicht!")
 
 @st.dialog("Mitarbeiter bearbeiten")
-def dialog_edit_mitarbeiter(conn, row):
+def dialog_edit_mitarbeiter(row):
     with st.form("edit_ma"):
         name = st.text_input("Name", value=row['Mitarbeitername'])
         def d(x): 
@@ -383,15 +372,19 @@ def dialog_edit_mitarbeiter(conn, row):
         s = st.form_submit_button("Speichern")
         if s:
             vals = {'Mitarbeitername':name,'Geburtsdatum':geb.strftime(DATE_FORMAT),'Personalnummer':pnr,'Bewacher_ID':bid,'Anstellung':anst,'Position':pos,'Vertrag_bis':vbis.strftime(DATE_FORMAT),'Adresse':adr,'PLZ':plz,'Telefonnummer':tel,'Ausweis_gueltig_bis':abis.strftime(DATE_FORMAT)}
-            if update_mitarbeiter(conn, {'Mitarbeitername':row['Mitarbeitername']}, vals): 
-                st.success("OK"); load_data_from_db.clear()
+            try:
+                with get_db_connection() as conn: update_mitarbeiter(conn, {'Mitarbeitername':row['Mitarbeitername']}, vals)
+                st.success("OK")
                 st.session_state.ma_editor_key += 1 # Reset Table Key
                 time.sleep(0.5); st.rerun()
+            except Exception as e: st.error(str(e))
     if st.button("Löschen", type="primary"):
-        if delete_mitarbeiter(conn, row['Mitarbeitername']): 
-            st.success("Gelöscht"); load_data_from_db.clear()
+        try:
+            with get_db_connection() as conn: delete_mitarbeiter(conn, row['Mitarbeitername'])
+            st.success("Gelöscht")
             st.session_state.ma_editor_key += 1
             time.sleep(0.5); st.rerun()
+        except Exception as e: st.error(str(e))
 
 # --- NEUE SEITE: MEIN PLAN (Für Mitarbeiter) ---
 def seite_mein_plan(conn, username):
@@ -413,44 +406,40 @@ def seite_mein_plan(conn, username):
     start_date = date(calc_date.year, calc_date.month, 1)
     end_date = (pd.to_datetime(start_date) + relativedelta(months=1, days=-1)).date()
     
-    query = """
-        SELECT Datum, Objekt, MA_Slot, Anfang, Ende, Pause, Zeit 
-        FROM einsaetze 
-        WHERE Mitarbeiter = %s AND Datum >= %s AND Datum <= %s
-        ORDER BY Datum
-    """
-    df = pd.read_sql(query, conn, params=(username, start_date, end_date))
+    version = fetch_mitarbeiter_versionen(conn, [username]).get(username, 0)
+    df_anzeige, total_hours = load_mein_plan(conn, username, start_date, end_date, version)
     
-    if not df.empty:
-        df['Datum'] = pd.to_datetime(df['Datum'])
-        df['Wochentag'] = df['Datum'].apply(lambda x: GERMAN_WEEKDAYS[x.weekday()])
-        df['Datum'] = df['Datum'].dt.strftime('%d.%m.%Y')
-        df['Von'] = df['Anfang'].apply(float_to_input_str)
-        df['Bis'] = df['Ende'].apply(float_to_input_str)
-        df['Stunden'] = df['Zeit'].apply(format_duration_str)
-        
-        display_df = df[['Datum', 'Wochentag', 'Objekt', 'MA_Slot', 'Von', 'Bis', 'Stunden']]
-        display_df.columns = ['Datum', 'Tag', 'Objekt', 'Position', 'Von', 'Bis', 'Dauer']
-        
-        st.table(display_df)
-        total_hours = df['Zeit'].sum()
+    if not df_anzeige.empty:
+        st.table(df_anzeige)
         st.info(f"Gesamtstunden in diesem Monat: **{format_duration_str(total_hours)}**")
     else:
         st.info("Keine Einsätze in diesem Monat gefunden.")
 
+    # Kalender: Abo-Link auf den vorab erzeugten Feed, sonst Download (erst beim Klick, eigene Pool-Verbindung)
+    ics = ics_config()
+    if ics and ics.get('basis_url'):
+        st.caption("📅 Kalender abonnieren (z. B. am Handy): " + f"{ics['basis_url'].rstrip('/')}/{kalender.feed_token(username, ics['geheimnis'])}.ics")
+    pool = get_db_pool()
+    def feed():
+        c = pool.acquire()
+        try:
+            ab = today - relativedelta(days=kalender.FEED_TAGE_ZURUECK)
+            return kalender.ics_feed(planung.fetch_mein_plan(c, username, ab, date(9999, 12, 31)), username)
+        finally: pool.release(c)
+    st.download_button("📅 Kalender (.ics)", data=feed, file_name="Einsatzplan.ics", mime="text/calendar", on_click="ignore")
+
 # --- SEITEN (Admin) ---
 def seite_stammdaten_verwaltung(conn):
     st.header("Stammdatenverwaltung")
     t1, t2, t3 = st.tabs(["Mitarbeiter", "Standorte", "Urlaub/Krank"])
-    df_ma = load_data_from_db(conn, 'mitarbeiter_verzeichnis')
-    df_loc = load_data_from_db(conn, 'locations_spalte')
-    df_uk = load_data_from_db(conn, 'urlaub_krank')
+    df_ma = load_table(conn, 'mitarbeiter_verzeichnis')
+    df_loc = load_standorte(conn, table_version('standorte'))
     
     if 'ma_editor_key' not in st.session_state: st.session_state.ma_editor_key = 0
     if 'loc_editor_key' not in st.session_state: st.session_state.loc_editor_key = 0
     
     with t1:
-        if st.button("➕ Neuer Mitarbeiter"): dialog_neuer_mitarbeiter(conn)
+        if st.button("➕ Neuer Mitarbeiter"): dialog_neuer_mitarbeiter()
         search = st.text_input("Suche:", placeholder="Name...")
         df_show = df_ma.drop(columns=['ID']).copy()
         df_show.insert(0, "Auswahl", False)
@@ -465,32 +454,27 @@ def seite_stammdaten_verwaltung(conn):
         selected_rows = edited_df[edited_df["Auswahl"]]
         if not selected_rows.empty:
             row = selected_rows.iloc[0]
-            dialog_edit_mitarbeiter(conn, row)
+            dialog_edit_mitarbeiter(row)
 
     with t2:
-        if st.button("➕ Neuer Standort"): dialog_neuer_standort(conn)
+        if st.button("➕ Neuer Standort"): dialog_neuer_standort()
         with st.expander("⚠️ Verwaltungs-Tools (Datenbank bereinigen)"):
             st.warning("Achtung: Dies löscht alle Standorte aus der Datenbank!")
             if st.button("Alle Standorte löschen", type="primary"):
-                cursor = conn.cursor()
                 try:
-                    cursor.execute(f"DELETE FROM locations_spalte")
-                    conn.commit()
+                    delete_all_standorte(conn)
                     st.success("Alle Standorte wurden entfernt.")
                     time.sleep(1)
                     st.rerun()
                 except Exception as e: st.error(str(e))
-                finally: cursor.close()
         if not df_loc.empty:
-            df_grp = df_loc.groupby(OBJECT_COLUMN_NAME).agg({
-                MA_SLOT_COLUMN_NAME: list,
-                'Ansprechpartner': 'first',
-                'Telefon': 'first'
-            }).reset_index().sort_values(OBJECT_COLUMN_NAME)
+            df_grp = df_loc[['ID', OBJECT_COLUMN_NAME, 'Region', MA_SLOT_COLUMN_NAME, 'Ansprechpartner', 'Telefon']].copy()
             df_grp.insert(0, "Auswahl", False)
             col_config_loc = {
                 "Auswahl": st.column_config.CheckboxColumn("Edit", width="small"),
+                "ID": None,
                 OBJECT_COLUMN_NAME: st.column_config.TextColumn("Standort", width="medium"),
+                "Region": st.column_config.TextColumn("Region", width="small"),
                 MA_SLOT_COLUMN_NAME: st.column_config.ListColumn("Slots", width="large"),
                 "Ansprechpartner": st.column_config.TextColumn("Ansprechpartner", width="medium"),
                 "Telefon": st.column_config.TextColumn("Telefon", width="medium")
@@ -499,7 +483,7 @@ def seite_stammdaten_verwaltung(conn):
             sel_loc = edited_grp[edited_grp["Auswahl"]]
             if not sel_loc.empty:
                 r = sel_loc.iloc[0]
-                dialog_edit_standort(conn, r[OBJECT_COLUMN_NAME], r[MA_SLOT_COLUMN_NAME], r['Ansprechpartner'], r['Telefon'])
+                dialog_edit_standort(int(r['ID']), r[OBJECT_COLUMN_NAME], r[MA_SLOT_COLUMN_NAME], r['Ansprechpartner'], r['Telefon'], r['Region'])
     
     with t3:
         with st.form("uk"):
@@ -507,58 +491,215 @@ def seite_stammdaten_verwaltung(conn):
             dates = c1.date_input("Zeitraum", [], help="Start & Ende wählen")
             ma_list_sorted = sorted(df_ma['Mitarbeitername'].unique().tolist())
             ma = c2.selectbox("Mitarbeiter", [""]+ma_list_sorted)
-            stat = c3.selectbox("Status", ["Urlaub","Krank","Ausfall","Standby"])
+            stat = c3.selectbox("Status", ABWESENHEIT_STATUS)
             if st.form_submit_button("Speichern", type="primary"):
                 if ma and dates:
-                    cursor = conn.cursor()
                     d1 = dates[0]; d2 = dates[1] if len(dates)>1 else d1
-                    rng = pd.date_range(d1, d2).to_list()
                     try:
-                        for d in rng: 
-                            cursor.execute("REPLACE INTO urlaub_krank (Datum, Mitarbeiter, Status) VALUES (%s,%s,%s)", (d.strftime(DATE_FORMAT), ma, stat))
-                        conn.commit(); st.success("OK"); load_data_from_db.clear()
-                    except Exception as e: conn.rollback(); st.error(str(e))
-                    finally: cursor.close()
+                        save_abwesenheit(conn, ma, d1, d2, stat)
+                        st.success("OK")
+                    except Exception as e: st.error(str(e))
         
         st.divider()
         st.subheader("Übersicht Abwesenheiten")
+        f1, f2, f3, f4, f5 = st.columns([2, 1, 2, 1.5, 1])
+        f_ma = f1.selectbox("Mitarbeiter", ["Alle"] + ma_list_sorted, key="uk_f_ma")
+        f_stat = f2.selectbox("Status", ["Alle"] + ABWESENHEIT_STATUS, key="uk_f_stat")
+        f_dates = f3.date_input("Zeitraum", [], key="uk_f_dates")
+        f_sort = f4.selectbox("Sortierung", list(ABWESENHEIT_SORTIERUNG), key="uk_f_sort")
+        f_size = f5.selectbox("Pro Seite", [25, 50, 100], key="uk_f_size")
+        f_von = f_dates[0] if len(f_dates) > 0 else None
+        f_bis = f_dates[1] if len(f_dates) > 1 else f_von
+        filter_key = (f_ma, f_stat, f_von, f_bis, f_sort, f_size)
+        # Bei geänderten Filtern wieder auf Seite 1
+        if st.session_state.get('uk_filter_key') != filter_key:
+            st.session_state['uk_filter_key'] = filter_key
+            st.session_state['uk_seite'] = 1
+        seite = st.session_state.get('uk_seite', 1)
+        args = (None if f_ma == "Alle" else f_ma, None if f_stat == "Alle" else f_stat, f_von, f_bis, f_sort)
+        df_uk, total = load_abwesenheiten_seite(conn, *args, seite, f_size, table_version('urlaub_krank'))
+        seiten = max(1, -(-total // f_size))
+        if seite > seiten:
+            seite = st.session_state['uk_seite'] = seiten
+            df_uk, total = load_abwesenheiten_seite(conn, *args, seite, f_size, table_version('urlaub_krank'))
         if not df_uk.empty:
-            df_uk['Datum_Sort'] = pd.to_datetime(df_uk['Datum'])
-            df_display = df_uk.sort_values(by=['Datum_Sort', 'Mitarbeiter'], ascending=[False, True])
-            df_display['Datum_Anzeige'] = df_display['Datum_Sort'].dt.strftime('%d.%m.%Y')
+            df_uk['Von'] = pd.to_datetime(df_uk['Von']); df_uk['Bis'] = pd.to_datetime(df_uk['Bis'])
+            df_display = df_uk.copy()
+            df_display['Von_Anzeige'] = df_display['Von'].dt.strftime('%d.%m.%Y')
+            df_display['Bis_Anzeige'] = df_display['Bis'].dt.strftime('%d.%m.%Y')
+            df_display['Tage'] = (df_display['Bis'] - df_display['Von']).dt.days + 1
             df_display.insert(0, "Löschen", False)
             
             edited_uk = st.data_editor(
-                df_display[['Löschen', 'ID', 'Datum_Anzeige', 'Mitarbeiter', 'Status']],
+                df_display[['Löschen', 'ID', 'Von_Anzeige', 'Bis_Anzeige', 'Tage', 'Mitarbeiter', 'Status']],
                 column_config={
                     "Löschen": st.column_config.CheckboxColumn(width="small"),
                     "ID": None,
-                    "Datum_Anzeige": st.column_config.TextColumn("Datum"),
+                    "Von_Anzeige": st.column_config.TextColumn("Von"),
+                    "Bis_Anzeige": st.column_config.TextColumn("Bis"),
                 },
-                disabled=['ID', 'Datum_Anzeige', 'Mitarbeiter', 'Status'],
+                disabled=['ID', 'Von_Anzeige', 'Bis_Anzeige', 'Tage', 'Mitarbeiter', 'Status'],
                 hide_index=True,
                 use_container_width=True,
-                key="uk_list_editor"
+                key=f"uk_list_editor_{seite}"
             )
+            p1, p2, p3 = st.columns([1, 2, 1])
+            if p1.button("◀ Zurück", disabled=seite <= 1):
+                st.session_state['uk_seite'] = seite - 1; st.rerun()
+            p2.caption(f"Seite {seite} von {seiten} · {total} Einträge")
+            if p3.button("Weiter ▶", disabled=seite >= seiten):
+                st.session_state['uk_seite'] = seite + 1; st.rerun()
             
             if st.button("Ausgewählte Einträge löschen"):
                 to_delete = edited_uk[edited_uk['Löschen']]
                 if not to_delete.empty:
-                    cursor = conn.cursor()
                     try:
-                        for _, row in to_delete.iterrows():
-                            cursor.execute("DELETE FROM urlaub_krank WHERE ID = %s", (row['ID'],))
-                        conn.commit()
+                        delete_abwesenheiten(conn, to_delete['ID'].tolist())
                         st.success("Einträge gelöscht!")
-                        load_data_from_db.clear()
                         time.sleep(0.5)
                         st.rerun()
                     except Exception as e: st.error(str(e))
-                    finally: cursor.close()
         else:
             st.info("Keine Einträge vorhanden.")
 
-def seite_einsatzplanung(conn, df_loc, df_uk, MA_LIST):
+
+def plan_column_config(slots, has_content, MA_LIST):
+    """Spaltenkonfiguration und -reihenfolge des Planungsrasters."""
+    col_cfg = {"Datum": None} 
+    col_cfg['Datum_Tag'] = st.column_config.TextColumn(label="Datum", width="medium", disabled=True)
+
+    ordered_cols = ['Datum', 'Datum_Tag']
+    for slot in slots:
+        bold_header = to_bold(slot)
+        width_ma = None if has_content[slot] else "small" 
+        width_time = "small"
+        col_cfg[f'{slot}_Mitarbeiter'] = st.column_config.SelectboxColumn(bold_header, options=MA_LIST, width=width_ma)
+        col_cfg[f'{slot}_Anfang'] = st.column_config.TextColumn("Von", width=width_time, help="18, 18:30")
+        col_cfg[f'{slot}_Ende'] = st.column_config.TextColumn("Bis", width=width_time)
+        col_cfg[f'{slot}_Pause'] = st.column_config.NumberColumn("Pause", format="%.1f", min_value=0.0, max_value=24.0, width="small")
+        col_cfg[f'{slot}_Zeit'] = st.column_config.NumberColumn("Zeit", format="%.2f", width="small", disabled=True)
+        ordered_cols.extend([f'{slot}_{f}' for f in PLAN_GRID_FIELDS])
+    return col_cfg, ordered_cols
+
+def collect_plan_rows(edited, df_plan, obj, slots):
+    """Bearbeitetes Raster eines Objekts -> Zeilen (Datum, Objekt, MA_Slot, ...) für Prüfung und Speichern, spaltenweise je Slot."""
+    datum = pd.to_datetime(df_plan.loc[edited.index, 'Datum']).dt.strftime(DATE_FORMAT).to_numpy()
+    teile = []
+    for s in slots:
+        ma = np.array([x if isinstance(x, str) else None for x in edited[f'{s}_Mitarbeiter']], dtype=object)
+        a_float = parse_time_series(edited[f'{s}_Anfang'])
+        e_float = parse_time_series(edited[f'{s}_Ende'])
+        p = pd.to_numeric(edited[f'{s}_Pause'], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        keep = ma.astype(bool) | (a_float > 0) | (e_float > 0)
+        teile.append(pd.DataFrame({'Datum': datum, 'Objekt': obj, 'MA_Slot': s, 'Anfang': a_float, 'Ende': e_float, 'Pause': p,
+                                   'Mitarbeiter': ma, 'Zeit': calculate_arbeitszeit_series(a_float, e_float, p)})[keep])
+    if not teile: return pd.DataFrame(columns=['Datum', 'Objekt', 'MA_Slot', 'Anfang', 'Ende', 'Pause', 'Mitarbeiter', 'Zeit'])
+    return pd.concat(teile, ignore_index=True).sort_values('Datum', kind='stable', ignore_index=True)
+
+def pruefen_und_speichern(conn, df_rows, df_saved, objekte, d_start, d_end):
+    """Konfliktprüfung (Abwesenheiten, Doppelbuchungen) und – wenn sauber – Speichern in einer Transaktion."""
+    error_messages = []
+    total = float(df_rows['Zeit'].sum()) if not df_rows.empty else 0.0
+    # Abwesenheiten: Zeiträume des Monats laden, Index einmal aufbauen, alle Zellen in einem Durchlauf prüfen
+    with profil.phase('pruefen'):
+        df_uk = expand_abwesenheiten(load_abwesenheiten(conn, d_start, d_end, table_version('urlaub_krank')), d_start, d_end)
+        for d_conf, ma, msg in find_absence_conflicts(build_absence_index(df_uk), df_rows):
+            error_messages.append(f"{d_conf.strftime('%d.%m.%Y')} - {ma}: {msg}")
+        # Doppelbuchungen: eine Abfrage für fremde Objekte, geladene Objekte untereinander im Speicher
+        for d_conf, ma, dbl_msg in find_double_bookings(conn, df_rows, objekte):
+            error_messages.append(f"{d_conf.strftime('%d.%m.%Y')} - {ma}: ❌ {dbl_msg}")
+    if error_messages:
+        for err in error_messages: st.error(err)
+        st.warning("❌ Speichern abgebrochen aufgrund von Konflikten. Bitte korrigieren.")
+        return
+    try:
+        with profil.phase('speichern'): res = save_einsaetze_to_db(conn, df_rows, df_saved, objekte, d_start, d_end)
+        n_changes = sum(res.values())
+        if n_changes: st.success(f"Gespeichert! {n_changes} Änderungen (neu: {res['neu']}, geändert: {res['geaendert']}, gelöscht: {res['geloescht']}) · Total: {format_duration_str(total)}")
+        else: st.info("Keine Änderungen.")
+        st.session_state.pop('autoplan', None); st.session_state.pop('plan_basis', None)
+        if n_changes:
+            feeds_aktualisieren(conn)
+            if (vorwaermer := get_vorwaermer()) is not None: vorwaermer.anstossen()
+        time.sleep(1); st.rerun()
+    except PlanKonflikt as e:
+        st.error(f"❌ Nicht gespeichert: {e}. Bitte oben 'Neu laden' und diese Zellen erneut prüfen.")
+        if not e.zellen: return
+        df_k = pd.DataFrame(e.zellen)
+        df_k['Datum'] = pd.to_datetime(df_k['Datum']).dt.strftime('%d.%m.%Y')
+        st.dataframe(df_k.rename(columns={'MA_Slot': 'Slot', 'Art': 'Änderung', 'Mitarbeiter': 'Jetzt eingeteilt'}), hide_index=True, use_container_width=True)
+    except Exception as e: st.error(f"Fehler: {e}")
+
+def plan_basis(key, df_aktuell):
+    """
+    Stand, auf dem der Planer arbeitet: wird beim ersten Anzeigen festgehalten und erst nach dem
+    Speichern oder 'Neu laden' ersetzt. Eingaben bleiben so erhalten, wenn andere speichern, und
+    save_einsaetze_to_db erkennt deren Änderungen an den Zeilenversionen.
+    """
+    version = table_version('einsaetze')
+    basis = st.session_state.get('plan_basis')
+    if basis is None or basis['key'] != key:
+        st.session_state['plan_basis'] = {'key': key, 'df': df_aktuell, 'version': version}
+        return df_aktuell
+    if basis['version'] != version:
+        stand = lambda df: set(zip(df['EinsatzID'], df['Version']))
+        if stand(basis['df']) == stand(df_aktuell): basis['version'] = version
+        else:
+            c1, c2 = st.columns([4, 1])
+            c1.warning("Dieser Plan wurde inzwischen von anderen gespeichert. 'Neu laden' zeigt den aktuellen Stand – nicht gespeicherte Eingaben gehen dabei verloren.")
+            if c2.button("🔄 Neu laden"):
+                st.session_state['plan_basis'] = {'key': key, 'df': df_aktuell, 'version': version}
+                st.session_state['plan_editor_nr'] = st.session_state.get('plan_editor_nr', 0) + 1
+                st.rerun()
+    return basis['df']
+
+def sammelexport(df_loc, d_start, d_end):
+    """Sammelexport (ZIP je Objekt und Monat) in der Sidebar; wird erst beim Klick auf einer eigenen Pool-Verbindung erzeugt."""
+    with st.sidebar.expander("Sammelexport"):
+        zeitraum = st.date_input("Zeitraum", value=(d_start, d_end), format="DD.MM.YYYY", key="export_zeitraum")
+        objekte = st.multiselect("Objekte (leer = alle)", df_loc[OBJECT_COLUMN_NAME].tolist(), key="export_objekte")
+        if not (isinstance(zeitraum, tuple) and len(zeitraum) == 2): st.caption("Bitte Start- und Enddatum wählen."); return
+        von, bis = zeitraum
+        pool = get_db_pool()
+        slots_by_obj = dict(zip(df_loc[OBJECT_COLUMN_NAME], df_loc[MA_SLOT_COLUMN_NAME]))
+        def erzeugen():
+            conn = pool.acquire()
+            try: return export.export_zip(conn, von, bis, objekte, slots_by_obj)
+            finally: pool.release(conn)
+        st.download_button("📦 ZIP herunterladen", data=erzeugen, file_name=f"Einsatzplaene_{von:%Y-%m-%d}_{bis:%Y-%m-%d}.zip",
+                           mime="application/zip", on_click="ignore")
+
+def auto_planen_vorschlag(conn, df_saved, objekte, loc_info, d_start, d_end):
+    """
+    Auto-Planen-Schalter in der Sidebar. Der Vorschlag liegt in der Sitzung und wird nur ins Raster
+    eingeblendet; gespeichert wird er erst über 'Speichern' (mit allen Prüfungen).
+    Rückgabe: Einsätze für das Raster (gespeicherter Stand + Vorschlag)
+    """
+    key = (tuple(objekte), d_start)
+    if st.sidebar.button("🤖 Auto-Planen", help="Leere Slots mit verfügbaren Mitarbeitern vorbelegen (Zeiten aus Plan bzw. Vormonat)"):
+        with profil.phase('autoplan'):
+            slots_by_obj = {obj: loc_info.loc[obj, MA_SLOT_COLUMN_NAME] for obj in objekte}
+            st.session_state['autoplan'] = {'key': key, 'zeilen': autoplanung.vorschlag_erstellen(conn, df_saved, slots_by_obj, d_start, d_end)}
+            st.session_state['plan_editor_nr'] = st.session_state.get('plan_editor_nr', 0) + 1
+    vorschlag = st.session_state.get('autoplan')
+    if not vorschlag or vorschlag['key'] != key: return df_saved
+
+    zeilen = vorschlag['zeilen']
+    besetzt = zeilen[zeilen['Mitarbeiter'] != '']
+    c1, c2 = st.columns([4, 1])
+    if zeilen.empty: c1.info("Auto-Planen: keine offenen Schichten mit bekannten Zeiten (Plan oder Vormonat).")
+    else: c1.info(f"Auto-Planen: {len(besetzt)} von {len(zeilen)} offenen Schichten vorbelegt ({format_duration_str(besetzt['Zeit'].sum())}). Bitte prüfen und mit 'Speichern' übernehmen.")
+    if c2.button("Vorschlag verwerfen"):
+        st.session_state.pop('autoplan', None); st.session_state['plan_editor_nr'] = st.session_state.get('plan_editor_nr', 0) + 1
+        st.rerun()
+    return pd.concat([df_saved, besetzt], ignore_index=True) if not besetzt.empty else df_saved
+
+def plan_raster(df, obj, slots, d_start, d_end, gespeichert):
+    """Raster eines Objekts; zeigt es den gespeicherten, aktuellen Stand, aus dem (vorgewärmten) Cache."""
+    if gespeichert: return load_plan_grid(df, obj, tuple(slots), d_start, d_end, table_version('einsaetze'))
+    return build_plan_grid(df, slots, d_start, d_end)
+
+def seite_einsatzplanung(conn, df_loc, MA_LIST):
     st.header("Einsatzplanung")
     if df_loc.empty: st.warning("Keine Standorte."); return
     
@@ -567,8 +708,15 @@ def seite_einsatzplanung(conn, df_loc, df_uk, MA_LIST):
     month_options = [datetime(2000, m, 1).strftime("%B") for m in range(1, 13)]
 
     st.sidebar.header("Filter")
-    sorted_locs = sorted(df_loc[OBJECT_COLUMN_NAME].unique())
-    obj = st.sidebar.selectbox("Objekt:", sorted_locs)
+    modus = st.sidebar.radio("Ansicht:", ["Ein Objekt", "Mehrere Objekte"], horizontal=True)
+    if modus == "Ein Objekt":
+        objekte = [st.sidebar.selectbox("Objekt:", df_loc[OBJECT_COLUMN_NAME].tolist())]
+    else:
+        regionen = sorted(df_loc['Region'].dropna().unique().tolist())
+        region = st.sidebar.selectbox("Region:", ["Freie Auswahl"] + regionen)
+        vorauswahl = [] if region == "Freie Auswahl" else df_loc.loc[df_loc['Region'] == region, OBJECT_COLUMN_NAME].tolist()
+        objekte = st.sidebar.multiselect("Objekte:", df_loc[OBJECT_COLUMN_NAME].tolist(), default=vorauswahl, key=f"plan_objekte_{region}")
+        if not objekte: st.info("Bitte Objekte oder eine Region wählen."); return
     
     selected_year = st.sidebar.selectbox("Jahr:", year_options, index=year_options.index(today.year))
     selected_month_name = st.sidebar.selectbox("Monat:", month_options, index=today.month - 1)
@@ -577,106 +725,57 @@ def seite_einsatzplanung(conn, df_loc, df_uk, MA_LIST):
     selected_month_str = f"{selected_month_name} {selected_year}"
     d_start = date(selected_year, selected_month_num, 1)
     d_end = (pd.to_datetime(d_start) + relativedelta(months=+1, days=-1)).date()
-    
-    row_info = df_loc[df_loc[OBJECT_COLUMN_NAME] == obj].iloc[0]
+
+    sammelexport(df_loc, d_start, d_end)
+
+    # Alle gewählten Objekte mit einer Abfrage; gleichzeitig die Abwesenheiten des Monats für die Prüfung beim Speichern
+    with profil.phase('laden'):
+        df_aktuell, _ = gleichzeitig(conn, lambda c: load_einsaetze_for_objects(c, tuple(objekte), d_start, d_end, table_version('einsaetze')),
+                                     lambda c: load_abwesenheiten(c, d_start, d_end, table_version('urlaub_krank')))
+    # Bearbeitet und gespeichert wird gegen den beim Öffnen geladenen Stand (optimistisches Sperren)
+    df_saved = plan_basis((tuple(objekte), d_start), df_aktuell)
+    loc_info = df_loc.set_index(OBJECT_COLUMN_NAME)
+    df_grid = auto_planen_vorschlag(conn, df_saved, objekte, loc_info, d_start, d_end)
+    # Ohne Vorschlag und mit aktueller Basis entspricht das Raster dem gespeicherten Stand -> vorgewärmter Cache
+    gespeichert = df_grid is df_saved and st.session_state['plan_basis']['version'] == table_version('einsaetze')
+    if len(objekte) > 1:
+        seite_einsatzplanung_mehrere(conn, objekte, loc_info, df_saved, df_grid, d_start, d_end, selected_month_str, MA_LIST, gespeichert)
+        return
+    obj = objekte[0]
+    
+    row_info = loc_info.loc[obj]
     anspr = row_info['Ansprechpartner']; tel = row_info['Telefon']
     info_str = f" ({', '.join(filter(None, [f'Anspr: {anspr}' if anspr else '', f'Tel: {tel}' if tel else '']))})" if anspr or tel else ""
     st.subheader(f"Plan: {obj}{info_str} - {selected_month_str}")
 
-    # FIX: Dubletten verhindern
-    raw_slots = list(set(df_loc[df_loc[OBJECT_COLUMN_NAME]==obj][MA_SLOT_COLUMN_NAME].tolist()))
-    slots = sorted(raw_slots, key=natural_sort_key)
+    # Slots kommen eindeutig und fertig sortiert aus load_standorte
+    slots = row_info[MA_SLOT_COLUMN_NAME]
     
-    df_saved = load_einsaetze_for_object(conn, obj)
-    rng = pd.date_range(d_start, d_end).normalize().date
-    df_plan = pd.DataFrame({'Datum': rng})
-    # Wochentag im Datum Text für Anzeige (Wochenende markieren)
-    df_plan['Datum_Tag'] = df_plan['Datum'].apply(lambda d: f"{'🟥 ' if d.weekday() >= 5 else ''}{d.strftime('%d.%m.%Y')} ({GERMAN_WEEKDAYS[d.weekday()]})")
-    
-    col_cfg = {"Datum": None} 
-    col_cfg['Datum_Tag'] = st.column_config.TextColumn(label="Datum", width="medium", disabled=True)
-
-    ordered_cols = ['Datum', 'Datum_Tag']
-    for slot in slots:
-        df_s = df_saved[(df_saved['MA_Slot']==slot) & (df_saved['Datum'] >= d_start) & (df_saved['Datum'] <= d_end)]
-        df_s = df_s.rename(columns={'Anfang':f'{slot}_Anfang','Ende':f'{slot}_Ende','Pause':f'{slot}_Pause','Mitarbeiter':f'{slot}_Mitarbeiter', 'Zeit':f'{slot}_Zeit'})
-        
-        has_content = False
-        if not df_s.empty:
-            if df_s[f'{slot}_Mitarbeiter'].notna().any() or (df_s[f'{slot}_Anfang'] > 0).any(): has_content = True
-            df_s[f'{slot}_Anfang'] = df_s[f'{slot}_Anfang'].apply(float_to_input_str)
-            df_s[f'{slot}_Ende'] = df_s[f'{slot}_Ende'].apply(float_to_input_str)
-            df_plan = df_plan.merge(df_s[['Datum', f'{slot}_Mitarbeiter', f'{slot}_Anfang', f'{slot}_Ende', f'{slot}_Pause', f'{slot}_Zeit']], on='Datum', how='left')
-        else:
-            for c in [f'{slot}_Mitarbeiter', f'{slot}_Anfang', f'{slot}_Ende', f'{slot}_Pause', f'{slot}_Zeit']: df_plan[c] = None
-        
-        bold_header = to_bold(slot)
-        width_ma = None if has_content else "small" 
-        width_time = "small"
-        col_cfg[f'{slot}_Mitarbeiter'] = st.column_config.SelectboxColumn(bold_header, options=MA_LIST, width=width_ma)
-        col_cfg[f'{slot}_Anfang'] = st.column_config.TextColumn("Von", width=width_time, help="18, 18:30")
-        col_cfg[f'{slot}_Ende'] = st.column_config.TextColumn("Bis", width=width_time)
-        col_cfg[f'{slot}_Pause'] = st.column_config.NumberColumn("Pause", format="%.1f", min_value=0.0, max_value=24.0, width="small")
-        col_cfg[f'{slot}_Zeit'] = st.column_config.NumberColumn("Zeit", format="%.2f", width="small", disabled=True)
-        ordered_cols.extend([f'{slot}_Mitarbeiter', f'{slot}_Anfang', f'{slot}_Ende', f'{slot}_Pause', f'{slot}_Zeit'])
+    with profil.phase('raster'):
+        df_plan, has_content = plan_raster(df_grid, obj, slots, d_start, d_end, gespeichert)
+        col_cfg, ordered_cols = plan_column_config(slots, has_content, MA_LIST)
 
     st.markdown("---")
-    with st.form("planning_form"):
+    with profil.phase('anzeigen'), st.form("planning_form"):
         edited = st.data_editor(df_plan[ordered_cols], column_config=col_cfg, height=700, use_container_width=True, hide_index=True)
         submit_btn = st.form_submit_button("💾 Plan Speichern", type="primary")
     
-    # CSV Export Button for German Excel
+    # CSV Export Button for German Excel – die Datei entsteht erst beim Klick
     st.markdown("### Export")
-    
-    # Gesamstunden für Export berechnen
-    mask_export = (df_saved['Datum'] >= d_start) & (df_saved['Datum'] <= d_end)
-    total_hours_export = df_saved.loc[mask_export, 'Zeit'].sum()
-    formatted_total = format_duration_str(total_hours_export)
-    
-    csv_string = df_plan.to_csv(sep=';', index=False)
-    csv_string += f"\n;Gesamtstunden (Monat):;{formatted_total}"
-    
+    total_hours_export = df_saved['Zeit'].sum()
     st.download_button(
         label="📥 Download als CSV für Excel",
-        data=csv_string.encode('utf-8-sig'),
+        data=lambda: export.plan_csv(df_plan, total_hours_export),
         file_name=f"Einsatzplan_{obj}_{selected_month_str}.csv",
-        mime="text/csv"
+        mime="text/csv",
+        on_click="ignore"
     )
     
-    error_messages = []
     if submit_btn:
-        load_einsaetze_for_object.clear(); rows=[]; total=0.0
-        for idx, row in edited.iterrows():
-            d = df_plan.loc[idx, 'Datum']
-            if isinstance(d, str):
-                 try: d = datetime.strptime(d, DATE_FORMAT).date()
-                 except: pass
-            for s in slots:
-                ma = safe_get_value(row[f'{s}_Mitarbeiter'])
-                a_float = parse_user_time(row[f'{s}_Anfang'])
-                e_float = parse_user_time(row[f'{s}_Ende'])
-                p = safe_get_value(row[f'{s}_Pause']) or 0.0
-                if ma or a_float>0 or e_float>0:
-                    if ma:
-                        val, msg = validate_einsatz(df_uk, ma, d)
-                        if not val: error_messages.append(f"{d.strftime('%d.%m.%Y')} - {ma}: {msg}")
-                        is_double, dbl_msg = check_double_booking(conn, ma, d, a_float, e_float, obj)
-                        if is_double: error_messages.append(f"{d.strftime('%d.%m.%Y')} - {ma}: ❌ {dbl_msg}")
-                    t = calculate_arbeitszeit(a_float, e_float, p)
-                    total += t
-                    rows.append({'Datum':d.strftime(DATE_FORMAT), 'Objekt':obj, 'MA_Slot':s, 'Anfang':a_float, 'Ende':e_float, 'Pause':p, 'Mitarbeiter':ma, 'Zeit':t})
-        if error_messages:
-            for err in error_messages: st.error(err)
-            st.warning("❌ Speichern abgebrochen aufgrund von Konflikten. Bitte korrigieren.")
-        else:
-            try:
-                if rows: save_einsaetze_to_db(conn, pd.DataFrame(rows), obj, d_start, d_end); st.success(f"Gespeichert! Total: {format_duration_str(total)}")
-                else: st.info("Keine Einträge im aktuellen Monat.")
-                time.sleep(1); st.rerun()
-            except Exception as e: st.error(f"Fehler: {e}")
+        df_rows = collect_plan_rows(edited, df_plan, obj, slots)
+        pruefen_und_speichern(conn, df_rows, df_saved, [obj], d_start, d_end)
     
-    mask = (df_saved['Datum'] >= d_start) & (df_saved['Datum'] <= d_end)
-    df_period = df_saved.loc[mask]
+    df_period = df_saved
     if not df_period.empty:
         sums = df_period.groupby('MA_Slot')['Zeit'].sum().reindex(slots, fill_value=0.0)
         sums_formatted = sums.apply(format_duration_str)
@@ -684,166 +783,74 @@ def seite_einsatzplanung(conn, df_loc, df_uk, MA_LIST):
         st.markdown("#### Monatsauswertung")
         st.dataframe(df_sum, use_container_width=True, hide_index=True)
 
-# --- NEUE FUNKTION: Aggregierte Daten für Auswertung laden ---
-@st.cache_data(ttl=5)
-def load_aggregated_data(_conn, selected_month_str):
-    query_einsaetze = "SELECT Mitarbeiter, Zeit, Datum, Objekt, MA_Slot, Anfang, Ende, Pause FROM einsaetze WHERE Mitarbeiter != ''"
-    df_einsaetze = pd.read_sql(query_einsaetze, _conn)
-    query_uk = "SELECT Mitarbeiter, Status, Datum FROM urlaub_krank"
-    df_uk = pd.read_sql(query_uk, _conn)
-    for df in [df_einsaetze, df_uk]:
-        if not df.empty:
-            df['Datum'] = pd.to_datetime(df['Datum'])
-            df['Monat'] = df['Datum'].dt.to_period('M').astype(str)
-    df_e_monat = df_einsaetze[df_einsaetze['Monat'] == selected_month_str] if not df_einsaetze.empty else pd.DataFrame()
-    df_uk_monat = df_uk[df_uk['Monat'] == selected_month_str] if not df_uk.empty else pd.DataFrame()
-    return df_e_monat, df_uk_monat
-
-def format_month_display(yyyy_mm):
-    y, m = yyyy_mm.split('-')
-    return f"{GERMAN_MONTHS[int(m)-1]} {y}"
+def seite_einsatzplanung_mehrere(conn, objekte, loc_info, df_saved, df_grid, d_start, d_end, selected_month_str, MA_LIST, gespeichert=False):
+    """Mehrere Objekte eines Monats nebeneinander (ein Tab je Objekt), ein Formular, ein Speichervorgang."""
+    st.subheader(f"Plan: {len(objekte)} Objekte - {selected_month_str}")
+    saved_by_obj = dict(tuple(df_grid.groupby('Objekt'))) if not df_grid.empty else {}
+    leer = df_grid.iloc[0:0]
+    grids = {}
+    with st.form("planning_form_multi"):
+        tabs = st.tabs([f"{obj} ({format_duration_str(saved_by_obj[obj]['Zeit'].sum())})" if obj in saved_by_obj else obj for obj in objekte])
+        for tab, obj in zip(tabs, objekte):
+            slots = loc_info.loc[obj, MA_SLOT_COLUMN_NAME]
+            with profil.phase('raster'):
+                df_plan, has_content = plan_raster(saved_by_obj.get(obj, leer), obj, slots, d_start, d_end, gespeichert)
+                col_cfg, ordered_cols = plan_column_config(slots, has_content, MA_LIST)
+            with profil.phase('anzeigen'), tab:
+                edited = st.data_editor(df_plan[ordered_cols], column_config=col_cfg, height=700, use_container_width=True, hide_index=True, key=f"plan_multi_{obj}_{st.session_state.get('plan_editor_nr', 0)}")
+            grids[obj] = (edited, df_plan, slots)
+        submit_btn = st.form_submit_button("💾 Alle Pläne speichern", type="primary")
+
+    if submit_btn:
+        df_rows = pd.concat([collect_plan_rows(edited, df_plan, obj, slots) for obj, (edited, df_plan, slots) in grids.items()], ignore_index=True)
+        pruefen_und_speichern(conn, df_rows, df_saved, objekte, d_start, d_end)
 
+# --- AUSWERTUNG ---
 def seite_mitarbeiter_uebersicht(conn):
     st.header("Auswertung")
-    df_e_raw = pd.read_sql("SELECT Datum FROM einsaetze", conn)
-    df_uk_raw = pd.read_sql("SELECT Datum FROM urlaub_krank", conn)
-    all_dates = pd.concat([pd.to_datetime(df_e_raw['Datum']), pd.to_datetime(df_uk_raw['Datum'])]).dropna()
-    if all_dates.empty: st.info("Keine Daten vorhanden."); return
+    available_months = load_month_catalogue(conn, table_version('monatskatalog'))
+    if not available_months: st.info("Keine Daten vorhanden."); return
     
-    available_months = sorted(all_dates.dt.to_period('M').astype(str).unique(), reverse=True)
     monat = st.selectbox("Monat", available_months, format_func=format_month_display)
     
-    df_work, df_absense = load_aggregated_data(conn, monat)
-    
-    # Vorbereitung der Daten für detaillierte Übersicht (immer berechnen)
-    y_str, m_str = monat.split('-')
-    year = int(y_str)
-    month = int(m_str)
-    start_date = date(year, month, 1)
-    end_date = (pd.to_datetime(start_date) + relativedelta(months=1, days=-1)).date()
-    date_rng = pd.date_range(start_date, end_date)
-    
-    all_employees = sorted(load_data_from_db(conn, 'mitarbeiter_verzeichnis')['Mitarbeitername'].unique().tolist())
+    with profil.phase('laden'):
+        (df_work, df_absense), df_stat = gleichzeitig(conn, lambda c: load_aggregated_data(c, monat, table_version('einsaetze'), table_version('urlaub_krank')),
+                                                      lambda c: load_mitarbeiter_monat(c, monat, table_version('mitarbeiter_monat')))
     
-    # Cross Join: Alle Tage x Alle Mitarbeiter
-    df_dates = pd.DataFrame({'Datum_Obj': date_rng})
-    df_dates['Datum'] = df_dates['Datum_Obj'].dt.strftime('%Y-%m-%d')
-    df_dates['Wochentag'] = df_dates['Datum_Obj'].apply(lambda x: GERMAN_WEEKDAYS[x.weekday()])
-    df_users = pd.DataFrame({'Mitarbeiter': all_employees})
-    df_full = df_dates.merge(df_users, how='cross')
-    
-    # Daten vorbereiten
-    if not df_work.empty:
-        df_work_merge = df_work.copy()
-        df_work_merge['Datum'] = df_work_merge['Datum'].dt.strftime('%Y-%m-%d')
-        df_work_merge = df_work_merge[['Datum', 'Mitarbeiter', 'Objekt', 'MA_Slot', 'Anfang', 'Ende', 'Pause', 'Zeit']]
-    else:
-        df_work_merge = pd.DataFrame(columns=['Datum', 'Mitarbeiter', 'Objekt', 'MA_Slot', 'Anfang', 'Ende', 'Pause', 'Zeit'])
-        
-    if not df_absense.empty:
-        df_absense_merge = df_absense.copy()
-        df_absense_merge['Datum'] = df_absense_merge['Datum'].dt.strftime('%Y-%m-%d')
-        df_absense_merge = df_absense_merge[['Datum', 'Mitarbeiter', 'Status']]
-    else:
-        df_absense_merge = pd.DataFrame(columns=['Datum', 'Mitarbeiter', 'Status'])
-    
-    # Mergen
-    df_merged = pd.merge(df_full, df_work_merge, on=['Datum', 'Mitarbeiter'], how='left')
-    df_merged = pd.merge(df_merged, df_absense_merge, on=['Datum', 'Mitarbeiter'], how='left')
-    
-    rows = []
-    for _, row in df_merged.iterrows():
-        d_obj = datetime.strptime(row['Datum'], '%Y-%m-%d')
-        datum_display = d_obj.strftime('%d.%m.%Y')
-        prefix = "🟥 " if d_obj.weekday() >= 5 else ""
-        datum_full = f"{prefix}{datum_display} ({row['Wochentag']})"
-        
-        if pd.notna(row['Objekt']):
-            typ = "Arbeit"
-            einteilung = f"{row['Objekt']} ({row['MA_Slot']})"
-            von = float_to_input_str(row['Anfang'])
-            bis = float_to_input_str(row['Ende'])
-            pause = f"{row['Pause']:.2f}" if pd.notna(row['Pause']) else "-"
-            dauer = format_duration_str(row['Zeit'])
-        elif pd.notna(row['Status']):
-            typ = row['Status']
-            einteilung = "-"
-            von = "-"
-            bis = "-"
-            pause = "-"
-            dauer = "Tag"
-        else:
-            typ = "-"
-            einteilung = "-"
-            von = "-"
-            bis = "-"
-            pause = "-"
-            dauer = "-"
-        
-        rows.append({
-            "Datum": row['Datum_Obj'], 
-            "Datum_Anzeige": datum_full,
-            "Name": row['Mitarbeiter'],
-            "Typ": typ,
-            "Einteilung": einteilung,
-            "Von": von,
-            "Bis": bis,
-            "Pause": pause,
-            "Dauer": dauer
-        })
-        
-    df_all = pd.DataFrame(rows)
-    df_all = df_all.sort_values(by=['Datum', 'Name'])
+    start_date, end_date = month_bounds(monat)
+    all_employees = sorted(load_table(conn, 'mitarbeiter_verzeichnis')['Mitarbeitername'].unique().tolist())
 
     st.subheader(f"Übersicht für {format_month_display(monat)}")
     
-    # Filter-Optionen für die Hauptansicht
+    # Filter-Optionen für die Hauptansicht – werden vor dem Aufbau der Tabelle angewendet
     c_filter1, c_filter2 = st.columns(2)
     sel_ma = c_filter1.selectbox("Mitarbeiter filtern:", ["ALLE MITARBEITER"] + all_employees)
     filter_free = c_filter2.checkbox("Nur Verfügbare (-) anzeigen")
     
-    # Filtern
-    df_view = df_all.copy()
-    if sel_ma != "ALLE MITARBEITER":
-        df_view = df_view[df_view['Name'] == sel_ma]
-    
-    if filter_free:
-        df_view = df_view[df_view['Typ'] == "-"]
-
-    st.dataframe(
-        df_view[['Datum_Anzeige', 'Name', 'Typ', 'Einteilung', 'Von', 'Bis', 'Pause', 'Dauer']], 
-        hide_index=True, 
-        use_container_width=True,
-        column_config={"Datum_Anzeige": st.column_config.TextColumn("Datum")}
-    )
+    employees = all_employees if sel_ma == "ALLE MITARBEITER" else [sel_ma]
+    with profil.phase('aufbau'): df_view = build_uebersicht(df_work, df_absense, employees, start_date, end_date, nur_verfuegbar=filter_free)
+
+    with profil.phase('anzeigen'):
+        st.dataframe(
+            df_view[['Datum_Anzeige', 'Name', 'Typ', 'Einteilung', 'Von', 'Bis', 'Pause', 'Dauer']], 
+            hide_index=True, 
+            use_container_width=True,
+            column_config={"Datum_Anzeige": st.column_config.TextColumn("Datum")}
+        )
     
     st.divider()
     
     # Kleine Statistik-Tabelle (ehemals Hauptansicht)
     with st.expander("Statistik (Stunden & Abwesenheit)"):
-        # Aggregation Arbeitszeit
-        res_work = pd.DataFrame()
-        if not df_work.empty:
-            res_work = df_work.groupby('Mitarbeiter')['Zeit'].sum().reset_index()
-            res_work.rename(columns={'Zeit': 'Arbeitsstunden'}, inplace=True)
-            res_work['Arbeitszeit_Format'] = res_work['Arbeitsstunden'].apply(format_duration_str)
-
-        res_absense = pd.DataFrame()
-        if not df_absense.empty:
-            res_absense = df_absense.groupby(['Mitarbeiter', 'Status']).size().unstack(fill_value=0).reset_index()
-            
-        if not res_work.empty or not res_absense.empty:
-            if not res_work.empty and not res_absense.empty:
-                df_final = pd.merge(res_work, res_absense, on='Mitarbeiter', how='outer')
-            elif not res_work.empty:
-                df_final = res_work
-            else:
-                df_final = res_absense
-            df_final = df_final.fillna(0)
-            
-            if 'Arbeitszeit_Format' not in df_final.columns: df_final['Arbeitszeit_Format'] = "0 Std 0 Min"
+        # Vorberechnetes Monatsaggregat (wird beim Speichern aktualisiert), oben mitgeladen
+        if not df_stat.empty:
+            df_final = df_stat.pivot_table(index='Mitarbeiter', columns='Art', values='Wert', aggfunc='sum', fill_value=0).reset_index()
+            df_final.columns.name = None
+            if ART_ARBEITSSTUNDEN not in df_final.columns: df_final[ART_ARBEITSSTUNDEN] = 0.0
+            df_final['Arbeitszeit_Format'] = df_final[ART_ARBEITSSTUNDEN].apply(format_duration_str)
             cols = ['Mitarbeiter', 'Arbeitszeit_Format']
-            status_cols = [c for c in df_final.columns if c not in ['Mitarbeiter', 'Arbeitsstunden', 'Arbeitszeit_Format']]
+            status_cols = [c for c in df_final.columns if c not in ['Mitarbeiter', ART_ARBEITSSTUNDEN, 'Arbeitszeit_Format']]
+            df_final[status_cols] = df_final[status_cols].astype(int)
             cols.extend(status_cols)
             
             st.dataframe(df_final[cols], use_container_width=True, hide_index=True)
@@ -854,24 +861,45 @@ def seite_mitarbeiter_uebersicht(conn):
 
 # LOGIN CHECK START
 if check_login():
-    conn = get_db_connection()
-    if os.path.exists(LOGO_PATH):
-        st.sidebar.image(LOGO_PATH, use_container_width=True)
-    st.sidebar.write(f"Angemeldet als: **{st.session_state.get('username', 'User')}**")
-    if st.sidebar.button("Logout"):
-        logout()
-
-    MA_LIST = [""] + load_data_from_db(conn, 'mitarbeiter_verzeichnis')['Mitarbeitername'].unique().tolist()
-    
-    # ROLLE PRÜFEN
-    role = st.session_state.get('role', 'mitarbeiter') # Fallback to mitarbeiter if undefined
-    
-    if role == 'admin':
-        pg = st.sidebar.radio("Menü", ["Einsatzplanung", "Auswertung", "Stammdaten"])
-        if pg == "Einsatzplanung": seite_einsatzplanung(conn, load_data_from_db(conn, 'locations_spalte'), load_data_from_db(conn, 'urlaub_krank'), MA_LIST)
-        elif pg == "Auswertung": seite_mitarbeiter_uebersicht(conn)
-        elif pg == "Stammdaten": seite_stammdaten_verwaltung(conn)
-    else:
-        # Menü für normale Mitarbeiter
-        st.sidebar.info("Eingeschränkte Ansicht für Mitarbeiter")
-        seite_mein_plan(conn, st.session_state.get('username'))
+    lauf = profil.starten(st.session_state.get('username', '?')) if profiling_aktiv() else None
+    try:
+        # Eine Verbindung aus dem Pool pro Rerun, wird am Ende (auch bei st.rerun/st.stop) zurückgegeben
+        with get_db_connection() as conn:
+            if os.path.exists(LOGO_PATH):
+                st.sidebar.image(LOGO_PATH, use_container_width=True)
+            st.sidebar.write(f"Angemeldet als: **{st.session_state.get('username', 'User')}**")
+            if st.sidebar.button("Logout"):
+                logout()
+
+            # ROLLE PRÜFEN
+            role = st.session_state.get('role', 'mitarbeiter') # Fallback to mitarbeiter if undefined
+
+            with profil.phase('stammdaten'):
+                # Versionen zuerst (Cache-Schlüssel), dann Mitarbeiter und Standorte gleichzeitig
+                refresh_table_versions(conn)
+                aufgaben = [lambda c: load_table(c, 'mitarbeiter_verzeichnis')]
+                if role == 'admin': aufgaben.append(lambda c: load_standorte(c, table_version('standorte')))
+                df_ma, *df_loc = gleichzeitig(conn, *aufgaben)
+                MA_LIST = [""] + df_ma['Mitarbeitername'].unique().tolist()
+        
+            if role == 'admin':
+                pg = st.sidebar.radio("Menü", ["Einsatzplanung", "Auswertung", "Stammdaten"])
+                if pg == "Einsatzplanung": seite_einsatzplanung(conn, df_loc[0], MA_LIST)
+                elif pg == "Auswertung": seite_mitarbeiter_uebersicht(conn)
+                elif pg == "Stammdaten": seite_stammdaten_verwaltung(conn)
+                with st.sidebar.expander("DB-Pool"):
+                    ps = get_db_pool().stats()
+                    st.caption(f"In Benutzung: {ps['in_use']}/{ps['size']} · Frei: {ps['idle']} · Wartevorgänge: {ps['waits']} · Reconnects: {ps['reconnects']} · Aufgebaut: {ps['created']}")
+                    if (vorwaermer := get_vorwaermer()) is not None and (vs := vorwaermer.stats)['letzte_runde']:
+                        st.caption(f"Vorwärmen: {vs['runden']} Runden · zuletzt {datetime.fromtimestamp(vs['letzte_runde']):%H:%M:%S} ({vs['dauer_ms']:.0f} ms) · "
+                                   f"Aufgaben: {vs['aufgaben']} · Fehler: {vs['fehler']} · Abgebrochen: {vs['abgebrochen']}")
+                profil_panel()
+            else:
+                # Menü für normale Mitarbeiter
+                st.sidebar.info("Eingeschränkte Ansicht für Mitarbeiter")
+                seite_mein_plan(conn, st.session_state.get('username'))
+    finally:
+        # Auch bei st.rerun (nach dem Speichern) festhalten – das Panel zeigt den abgeschlossenen Lauf
+        if lauf is not None:
+            st.session_state['profil_vorher'] = st.session_state.get('profil_letzter')
+            st.session_state['profil_letzter'] = profil.beenden(lauf)
@@ -0,0 +1,81 @@
+"""
+Benchmark: Aufbau des Einsatzplanungs-Rasters in Abhängigkeit der Slot-Anzahl.
+
+Vergleicht den früheren Aufbau (ein Merge pro Slot) mit build_plan_grid()
+(ein Pivot über Datum x MA_Slot). Aufruf aus dem Projektverzeichnis:
+
+    python benchmarks/bench_plan_grid.py [--slots 5 10 20 40 80] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from acp import planung, zeit  # noqa: E402
+
+
+def legacy_grid(df_saved, slots, d_start, d_end):
+    """Bisheriger Aufbau aus seite_einsatzplanung (Referenz)."""
+    rng = pd.date_range(d_start, d_end).normalize().date
+    df_plan = pd.DataFrame({'Datum': rng})
+    df_plan['Datum_Tag'] = df_plan['Datum'].apply(lambda d: f"{'🟥 ' if d.weekday() >= 5 else ''}{d.strftime('%d.%m.%Y')} ({zeit.GERMAN_WEEKDAYS[d.weekday()]})")
+    for slot in slots:
+        df_s = df_saved[(df_saved['MA_Slot'] == slot) & (df_saved['Datum'] >= d_start) & (df_saved['Datum'] <= d_end)]
+        df_s = df_s.rename(columns={'Anfang': f'{slot}_Anfang', 'Ende': f'{slot}_Ende', 'Pause': f'{slot}_Pause', 'Mitarbeiter': f'{slot}_Mitarbeiter', 'Zeit': f'{slot}_Zeit'})
+        if not df_s.empty:
+            df_s[f'{slot}_Anfang'] = df_s[f'{slot}_Anfang'].apply(zeit.float_to_input_str)
+            df_s[f'{slot}_Ende'] = df_s[f'{slot}_Ende'].apply(zeit.float_to_input_str)
+            df_plan = df_plan.merge(df_s[['Datum', f'{slot}_Mitarbeiter', f'{slot}_Anfang', f'{slot}_Ende', f'{slot}_Pause', f'{slot}_Zeit']], on='Datum', how='left')
+        else:
+            for c in [f'{slot}_Mitarbeiter', f'{slot}_Anfang', f'{slot}_Ende', f'{slot}_Pause', f'{slot}_Zeit']: df_plan[c] = None
+    return df_plan
+
+
+def synthetic_object(n_slots, months=24, seed=0):
+    """Einsatzhistorie eines Objekts: jeder Slot an ~80 % der Tage besetzt."""
+    rs = np.random.default_rng(seed)
+    tage = pd.date_range(date(2024, 1, 1), periods=months * 31).date
+    slots = [f"MA{i}" for i in range(1, n_slots + 1)]
+    datum = np.repeat(tage, n_slots)
+    slot = np.tile(slots, len(tage))
+    keep = rs.random(len(datum)) < 0.8
+    n = int(keep.sum())
+    anfang = rs.integers(0, 48, n) / 48
+    ende = rs.integers(0, 48, n) / 48
+    df = pd.DataFrame({
+        'EinsatzID': np.arange(n), 'Datum': datum[keep], 'Objekt': 'Benchmark', 'MA_Slot': slot[keep],
+        'Anfang': anfang, 'Ende': ende, 'Pause': 0.5, 'Mitarbeiter': rs.choice([f"MA {i}" for i in range(200)], n),
+        'Zeit': [zeit.calculate_arbeitszeit(a, e, 0.5) for a, e in zip(anfang, ende)],
+    })
+    return df, slots
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--slots', type=int, nargs='+', default=[5, 10, 20, 40, 80])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    d_start, d_end = date(2025, 3, 1), date(2025, 3, 31)
+    print(f"{'Slots':>6} {'Merge/Slot [ms]':>16} {'Pivot [ms]':>11} {'Faktor':>7}")
+    for n_slots in args.slots:
+        df_saved, slots = synthetic_object(n_slots)
+        t_old = best_of(lambda: legacy_grid(df_saved, slots, d_start, d_end), args.repeat)
+        t_new = best_of(lambda: planung.build_plan_grid(df_saved, slots, d_start, d_end), args.repeat)
+        print(f"{n_slots:>6} {t_old * 1000:>16.1f} {t_new * 1000:>11.1f} {t_old / t_new:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
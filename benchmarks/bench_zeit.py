@@ -0,0 +1,71 @@
+"""
+Micro-Benchmark: Zeit-Codec spaltenweise (NumPy, ganze Minuten) gegen die skalaren Helfer.
+
+Misst Parsen der Eingaben ("18", "18:30", "1830", "18,5"), Formatieren von Anfang/Ende
+und Dauer sowie die Arbeitszeitberechnung – jeweils mit Prüfung, dass beide Wege dasselbe
+liefern. Aufruf aus dem Projektverzeichnis:
+
+    python benchmarks/bench_zeit.py [--n 1000 10000 100000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from acp import zeit  # noqa: E402
+
+
+def eingaben(n, seed=0):
+    """Gemischte Benutzereingaben wie im Raster, inkl. leerer Zellen."""
+    rs = np.random.default_rng(seed)
+    h = rs.integers(0, 24, n); m = rs.choice([0, 15, 30, 45], n)
+    form = rs.integers(0, 5, n)
+    werte = np.where(form == 0, h.astype(str),
+            np.where(form == 1, np.char.add(np.char.add(np.char.zfill(h.astype(str), 2), ':'), np.char.zfill(m.astype(str), 2)),
+            np.where(form == 2, np.char.add(h.astype(str), np.char.zfill(m.astype(str), 2)),
+            np.where(form == 3, np.char.add(np.char.add(h.astype(str), ','), (m // 15 * 25).astype(str)), ''))))
+    return pd.Series(werte.astype(object))
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'Messpunkt':<22} {'N':>8} {'Skalar [ms]':>12} {'Codec [ms]':>11} {'Faktor':>7}")
+    for n in args.n:
+        s = eingaben(n)
+        anfang = zeit.parse_time_series(s)
+        ende = zeit.parse_time_series(eingaben(n, seed=1))
+        pause = np.random.default_rng(2).integers(0, 5, n) * 0.25
+        dauer = zeit.calculate_arbeitszeit_series(anfang, ende, pause)
+
+        faelle = {
+            'parsen': (lambda: [zeit.parse_user_time(v) for v in s], lambda: zeit.parse_time_series(s)),
+            'format Anfang': (lambda: pd.Series(anfang).apply(zeit.float_to_input_str), lambda: zeit.format_time_series(anfang)),
+            'format Dauer': (lambda: pd.Series(dauer).apply(zeit.format_duration_str), lambda: zeit.format_duration_series(dauer)),
+            'arbeitszeit': (lambda: [zeit.calculate_arbeitszeit(a, e, p) for a, e, p in zip(anfang, ende, pause)],
+                            lambda: zeit.calculate_arbeitszeit_series(anfang, ende, pause)),
+        }
+        for name, (skalar, codec) in faelle.items():
+            alt = np.asarray(list(skalar())); neu = np.asarray(codec())
+            gleich = np.allclose(alt, neu) if alt.dtype.kind == 'f' else (alt == neu).all()
+            if not gleich: raise SystemExit(f"Abweichung bei '{name}' (N={n})")
+            t_alt = best_of(skalar, args.repeat); t_neu = best_of(codec, args.repeat)
+            print(f"{name:<22} {n:>8} {t_alt * 1000:>12.1f} {t_neu * 1000:>11.1f} {t_alt / t_neu:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Synthetische Daten für Benchmarks: N Mitarbeiter, M Objekte mit je K Slots,
+Y Jahre Einsätze und Abwesenheiten – reproduzierbar über den Seed.
+
+Jeder Slot hat eine feste Schicht (Früh/Spät/Nacht), ein Mitarbeiter ist pro Tag
+höchstens einmal eingeteilt; Konflikte entstehen nur durch Abwesenheiten.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from acp.db import ART_ARBEITSSTUNDEN
+from acp.planung import expand_abwesenheiten
+from acp.zeit import DATE_FORMAT
+
+# (Anfang, Ende) als Tagesbruchteil: 06-14, 14-22, 22-06
+SCHICHTEN = [(6 / 24, 14 / 24), (14 / 24, 22 / 24), (22 / 24, 6 / 24)]
+STATUS = ["Urlaub", "Krank", "Ausfall", "Standby"]
+
+def generate(conn, n_mitarbeiter=200, n_objekte=30, k_slots=5, jahre=3, besetzung=0.8, seed=0, ende=None):
+    """Tabellen befüllen; liefert die Kennzahlen der erzeugten Daten."""
+    rs = np.random.default_rng(seed)
+    ende = ende or date(date.today().year, 12, 31)
+    start = date(ende.year - jahre + 1, 1, 1)
+    tage = pd.date_range(start, ende)
+    mitarbeiter = [f"Mitarbeiter {i:04d}" for i in range(n_mitarbeiter)]
+    objekte = [f"Objekt {i:03d}" for i in range(n_objekte)]
+    slots = [f"MA{i}" for i in range(1, k_slots + 1)]
+    cursor = conn.cursor()
+
+    cursor.executemany("INSERT INTO mitarbeiter_verzeichnis (Mitarbeitername, Personalnummer, Vertrag_bis, Ausweis_gueltig_bis) VALUES (%s, %s, %s, %s)",
+                       [(m, str(10000 + i), f"{ende.year + 2}-12-31", f"{ende.year + 2}-12-31") for i, m in enumerate(mitarbeiter)])
+    cursor.executemany("INSERT INTO standorte (Name, Region) VALUES (%s, %s)", [(o, f"Region {i % 4 + 1}") for i, o in enumerate(objekte)])
+    cursor.execute("SELECT ID FROM standorte ORDER BY ID")
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.executemany("INSERT INTO standort_slots (StandortID, MA_Slot) VALUES (%s, %s)", [(i, s) for i in ids for s in slots])
+
+    # Einsätze: pro Tag alle Zellen (Objekt x Slot), ~besetzung davon belegt, Mitarbeiter ohne Wiederholung je Tag
+    zellen = n_objekte * k_slots
+    obj_idx = np.repeat(np.arange(n_objekte), k_slots)
+    slot_idx = np.tile(np.arange(k_slots), n_objekte)
+    teile = []
+    for tag in tage:
+        belegt = np.flatnonzero(rs.random(zellen) < besetzung)
+        n = min(len(belegt), n_mitarbeiter)
+        belegt = belegt[:n]
+        teile.append(pd.DataFrame({'Datum': tag.strftime(DATE_FORMAT), 'o': obj_idx[belegt], 's': slot_idx[belegt],
+                                   'm': rs.permutation(n_mitarbeiter)[:n]}))
+    df = pd.concat(teile, ignore_index=True)
+    schicht = df['s'].to_numpy() % len(SCHICHTEN)
+    anfang = np.array([a for a, _ in SCHICHTEN])[schicht]
+    ende_t = np.array([e for _, e in SCHICHTEN])[schicht]
+    pause = 0.5
+    dauer = np.where(ende_t < anfang, ende_t + 1.0, ende_t) - anfang
+    df = pd.DataFrame({
+        'Datum': df['Datum'], 'Objekt': np.array(objekte, dtype=object)[df['o']], 'MA_Slot': np.array(slots, dtype=object)[df['s']],
+        'Anfang': anfang, 'Ende': ende_t, 'Pause': pause, 'Mitarbeiter': np.array(mitarbeiter, dtype=object)[df['m']],
+        'Zeit': 24.0 * (dauer - pause / 24.0),
+    })
+    cursor.executemany("INSERT INTO einsaetze (Datum, Objekt, MA_Slot, Anfang, Ende, Pause, Mitarbeiter, Zeit) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                       list(df.itertuples(index=False, name=None)))
+
+    # Abwesenheiten: ~4 Zeiträume pro Mitarbeiter und Jahr, 1-14 Tage
+    n_uk = n_mitarbeiter * jahre * 4
+    von = pd.Series(rs.choice(tage, n_uk))
+    bis = von + pd.to_timedelta(rs.integers(0, 14, n_uk), unit='D')
+    df_uk = pd.DataFrame({'Mitarbeiter': rs.choice(mitarbeiter, n_uk), 'Von': von, 'Bis': bis.clip(upper=pd.Timestamp(ende)),
+                          'Status': rs.choice(STATUS, n_uk, p=[0.6, 0.25, 0.1, 0.05])})
+    # Überlappungen pro Mitarbeiter vermeiden (wie save_abwesenheit sie auflösen würde)
+    df_uk = df_uk.sort_values(['Mitarbeiter', 'Von'])
+    vorher_bis = df_uk.groupby('Mitarbeiter')['Bis'].transform(lambda s: s.cummax().shift())
+    df_uk = df_uk[vorher_bis.isna() | (df_uk['Von'] > vorher_bis)]
+    cursor.executemany("INSERT INTO urlaub_krank (Mitarbeiter, Von, Bis, Status) VALUES (%s, %s, %s, %s)",
+                       [(m, v.strftime(DATE_FORMAT), b.strftime(DATE_FORMAT), s) for m, v, b, s in df_uk.itertuples(index=False, name=None)])
+
+    # Vorberechnete Aggregate wie nach den Migrationen
+    monat = df['Datum'].str[:7]
+    std = df.groupby([monat, df['Mitarbeiter']])['Zeit'].sum()
+    rows = [(mo, ma, ART_ARBEITSSTUNDEN, float(w)) for (mo, ma), w in std.items()]
+    uk_tage = expand_abwesenheiten(df_uk, start, ende)
+    uk_tage['Datum'] = uk_tage['Datum'].dt.strftime('%Y-%m')
+    abw = uk_tage.groupby(['Datum', 'Mitarbeiter', 'Status']).size()
+    rows += [(mo, ma, st, float(n)) for (mo, ma, st), n in abw.items()]
+    cursor.executemany("INSERT INTO mitarbeiter_monat (Monat, Mitarbeiter, Art, Wert) VALUES (%s, %s, %s, %s)", rows)
+    monate = sorted(set(monat) | set(uk_tage['Datum']))
+    cursor.executemany("INSERT INTO monatskatalog (Monat) VALUES (%s)", [(m,) for m in monate])
+    conn.commit()
+    cursor.close()
+    return {'mitarbeiter': mitarbeiter, 'objekte': objekte, 'slots': slots, 'start': start, 'ende': ende,
+            'einsaetze': len(df), 'abwesenheiten': len(df_uk), 'monate': len(monate)}
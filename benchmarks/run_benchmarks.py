@@ -0,0 +1,170 @@
+"""
+Benchmark-Suite der Einsatzplanung gegen einen lokalen SQLite-Ersatz (benchmarks/standin.py).
+
+Erzeugt N Mitarbeiter, M Objekte mit je K Slots und Y Jahre Historie (benchmarks/datengenerator.py)
+und misst die heißen Pfade: Plan laden/aufbauen/speichern (inkl. Prüfungen), Auswertung,
+Monatskatalog und "Mein Plan". Aufruf aus dem Projektverzeichnis:
+
+    python benchmarks/run_benchmarks.py [--mitarbeiter 200] [--objekte 30] [--slots 5] [--jahre 3]
+                                        [--repeat 5] [--seed 0] [--output lauf.json] [--vergleich basis.json]
+
+Das Ergebnis ist JSON (Parameter, Umgebung, Zeiten je Messpunkt in ms). Mit --vergleich wird
+zusätzlich die Veränderung der Mediane gegenüber einem früheren Lauf ausgegeben.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from acp import auswertung, autoplanung, export, planung, stammdaten  # noqa: E402
+from acp.zeit import DATE_FORMAT, month_bounds, calculate_arbeitszeit_series  # noqa: E402
+
+import datengenerator  # noqa: E402
+import standin  # noqa: E402
+
+# pandas warnt bei jeder DBAPI-Verbindung, die kein SQLAlchemy ist – in der App genauso
+warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy')
+
+
+def messen(fn, repeat, vorher=None):
+    """Ein Aufwärmlauf, dann repeat Läufe; vorher() läuft jeweils ungemessen."""
+    if vorher: vorher()
+    fn()
+    zeiten = []
+    for _ in range(repeat):
+        if vorher: vorher()
+        t0 = time.perf_counter(); fn(); zeiten.append((time.perf_counter() - t0) * 1000)
+    return {'min_ms': round(min(zeiten), 3), 'median_ms': round(statistics.median(zeiten), 3),
+            'mean_ms': round(statistics.fmean(zeiten), 3), 'runs_ms': [round(z, 3) for z in zeiten]}
+
+
+def plan_zeilen(df_saved):
+    """Gespeicherter Stand -> Zeilen, wie sie seite_einsatzplanung beim Speichern sammelt."""
+    df = df_saved[['Datum', 'Objekt', 'MA_Slot', 'Anfang', 'Ende', 'Pause', 'Mitarbeiter', 'Zeit']].copy()
+    df['Datum'] = pd.to_datetime(df['Datum']).dt.strftime(DATE_FORMAT)
+    return df.reset_index(drop=True)
+
+
+def speichern(conn, df_rows, df_saved, objekte, d_start, d_end):
+    """Der Speicherpfad ohne UI: Abwesenheiten prüfen, Doppelbuchungen prüfen, differenziell speichern."""
+    df_uk = planung.expand_abwesenheiten(planung.fetch_abwesenheiten(conn, d_start, d_end), d_start, d_end)
+    planung.find_absence_conflicts(planung.build_absence_index(df_uk), df_rows)
+    planung.find_double_bookings(conn, df_rows, objekte)
+    return planung.save_einsaetze_to_db(conn, df_rows, df_saved, objekte, d_start, d_end)
+
+
+def git_stand():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+
+def suite(conn, daten, repeat, seed):
+    rs = np.random.default_rng(seed)
+    monat = daten['ende'].strftime('%Y-%m')
+    d_start, d_end = month_bounds(monat)
+    obj = daten['objekte'][0]
+    slots = daten['slots']
+    mehrere = tuple(daten['objekte'][:10])
+    ergebnisse = {}
+
+    ergebnisse['planung.laden'] = messen(lambda: planung.fetch_einsaetze_for_objects(conn, (obj,), d_start, d_end), repeat)
+    ergebnisse['planung.laden_10_objekte'] = messen(lambda: planung.fetch_einsaetze_for_objects(conn, mehrere, d_start, d_end), repeat)
+    df_saved = planung.fetch_einsaetze_for_objects(conn, (obj,), d_start, d_end)
+    ergebnisse['planung.raster'] = messen(lambda: planung.build_plan_grid(df_saved, slots, d_start, d_end), repeat)
+
+    # Speichern: abwechselnd ~10 % geänderte Pausen und der Originalstand, damit jeder Lauf echte Änderungen schreibt
+    original = plan_zeilen(df_saved)
+    geaendert = original.copy()
+    idx = rs.choice(len(geaendert), max(1, len(geaendert) // 10), replace=False)
+    geaendert.loc[idx, 'Pause'] = geaendert.loc[idx, 'Pause'] + 0.25
+    geaendert['Zeit'] = calculate_arbeitszeit_series(geaendert['Anfang'], geaendert['Ende'], geaendert['Pause'])
+    stand = {'ziel': 0, 'saved': None}
+    def vorher():
+        stand['saved'] = planung.fetch_einsaetze_for_objects(conn, (obj,), d_start, d_end)
+        stand['ziel'] ^= 1
+    ergebnisse['planung.speichern'] = messen(
+        lambda: speichern(conn, geaendert if stand['ziel'] else original, stand['saved'], [obj], d_start, d_end), repeat, vorher)
+
+    # Auto-Planen: 10 Objekte mit geleerter Besetzung (Zeiten bleiben), bestehende Einsätze zählen als belegt
+    leer = planung.fetch_einsaetze_for_objects(conn, mehrere, d_start, d_end).assign(Mitarbeiter=None)
+    slots_by_obj = {o: slots for o in mehrere}
+    ergebnisse['planung.autoplan_10_objekte'] = messen(lambda: autoplanung.vorschlag_erstellen(conn, leer, slots_by_obj, d_start, d_end), repeat)
+
+    ergebnisse['export.zip_monat_alle'] = messen(lambda: export.export_zip(conn, d_start, d_end).close(), repeat)
+
+    mitarbeiter = sorted(daten['mitarbeiter'])
+    def auswertung_seite():
+        df_work, df_abw = auswertung.fetch_aggregated_data(conn, monat)
+        auswertung.build_uebersicht(df_work, df_abw, mitarbeiter, d_start, d_end)
+    ergebnisse['auswertung.uebersicht'] = messen(auswertung_seite, repeat)
+    ergebnisse['auswertung.monatskatalog'] = messen(lambda: auswertung.fetch_month_catalogue(conn), repeat)
+    ergebnisse['auswertung.statistik'] = messen(lambda: auswertung.fetch_mitarbeiter_monat(conn, monat), repeat)
+
+    ma = daten['mitarbeiter'][0]
+    ergebnisse['mein_plan'] = messen(lambda: planung.build_mein_plan(planung.fetch_mein_plan(conn, ma, d_start, d_end)), repeat)
+    ergebnisse['stammdaten.standorte'] = messen(lambda: stammdaten.fetch_standorte(conn), repeat)
+    return ergebnisse
+
+
+def vergleich(basis, aktuell):
+    zeilen = [f"{'Messpunkt':<28} {'Basis [ms]':>11} {'Aktuell [ms]':>13} {'Faktor':>7}"]
+    for name, r in aktuell['ergebnisse'].items():
+        alt = basis.get('ergebnisse', {}).get(name)
+        if not alt: zeilen.append(f"{name:<28} {'-':>11} {r['median_ms']:>13.2f} {'neu':>7}"); continue
+        zeilen.append(f"{name:<28} {alt['median_ms']:>11.2f} {r['median_ms']:>13.2f} {r['median_ms'] / alt['median_ms']:>7.2f}")
+    return '\n'.join(zeilen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mitarbeiter', type=int, default=200)
+    parser.add_argument('--objekte', type=int, default=30)
+    parser.add_argument('--slots', type=int, default=5)
+    parser.add_argument('--jahre', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON-Datei statt Ausgabe auf stdout")
+    parser.add_argument('--vergleich', help="Früheres JSON-Ergebnis zum Vergleich")
+    args = parser.parse_args()
+
+    conn = standin.Connection()
+    standin.create_schema(conn)
+    t0 = time.perf_counter()
+    daten = datengenerator.generate(conn, args.mitarbeiter, args.objekte, args.slots, args.jahre, seed=args.seed)
+    erzeugung = time.perf_counter() - t0
+
+    ergebnis = {
+        'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+        'git': git_stand(),
+        'umgebung': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                     'plattform': platform.platform(), 'datenbank': 'sqlite ' + standin.sqlite3.sqlite_version},
+        'parameter': {k: getattr(args, k) for k in ['mitarbeiter', 'objekte', 'slots', 'jahre', 'repeat', 'seed']},
+        'daten': {'einsaetze': daten['einsaetze'], 'abwesenheiten': daten['abwesenheiten'], 'monate': daten['monate'],
+                  'erzeugung_s': round(erzeugung, 2)},
+        'ergebnisse': suite(conn, daten, args.repeat, args.seed),
+    }
+    text = json.dumps(ergebnis, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f: f.write(text + '\n')
+    else:
+        print(text)
+    if args.vergleich:
+        with open(args.vergleich, encoding='utf-8') as f: basis = json.load(f)
+        print(vergleich(basis, ergebnis), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
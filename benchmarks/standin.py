@@ -0,0 +1,89 @@
+"""
+Lokaler DB-Ersatz für Benchmarks: SQLite mit dem Schema nach allen Migrationen.
+
+Die Laufzeit-SQL der App ist bewusst portabel gehalten; übersetzt werden nur
+die Platzhalter (%s -> ?) und INSERT IGNORE. Die Verbindung verhält sich für
+acp und pandas.read_sql wie eine mysql.connector-Verbindung; verletzte eindeutige
+Schlüssel tragen wie dort errno = ER_DUP_ENTRY.
+"""
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from acp.db import ER_DUP_ENTRY, VERSIONED_TABLES
+
+SCHEMA = """
+CREATE TABLE mitarbeiter_verzeichnis (ID INTEGER PRIMARY KEY AUTOINCREMENT, Mitarbeitername TEXT UNIQUE, Geburtsdatum TEXT, Personalnummer TEXT, Bewacher_ID TEXT,
+    Anstellung TEXT, Position TEXT, Vertrag_bis TEXT, Adresse TEXT, PLZ TEXT, Telefonnummer TEXT, Ausweis_gueltig_bis TEXT);
+CREATE TABLE standorte (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT NOT NULL UNIQUE, Region TEXT, Ansprechpartner TEXT, Telefon TEXT);
+CREATE INDEX idx_standort_region ON standorte (Region);
+CREATE TABLE standort_slots (ID INTEGER PRIMARY KEY AUTOINCREMENT, StandortID INTEGER NOT NULL REFERENCES standorte (ID) ON DELETE CASCADE, MA_Slot TEXT NOT NULL,
+    UNIQUE (StandortID, MA_Slot));
+CREATE TABLE einsaetze (EinsatzID INTEGER PRIMARY KEY AUTOINCREMENT, Datum DATE, Objekt TEXT, MA_Slot TEXT, Anfang REAL, Ende REAL, Pause REAL, Mitarbeiter TEXT, Zeit REAL,
+    Version INTEGER NOT NULL DEFAULT 0, UNIQUE (Objekt, Datum, MA_Slot));
+CREATE INDEX idx_einsatz_ma_datum ON einsaetze (Mitarbeiter, Datum);
+CREATE INDEX idx_einsatz_datum ON einsaetze (Datum);
+CREATE TABLE mitarbeiter_plan_version (Mitarbeiter TEXT PRIMARY KEY, Version INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE urlaub_krank (ID INTEGER PRIMARY KEY AUTOINCREMENT, Mitarbeiter TEXT NOT NULL, Von DATE NOT NULL, Bis DATE NOT NULL, Status TEXT);
+CREATE INDEX idx_uk_ma_zeitraum ON urlaub_krank (Mitarbeiter, Von, Bis);
+CREATE INDEX idx_uk_zeitraum ON urlaub_krank (Von, Bis);
+CREATE TABLE mitarbeiter_monat (Monat TEXT, Mitarbeiter TEXT, Art TEXT, Wert REAL, PRIMARY KEY (Monat, Mitarbeiter, Art));
+CREATE TABLE monatskatalog (Monat TEXT PRIMARY KEY);
+CREATE TABLE tabellen_version (Tabelle TEXT PRIMARY KEY, Version INTEGER NOT NULL DEFAULT 0);
+"""
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda d: d.date().isoformat() if d.time() == datetime.min.time() else d.isoformat(sep=' '))
+sqlite3.register_adapter(pd.Timestamp, lambda d: d.date().isoformat() if d == d.normalize() else d.isoformat(sep=' '))
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.bool_, bool)
+
+_INSERT_IGNORE = re.compile(r'^\s*INSERT\s+IGNORE\b', re.IGNORECASE)
+
+_DOPPELT = {'SQLITE_CONSTRAINT_UNIQUE', 'SQLITE_CONSTRAINT_PRIMARYKEY'}
+
+def translate(sql):
+    return _INSERT_IGNORE.sub('INSERT OR IGNORE', sql).replace('%s', '?')
+
+@contextmanager
+def _mysql_fehler():
+    try: yield
+    except sqlite3.IntegrityError as e:
+        if e.sqlite_errorname in _DOPPELT: e.errno = ER_DUP_ENTRY
+        raise
+
+class Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        with _mysql_fehler(): self._cursor.execute(translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, seq):
+        with _mysql_fehler(): self._cursor.executemany(translate(sql), [tuple(p) for p in seq])
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class Connection:
+    def __init__(self, path=':memory:'):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+
+    def cursor(self):
+        return Cursor(self._conn.cursor())
+
+    def commit(self): self._conn.commit()
+    def rollback(self): self._conn.rollback()
+    def close(self): self._conn.close()
+    def ping(self, reconnect=False): pass
+
+def create_schema(conn):
+    conn._conn.executescript(SCHEMA)
+    conn._conn.executemany("INSERT INTO tabellen_version (Tabelle, Version) VALUES (?, 0)", [(t,) for t in VERSIONED_TABLES])
+    conn.commit()
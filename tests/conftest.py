@@ -0,0 +1,54 @@
+"""
+Gemeinsame Fixtures: Tests laufen gegen den SQLite-Ersatz aus benchmarks/standin.py
+(Schema nach allen Migrationen), ohne MySQL-Server. Nur die Migrationen brauchen echtes
+MySQL/TiDB (mysql_conn) und werden sonst übersprungen.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import standin  # noqa: E402
+
+def pytest_configure(config):
+    config.addinivalue_line('filterwarnings', 'ignore:pandas only supports SQLAlchemy')
+
+@pytest.fixture
+def conn():
+    c = standin.Connection(':memory:')
+    standin.create_schema(c)
+    yield c
+    c.close()
+
+@pytest.fixture
+def mysql_conn():
+    """
+    Leere MySQL-Testdatenbank: ACP_TEST_SECRETS zeigt auf eine secrets.toml mit [mysql].
+    Alle Tabellen darin werden gelöscht – der Datenbankname muss daher 'test' enthalten.
+    """
+    pfad = os.environ.get('ACP_TEST_SECRETS')
+    if not pfad: pytest.skip("ACP_TEST_SECRETS nicht gesetzt (MySQL-Testdatenbank)")
+    from acp.cli import load_mysql_config
+    from acp.db import pool_from_config
+    config = load_mysql_config(pfad)
+    if 'test' not in str(config.get('database', '')): pytest.skip("Datenbankname ohne 'test' – wird nicht geleert")
+    with pool_from_config(config).connection() as c:
+        cursor = c.cursor()
+        cursor.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+        tabellen = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for t in tabellen: cursor.execute(f"DROP TABLE `{t}`")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        cursor.close()
+        yield c
+
+def abfrage(conn, sql, params=()):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally: cursor.close()
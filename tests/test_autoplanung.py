@@ -0,0 +1,119 @@
+"""Auto-Planen: Zuordnung (zuordnen) und die Regeln von auto_planen."""
+from datetime import date
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datengenerator
+from acp.autoplanung import auto_planen, vorschlag_erstellen, zuordnen
+from acp.planung import (build_absence_index, expand_abwesenheiten, fetch_abwesenheiten, fetch_einsaetze_for_objects,
+                         find_absence_conflicts, find_double_bookings, save_einsaetze_to_db)
+
+def bester_wert(moeglich, kosten):
+    """Brute Force: (maximale Anzahl besetzter Schichten, minimale Kosten dabei)."""
+    n, e = moeglich.shape
+    best = (0, 0.0)
+    for perm in permutations(range(e), n):
+        wer = [j for i, j in enumerate(perm) if moeglich[i, j]]
+        best = max(best, (len(wer), -sum(kosten[j] for j in wer)))
+    return best[0], -best[1]
+
+def test_zuordnen_augmentiert_ueber_vergebene_schicht():
+    # Schicht 0 kann jeder, Schicht 1 nur Mitarbeiter 0: Mitarbeiter 0 muss umgehängt werden
+    moeglich = np.array([[True, True], [True, False]])
+    assert zuordnen(moeglich, np.array([0, 1])).tolist() == [1, 0]
+
+def test_zuordnen_folgt_kostenreihenfolge():
+    moeglich = np.array([[True, True, True]])
+    assert zuordnen(moeglich, np.array([2, 0, 1])).tolist() == [2]
+
+def test_zuordnen_unbesetzbar():
+    moeglich = np.array([[False, False], [True, True]])
+    assert zuordnen(moeglich, np.array([0, 1])).tolist() == [-1, 0]
+
+@pytest.mark.parametrize('seed', range(40))
+def test_zuordnen_maximal_und_guenstigst(seed):
+    rs = np.random.default_rng(seed)
+    moeglich = rs.random((4, 6)) < 0.35
+    kosten = rs.integers(0, 5, 6).astype(float)
+    reihenfolge = np.argsort(kosten, kind='stable')
+    treffer = zuordnen(moeglich, reihenfolge)
+    besetzt = treffer[treffer >= 0]
+    assert len(set(besetzt.tolist())) == len(besetzt)
+    assert all(moeglich[i, j] for i, j in enumerate(treffer) if j >= 0)
+    assert (len(besetzt), kosten[besetzt].sum()) == bester_wert(moeglich, kosten)
+
+D0, D1 = date(2026, 3, 1), date(2026, 3, 31)
+
+def schichten(*zeilen):
+    """(Tag, Anfang h, Ende h) -> offene Schichten wie offene_schichten sie liefert."""
+    return pd.DataFrame([{'Datum': date(2026, 3, t), 'Objekt': 'Objekt A', 'MA_Slot': f"MA{i + 1}", 'Anfang': a / 24, 'Ende': e / 24, 'Pause': 0.0,
+                        'Zeit': (e - a) % 24} for i, (t, a, e) in enumerate(zeilen)])
+
+def mitarbeiter(*namen, vertrag=None, ausweis=None):
+    vertrag = vertrag or {}; ausweis = ausweis or {}
+    return pd.DataFrame({'Mitarbeitername': list(namen), 'Vertrag_bis': [vertrag.get(n) for n in namen],
+                         'Ausweis_gueltig_bis': [ausweis.get(n) for n in namen]})
+
+def belegt(*zeilen):
+    """(Mitarbeiter, Tag, Anfang h, Ende h, Zeit)"""
+    return pd.DataFrame([{'Datum': date(2026, 3, t), 'Anfang': a / 24, 'Ende': e / 24, 'Mitarbeiter': m, 'Zeit': z} for m, t, a, e, z in zeilen],
+                        columns=['Datum', 'Anfang', 'Ende', 'Mitarbeiter', 'Zeit'])
+
+KEINE_ABWESENHEIT = pd.DataFrame(columns=['Mitarbeiter', 'Von', 'Bis', 'Status'])
+
+def planen(offen, ma, abwesenheit=KEINE_ABWESENHEIT, bel=None):
+    return auto_planen(offen, ma, abwesenheit, belegt() if bel is None else bel, D0, D1)['Mitarbeiter'].tolist()
+
+def test_wenigste_stunden_zuerst_und_ausgleich():
+    assert planen(schichten((5, 6, 14)), mitarbeiter('Anna', 'Bert'), bel=belegt(('Anna', 2, 6, 14, 8.0))) == ['Bert']
+    # gleiche Stunden: stabile Reihenfolge, danach zählt die vorgeschlagene Schicht mit
+    assert planen(schichten((5, 6, 14), (6, 6, 14)), mitarbeiter('Anna', 'Bert')) == ['Anna', 'Bert']
+
+def test_abwesenheit_schliesst_aus():
+    abw = pd.DataFrame({'Mitarbeiter': ['Anna', 'Bert'], 'Von': [date(2026, 3, 4), date(2026, 3, 5)], 'Bis': [date(2026, 3, 6), date(2026, 3, 5)],
+                        'Status': ['Urlaub', '']})
+    # leerer Status zählt nicht als Abwesenheit
+    assert planen(schichten((5, 6, 14)), mitarbeiter('Anna', 'Bert'), abw) == ['Bert']
+    assert planen(schichten((5, 6, 14)), mitarbeiter('Anna'), abw) == ['']
+
+def test_gueltigkeit_von_vertrag_und_ausweis():
+    ma = mitarbeiter('Anna', 'Bert', vertrag={'Anna': '2026-03-05'}, ausweis={'Bert': '2026-03-04', 'Anna': 'unbekannt'})
+    assert planen(schichten((4, 6, 14), (5, 6, 14), (6, 6, 14)), ma) == ['Anna', 'Anna', '']
+
+def test_ueberschneidung_mit_bestehender_schicht():
+    assert planen(schichten((5, 10, 18)), mitarbeiter('Anna', 'Bert'), bel=belegt(('Anna', 5, 6, 14, 0.0))) == ['Bert']
+    # angrenzend ist keine Überschneidung
+    assert planen(schichten((5, 14, 22)), mitarbeiter('Anna'), bel=belegt(('Anna', 5, 6, 14, 8.0))) == ['Anna']
+
+def test_nachtschicht_ueber_mitternacht():
+    # Nachtschicht am Vortag bis 06:00 gegen Frühschicht ab 05:00
+    assert planen(schichten((5, 5, 13)), mitarbeiter('Anna', 'Bert'), bel=belegt(('Anna', 4, 22, 6, 0.0))) == ['Bert']
+    # vorgeschlagene Nachtschicht gegen bestehende Frühschicht am Folgetag
+    assert planen(schichten((5, 22, 6)), mitarbeiter('Anna', 'Bert'), bel=belegt(('Anna', 6, 5, 13, 0.0))) == ['Bert']
+
+def test_mehrere_schichten_eines_tages():
+    # nicht überlappend: beide an Anna (zweite Runde); überlappend: nur eine
+    assert planen(schichten((5, 6, 10), (5, 14, 18)), mitarbeiter('Anna')) == ['Anna', 'Anna']
+    assert sorted(planen(schichten((5, 6, 14), (5, 10, 18)), mitarbeiter('Anna'))) == ['', 'Anna']
+
+def test_ohne_mitarbeiter_oder_schichten():
+    assert planen(schichten((5, 6, 14)), mitarbeiter(None, ' ')) == ['']
+    assert auto_planen(schichten((5, 6, 14)).iloc[:0], mitarbeiter('Anna'), KEINE_ABWESENHEIT, belegt(), D0, D1).empty
+
+def test_vorschlag_ohne_konflikte(conn):
+    datengenerator.generate(conn, n_mitarbeiter=25, n_objekte=4, k_slots=3, jahre=1, besetzung=0.9, seed=3, ende=date(2026, 12, 31))
+    objekte = ['Objekt 000', 'Objekt 001']
+    df_saved = fetch_einsaetze_for_objects(conn, objekte, D0, D1)
+    leer = df_saved.assign(Mitarbeiter=None)
+    save_einsaetze_to_db(conn, leer, df_saved, objekte, D0, D1)
+    leer = fetch_einsaetze_for_objects(conn, objekte, D0, D1)
+
+    vorschlag = vorschlag_erstellen(conn, leer, {o: ['MA1', 'MA2', 'MA3'] for o in objekte}, D0, D1)
+    assert (vorschlag['Mitarbeiter'] != '').mean() > 0.9
+    plan = vorschlag[vorschlag['Mitarbeiter'] != '']
+    assert find_double_bookings(conn, plan, objekte) == []
+    df_uk = expand_abwesenheiten(fetch_abwesenheiten(conn, D0, D1), D0, D1)
+    assert find_absence_conflicts(build_absence_index(df_uk), plan) == []
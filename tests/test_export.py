@@ -0,0 +1,28 @@
+"""Sammelexport: ZIP als temporäre Datei, Inhalt je Objekt und Monat."""
+import io
+import os
+import tempfile
+import zipfile
+from datetime import date
+
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import datengenerator
+from acp.export import export_zip
+
+def test_export_zip_als_datei(conn):
+    datengenerator.generate(conn, n_mitarbeiter=20, n_objekte=3, k_slots=2, jahre=1, seed=1, ende=date(2026, 12, 31))
+    vorher = set(os.listdir(tempfile.gettempdir()))
+    with export_zip(conn, date(2026, 3, 1), date(2026, 4, 30), ['Objekt 000', 'Objekt 002']) as datei:
+        assert isinstance(datei, io.BufferedReader)
+        with zipfile.ZipFile(datei) as zf:
+            namen = sorted(zf.namelist())
+            summen = zf.read('Summen.csv').decode('utf-8-sig').splitlines()
+        assert namen == ['Objekt 000/Einsatzplan_Objekt 000_2026-03.csv', 'Objekt 000/Einsatzplan_Objekt 000_2026-04.csv',
+                         'Objekt 002/Einsatzplan_Objekt 002_2026-03.csv', 'Objekt 002/Einsatzplan_Objekt 002_2026-04.csv', 'Summen.csv']
+        assert summen[0] == 'Objekt;Monat;Gesamtstunden' and len(summen) == 7
+        # st.download_button nimmt die Datei direkt (auch aus einem aufgeschobenen Callable)
+        daten, _ = convert_data_to_bytes_and_infer_mime(datei, unsupported_error=TypeError())
+        assert zipfile.is_zipfile(io.BytesIO(daten))
+    # namenlose temporäre Datei: nach dem Schließen bleibt nichts liegen
+    assert set(os.listdir(tempfile.gettempdir())) <= vorher
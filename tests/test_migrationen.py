@@ -0,0 +1,107 @@
+"""
+Daten-Migrationen: Altbestand (Schema aus m001, VARCHAR-Datum, Tageszeilen, locations_spalte)
+anlegen, run_migrations ausführen und das Ergebnis prüfen. Braucht MySQL (mysql_conn);
+nur die reine Umrechnung _day_rows_to_intervals läuft ohne Datenbank.
+"""
+from datetime import date
+
+import pandas as pd
+
+from acp.db import OBJECT_COLUMN_NAME, MA_SLOT_COLUMN_NAME, ART_ARBEITSSTUNDEN
+from acp.migrationen import MIGRATIONS, _column_type, _day_rows_to_intervals, _m001_basistabellen, _m002_datum_als_date, _m007_abwesenheit_zeitraeume, _m008_standorte, run_migrations
+from conftest import abfrage
+
+def altbestand(conn, einsaetze=(), urlaub=(), locations=(), vorher=None):
+    """Schema vor allen Migrationen mit Altdaten anlegen; vorher(cursor) simuliert z. B. einen Abbruch."""
+    cursor = conn.cursor()
+    _m001_basistabellen(conn, cursor)
+    cursor.executemany("INSERT INTO einsaetze (Datum, Objekt, MA_Slot, Anfang, Ende, Pause, Mitarbeiter, Zeit) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", list(einsaetze))
+    cursor.executemany("INSERT INTO urlaub_krank (Datum, Mitarbeiter, Status) VALUES (%s, %s, %s)", list(urlaub))
+    cursor.executemany(f"INSERT INTO locations_spalte (`{OBJECT_COLUMN_NAME}`, `{MA_SLOT_COLUMN_NAME}`, Ansprechpartner, Telefon) VALUES (%s, %s, %s, %s)", list(locations))
+    if vorher: vorher(cursor)
+    conn.commit()
+    cursor.close()
+    run_migrations(conn)
+
+def spaltentyp(conn, table, column):
+    cursor = conn.cursor()
+    try: return _column_type(cursor, table, column)
+    finally: cursor.close()
+
+EINSAETZE = [('2026-03-01', 'Objekt A', 'MA1', 0.25, 14 / 24, 0.5, 'Anna', 7.5),
+             ('2026-03-02 00:00:00', 'Objekt A', 'MA1', 0.25, 14 / 24, 0.5, 'Bert', 7.5),
+             ('kaputt', 'Objekt A', 'MA2', 0.25, 14 / 24, 0.5, 'Carl', 7.5)]
+
+def test_m002_datum_als_date(mysql_conn):
+    altbestand(mysql_conn, einsaetze=EINSAETZE, urlaub=[('2026-03-05', 'Anna', 'Urlaub'), ('2026-03-09 00:00:00', 'Anna', 'Krank')])
+    assert spaltentyp(mysql_conn, 'einsaetze', 'Datum') == 'date'
+    assert spaltentyp(mysql_conn, 'einsaetze', 'Datum_neu') is None
+    # unlesbare Altwerte werden NULL statt den Lauf abzubrechen, der Rohwert bleibt in einsaetze_datum_alt
+    assert dict(abfrage(mysql_conn, "SELECT Mitarbeiter, Datum FROM einsaetze")) == {'Anna': date(2026, 3, 1), 'Bert': date(2026, 3, 2), 'Carl': None}
+    assert abfrage(mysql_conn, "SELECT e.Mitarbeiter, a.Datum FROM einsaetze_datum_alt a JOIN einsaetze e ON e.EinsatzID = a.EinsatzID") == [('Carl', 'kaputt')]
+    assert abfrage(mysql_conn, "SELECT COUNT(*) FROM urlaub_krank_datum_alt") == [(0,)]
+    assert sorted(abfrage(mysql_conn, "SELECT Datum, Status FROM urlaub_krank_tage")) == [(date(2026, 3, 5), 'Urlaub'), (date(2026, 3, 9), 'Krank')]
+    # Folgemigrationen rechnen auf dem DATE-Datum
+    assert abfrage(mysql_conn, "SELECT Mitarbeiter, Wert FROM mitarbeiter_monat WHERE Monat = '2026-03' AND Art = %s ORDER BY Mitarbeiter",
+                   (ART_ARBEITSSTUNDEN,)) == [('Anna', 7.5), ('Bert', 7.5)]
+    assert abfrage(mysql_conn, "SELECT MAX(Version) FROM schema_version") == [(MIGRATIONS[-1][0],)]
+
+def test_m002_nach_abbruch_fortsetzen(mysql_conn):
+    def abbruch_nach_drop(cursor):
+        cursor.execute("ALTER TABLE einsaetze ADD COLUMN Datum_neu DATE NULL AFTER Datum")
+        cursor.execute("UPDATE einsaetze SET Datum_neu = STR_TO_DATE(LEFT(Datum, 10), '%Y-%m-%d') WHERE Datum LIKE '2026-%'")
+        cursor.execute("ALTER TABLE einsaetze DROP COLUMN Datum")
+    altbestand(mysql_conn, einsaetze=EINSAETZE[:2], vorher=abbruch_nach_drop)
+    assert spaltentyp(mysql_conn, 'einsaetze', 'Datum') == 'date'
+    assert dict(abfrage(mysql_conn, "SELECT Mitarbeiter, Datum FROM einsaetze")) == {'Anna': date(2026, 3, 1), 'Bert': date(2026, 3, 2)}
+
+def test_m002_erneut_ohne_wirkung(mysql_conn):
+    altbestand(mysql_conn, einsaetze=EINSAETZE[:2])
+    vorher = sorted(abfrage(mysql_conn, "SELECT EinsatzID, Datum FROM einsaetze"))
+    cursor = mysql_conn.cursor()
+    _m002_datum_als_date(mysql_conn, cursor)
+    cursor.close()
+    assert sorted(abfrage(mysql_conn, "SELECT EinsatzID, Datum FROM einsaetze")) == vorher
+    run_migrations(mysql_conn)
+    assert abfrage(mysql_conn, "SELECT COUNT(*) FROM schema_version") == [(len(MIGRATIONS),)]
+
+URLAUB = [('2026-03-05', 'Anna', 'Urlaub'), ('2026-03-06', 'Anna', 'Urlaub'), ('2026-03-07', 'Anna', 'Urlaub'), ('2026-03-08', 'Anna', 'Krank'),
+          ('2026-03-10', 'Anna', 'Urlaub'), ('2026-03-31', 'Bert', 'Urlaub'), ('2026-04-01', 'Bert', 'Urlaub')]
+
+def test_tageszeilen_zu_zeitraeumen():
+    df = pd.DataFrame(URLAUB[::-1], columns=['Datum', 'Mitarbeiter', 'Status'])
+    iv = _day_rows_to_intervals(df)
+    assert list(iv.itertuples(index=False, name=None)) == [
+        ('Anna', date(2026, 3, 5), date(2026, 3, 7), 'Urlaub'), ('Anna', date(2026, 3, 8), date(2026, 3, 8), 'Krank'),
+        ('Anna', date(2026, 3, 10), date(2026, 3, 10), 'Urlaub'), ('Bert', date(2026, 3, 31), date(2026, 4, 1), 'Urlaub')]
+
+def test_m007_abwesenheit_zeitraeume(mysql_conn):
+    altbestand(mysql_conn, urlaub=URLAUB)
+    assert sorted(abfrage(mysql_conn, "SELECT Mitarbeiter, Von, Bis, Status FROM urlaub_krank")) == [
+        ('Anna', date(2026, 3, 5), date(2026, 3, 7), 'Urlaub'), ('Anna', date(2026, 3, 8), date(2026, 3, 8), 'Krank'),
+        ('Anna', date(2026, 3, 10), date(2026, 3, 10), 'Urlaub'), ('Bert', date(2026, 3, 31), date(2026, 4, 1), 'Urlaub')]
+    assert abfrage(mysql_conn, "SELECT COUNT(*) FROM urlaub_krank_tage") == [(len(URLAUB),)]
+    # erneuter Lauf erkennt die Zeitraum-Tabelle und ändert nichts
+    cursor = mysql_conn.cursor()
+    _m007_abwesenheit_zeitraeume(mysql_conn, cursor)
+    cursor.close()
+    assert abfrage(mysql_conn, "SELECT COUNT(*) FROM urlaub_krank") == [(4,)]
+
+LOCATIONS = [('Objekt A', 'MA1', 'Herr X', ''), ('Objekt A', 'MA2', '', '0151 123'), ('Objekt A', 'MA2', None, None),
+             ('Objekt B', 'MA1', None, None), ('', 'MA1', 'verwaist', None), ('Objekt C', '', None, None)]
+
+def test_m008_standorte(mysql_conn):
+    altbestand(mysql_conn, locations=LOCATIONS)
+    # Stammdaten je Objekt aus den Slot-Zeilen zusammengeführt, leere Werte ignoriert
+    assert sorted(abfrage(mysql_conn, "SELECT Name, Ansprechpartner, Telefon, Region FROM standorte")) == [
+        ('Objekt A', 'Herr X', '0151 123', None), ('Objekt B', None, None, None), ('Objekt C', None, None, None)]
+    assert sorted(abfrage(mysql_conn, "SELECT s.Name, z.MA_Slot FROM standort_slots z JOIN standorte s ON s.ID = z.StandortID")) == [
+        ('Objekt A', 'MA1'), ('Objekt A', 'MA2'), ('Objekt B', 'MA1')]
+    assert spaltentyp(mysql_conn, 'locations_spalte', OBJECT_COLUMN_NAME) is None
+    assert abfrage(mysql_conn, "SELECT COUNT(*) FROM locations_spalte_alt") == [(len(LOCATIONS),)]
+    assert abfrage(mysql_conn, "SELECT Version FROM tabellen_version WHERE Tabelle = 'standorte'") == [(0,)]
+    # erneuter Lauf ohne locations_spalte ändert nichts
+    cursor = mysql_conn.cursor()
+    _m008_standorte(mysql_conn, cursor)
+    cursor.close()
+    assert abfrage(mysql_conn, "SELECT COUNT(*) FROM standort_slots") == [(3,)]
@@ -0,0 +1,166 @@
+"""Differenzielles Speichern des Einsatzplans: diff_einsaetze, save_einsaetze_to_db und Versionskonflikte."""
+import sqlite3
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from acp.planung import PLAN_KEY, PLAN_VALUES, PlanKonflikt, diff_einsaetze, fetch_einsaetze_for_objects, save_einsaetze_to_db
+from conftest import abfrage
+
+VON, BIS = date(2026, 3, 1), date(2026, 3, 31)
+
+def zeile(tag, slot, ma, anfang=6, ende=14, objekt='Objekt A'):
+    return {'Datum': f"2026-03-{tag:02d}", 'Objekt': objekt, 'MA_Slot': slot, 'Anfang': anfang / 24, 'Ende': ende / 24,
+            'Pause': 0.5, 'Mitarbeiter': ma, 'Zeit': (ende - anfang) - 0.5}
+
+def plan(*zeilen):
+    return pd.DataFrame(list(zeilen), columns=PLAN_KEY + PLAN_VALUES)
+
+def laden(conn, objekte=('Objekt A',)):
+    return fetch_einsaetze_for_objects(conn, list(objekte), VON, BIS)
+
+def speichern(conn, df, df_saved, objekte=('Objekt A',)):
+    return save_einsaetze_to_db(conn, df, df_saved, list(objekte), VON, BIS)
+
+def bestand(conn):
+    return {(d, o, s): (ma, v) for d, o, s, ma, v in abfrage(conn, "SELECT Datum, Objekt, MA_Slot, Mitarbeiter, Version FROM einsaetze")}
+
+@pytest.fixture
+def gespeichert(conn):
+    speichern(conn, plan(zeile(1, 'MA1', 'Anna'), zeile(1, 'MA2', 'Bert'), zeile(2, 'MA1', 'Anna')), laden(conn))
+    return conn
+
+def test_diff_unveraendert_leer(gespeichert):
+    alt = laden(gespeichert)
+    inserts, updates, delete_ids = diff_einsaetze(alt, alt)
+    assert inserts.empty and updates.empty and delete_ids == []
+
+def test_diff_erkennt_neu_geaendert_geloescht(gespeichert):
+    alt = laden(gespeichert)
+    neu = plan(zeile(1, 'MA1', 'Carl'), zeile(1, 'MA2', 'Bert', ende=15), zeile(3, 'MA1', 'Anna'))
+    inserts, updates, delete_ids = diff_einsaetze(neu, alt)
+    assert list(inserts[['Datum', 'MA_Slot']].itertuples(index=False, name=None)) == [('2026-03-03', 'MA1')]
+    assert sorted(updates['MA_Slot']) == ['MA1', 'MA2']
+    ids = dict(zip(zip(alt['Datum'].astype(str), alt['MA_Slot']), alt['EinsatzID']))
+    assert set(updates['EinsatzID']) == {ids[('2026-03-01', 'MA1')], ids[('2026-03-01', 'MA2')]}
+    assert delete_ids == [ids[('2026-03-02', 'MA1')]]
+
+def test_diff_ignoriert_rundung_und_datumsformat(gespeichert):
+    alt = laden(gespeichert)
+    neu = alt.copy()
+    neu['Datum'] = pd.to_datetime(neu['Datum'])
+    neu['Anfang'] = neu['Anfang'] + 1e-12
+    inserts, updates, delete_ids = diff_einsaetze(neu, alt)
+    assert inserts.empty and updates.empty and delete_ids == []
+
+def test_diff_entfernt_doppelte_zellen(gespeichert):
+    alt = laden(gespeichert)
+    doppelt = alt.iloc[[0]].assign(EinsatzID=999)
+    inserts, updates, delete_ids = diff_einsaetze(alt, pd.concat([alt, doppelt], ignore_index=True))
+    assert inserts.empty and updates.empty and delete_ids == [999]
+
+def test_speichern_schreibt_nur_geaenderte_zellen(gespeichert):
+    conn = gespeichert
+    vorher = bestand(conn)
+    ids_vorher = dict(abfrage(conn, "SELECT MA_Slot || Datum, EinsatzID FROM einsaetze"))
+    neu = plan(zeile(1, 'MA1', 'Anna'), zeile(1, 'MA2', 'Carl'), zeile(3, 'MA1', 'Anna'))
+    assert speichern(conn, neu, laden(conn)) == {'neu': 1, 'geaendert': 1, 'geloescht': 1}
+    nachher = bestand(conn)
+    assert nachher[('2026-03-01', 'Objekt A', 'MA1')] == vorher[('2026-03-01', 'Objekt A', 'MA1')]
+    assert nachher[('2026-03-01', 'Objekt A', 'MA2')] == ('Carl', 1)
+    assert nachher[('2026-03-03', 'Objekt A', 'MA1')] == ('Anna', 0)
+    assert ('2026-03-02', 'Objekt A', 'MA1') not in nachher
+    # unveränderte Zelle behält ihre EinsatzID (kein Löschen und Neuanlegen)
+    assert dict(abfrage(conn, "SELECT MA_Slot || Datum, EinsatzID FROM einsaetze"))['MA12026-03-01'] == ids_vorher['MA12026-03-01']
+
+def test_speichern_aktualisiert_aggregate_und_versionen(gespeichert):
+    conn = gespeichert
+    tv = dict(abfrage(conn, "SELECT Tabelle, Version FROM tabellen_version"))
+    speichern(conn, plan(zeile(1, 'MA1', 'Anna'), zeile(1, 'MA2', 'Carl'), zeile(2, 'MA1', 'Anna')), laden(conn))
+    stunden = dict(abfrage(conn, "SELECT Mitarbeiter, Wert FROM mitarbeiter_monat WHERE Monat = '2026-03' AND Art = 'Arbeitsstunden'"))
+    assert stunden == {'Anna': 15.0, 'Carl': 7.5}
+    assert abfrage(conn, "SELECT Monat FROM monatskatalog") == [('2026-03',)]
+    neu_tv = dict(abfrage(conn, "SELECT Tabelle, Version FROM tabellen_version"))
+    assert neu_tv['einsaetze'] == tv['einsaetze'] + 1 and neu_tv['mitarbeiter_monat'] == tv['mitarbeiter_monat'] + 1
+    assert neu_tv['monatskatalog'] == tv['monatskatalog']
+    # Bert (vorher besetzt) und Carl (neu) sind betroffen, Anna nicht
+    assert dict(abfrage(conn, "SELECT Mitarbeiter, Version FROM mitarbeiter_plan_version")) == {'Anna': 1, 'Bert': 2, 'Carl': 1}
+
+def test_speichern_ohne_aenderung(gespeichert):
+    conn = gespeichert
+    tv = abfrage(conn, "SELECT Tabelle, Version FROM tabellen_version ORDER BY Tabelle")
+    vorher = bestand(conn)
+    alt = laden(conn)
+    assert speichern(conn, alt, alt) == {'neu': 0, 'geaendert': 0, 'geloescht': 0}
+    assert bestand(conn) == vorher
+    assert abfrage(conn, "SELECT Tabelle, Version FROM tabellen_version ORDER BY Tabelle") == tv
+
+def zustand(conn):
+    """Alles, was ein Speichervorgang verändert – zum Nachweis des Rollbacks."""
+    return (bestand(conn), abfrage(conn, "SELECT * FROM mitarbeiter_monat ORDER BY Monat, Mitarbeiter, Art"),
+            abfrage(conn, "SELECT * FROM tabellen_version ORDER BY Tabelle"), abfrage(conn, "SELECT * FROM mitarbeiter_plan_version ORDER BY Mitarbeiter"),
+            abfrage(conn, "SELECT * FROM monatskatalog ORDER BY Monat"))
+
+def zwei_planer(conn, aenderung_a, aenderung_b):
+    """Beide laden denselben Stand; A speichert zuerst, B danach auf dem veralteten Stand."""
+    basis = laden(conn)
+    speichern(conn, aenderung_a(basis), basis)
+    vorher = zustand(conn)
+    with pytest.raises(PlanKonflikt) as e:
+        speichern(conn, aenderung_b(basis), basis)
+    assert zustand(conn) == vorher
+    return e.value.zellen
+
+def setze(df, tag, slot, ma):
+    df = df.copy()
+    df.loc[(df['Datum'] == date(2026, 3, tag)) & (df['MA_Slot'] == slot), 'Mitarbeiter'] = ma
+    return df
+
+def ohne(df, tag, slot):
+    return df[~((df['Datum'] == date(2026, 3, tag)) & (df['MA_Slot'] == slot))]
+
+def mit(df, *zeilen):
+    return pd.concat([df, plan(*zeilen)], ignore_index=True)
+
+def test_konflikt_geaendert(gespeichert):
+    zellen = zwei_planer(gespeichert, lambda b: setze(b, 1, 'MA1', 'Carl'),
+                         lambda b: mit(setze(setze(b, 1, 'MA2', 'Erik'), 1, 'MA1', 'Dora'), zeile(3, 'MA1', 'Dora')))
+    assert zellen == [{'Datum': '2026-03-01', 'Objekt': 'Objekt A', 'MA_Slot': 'MA1', 'Art': 'geändert', 'Mitarbeiter': 'Carl'}]
+
+def test_konflikt_loeschen_einer_geaenderten_zelle(gespeichert):
+    zellen = zwei_planer(gespeichert, lambda b: setze(b, 2, 'MA1', 'Carl'), lambda b: ohne(b, 2, 'MA1'))
+    assert [(z['MA_Slot'], z['Art'], z['Mitarbeiter']) for z in zellen] == [('MA1', 'geändert', 'Carl')]
+
+def test_konflikt_geloescht(gespeichert):
+    zellen = zwei_planer(gespeichert, lambda b: ohne(b, 2, 'MA1'), lambda b: setze(setze(b, 1, 'MA2', 'Erik'), 2, 'MA1', 'Dora'))
+    assert zellen == [{'Datum': '2026-03-02', 'Objekt': 'Objekt A', 'MA_Slot': 'MA1', 'Art': 'gelöscht', 'Mitarbeiter': None}]
+
+def test_konflikt_neu_angelegt(gespeichert):
+    # B ändert zusätzlich eine Zelle: das UPDATE läuft vor dem INSERT und muss mit zurückgerollt werden
+    zellen = zwei_planer(gespeichert, lambda b: mit(b, zeile(3, 'MA1', 'Carl')), lambda b: mit(setze(b, 1, 'MA2', 'Erik'), zeile(3, 'MA1', 'Dora')))
+    assert zellen == [{'Datum': '2026-03-03', 'Objekt': 'Objekt A', 'MA_Slot': 'MA1', 'Art': 'neu angelegt', 'Mitarbeiter': 'Carl'}]
+
+def test_anderer_einfuegefehler_ist_kein_konflikt(gespeichert):
+    # wie ein Strict-Mode-Fehler bei MySQL: kein doppelter Schlüssel -> kein PlanKonflikt, sondern der Fehler selbst
+    conn = gespeichert
+    conn._conn.execute("CREATE TRIGGER ungueltig BEFORE INSERT ON einsaetze WHEN NEW.Mitarbeiter = 'Ungültig' BEGIN SELECT RAISE(ABORT, 'ungültige Daten'); END")
+    vorher = zustand(conn)
+    basis = laden(conn)
+    with pytest.raises(sqlite3.IntegrityError, match='ungültige Daten'):
+        speichern(conn, mit(setze(basis, 1, 'MA2', 'Erik'), zeile(3, 'MA1', 'Ungültig')), basis)
+    assert zustand(conn) == vorher
+
+def test_andere_zellen_ohne_konflikt(gespeichert):
+    conn = gespeichert
+    basis = laden(conn)
+    speichern(conn, setze(basis, 1, 'MA1', 'Carl'), basis)
+    assert speichern(conn, setze(basis, 1, 'MA2', 'Erik'), basis) == {'neu': 0, 'geaendert': 1, 'geloescht': 0}
+    assert {k[2]: v[0] for k, v in bestand(conn).items() if k[0] == '2026-03-01'} == {'MA1': 'Carl', 'MA2': 'Erik'}
+
+def test_nach_konflikt_neu_laden_und_speichern(gespeichert):
+    conn = gespeichert
+    zwei_planer(conn, lambda b: setze(b, 1, 'MA1', 'Carl'), lambda b: setze(b, 1, 'MA1', 'Dora'))
+    aktuell = laden(conn)
+    assert speichern(conn, setze(aktuell, 1, 'MA1', 'Dora'), aktuell) == {'neu': 0, 'geaendert': 1, 'geloescht': 0}
+    assert bestand(conn)[('2026-03-01', 'Objekt A', 'MA1')] == ('Dora', 2)
@@ -0,0 +1,80 @@
+"""Abwesenheiten als Zeiträume: Kürzen, Teilen und Verschmelzen in save_abwesenheit."""
+from datetime import date
+
+import pytest
+
+from acp.stammdaten import delete_abwesenheiten, save_abwesenheit
+from conftest import abfrage
+
+def d(tag, monat=3):
+    return date(2026, monat, tag)
+
+def eintraege(conn, mitarbeiter='Anna'):
+    return sorted((str(v), str(b), s) for v, b, s in abfrage(conn, "SELECT Von, Bis, Status FROM urlaub_krank WHERE Mitarbeiter = %s", (mitarbeiter,)))
+
+def tage(conn, monat='2026-03', mitarbeiter='Anna'):
+    return dict(abfrage(conn, "SELECT Art, Wert FROM mitarbeiter_monat WHERE Monat = %s AND Mitarbeiter = %s", (monat, mitarbeiter)))
+
+def test_neuer_zeitraum(conn):
+    save_abwesenheit(conn, 'Anna', d(5), d(9), 'Urlaub')
+    assert eintraege(conn) == [('2026-03-05', '2026-03-09', 'Urlaub')]
+    assert tage(conn) == {'Urlaub': 5}
+    assert abfrage(conn, "SELECT Monat FROM monatskatalog") == [('2026-03',)]
+
+@pytest.mark.parametrize('von, bis, erwartet', [
+    (d(8), d(12), ('2026-03-05', '2026-03-12')),   # überlappend
+    (d(10), d(12), ('2026-03-05', '2026-03-12')),  # angrenzend danach
+    (d(1), d(4), ('2026-03-01', '2026-03-09')),    # angrenzend davor
+    (d(6), d(7), ('2026-03-05', '2026-03-09')),    # enthalten
+])
+def test_gleicher_status_wird_verschmolzen(conn, von, bis, erwartet):
+    save_abwesenheit(conn, 'Anna', d(5), d(9), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', von, bis, 'Urlaub')
+    assert eintraege(conn) == [(*erwartet, 'Urlaub')]
+
+def test_lueckenschluss_verbindet_zwei_zeitraeume(conn):
+    save_abwesenheit(conn, 'Anna', d(1), d(4), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(10), d(12), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(5), d(9), 'Urlaub')
+    assert eintraege(conn) == [('2026-03-01', '2026-03-12', 'Urlaub')]
+    assert tage(conn) == {'Urlaub': 12}
+
+def test_luecke_bleibt_getrennt(conn):
+    save_abwesenheit(conn, 'Anna', d(5), d(9), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(11), d(12), 'Urlaub')
+    assert eintraege(conn) == [('2026-03-05', '2026-03-09', 'Urlaub'), ('2026-03-11', '2026-03-12', 'Urlaub')]
+
+def test_anderer_status_teilt_zeitraum(conn):
+    save_abwesenheit(conn, 'Anna', d(1), d(20), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(8), d(10), 'Krank')
+    assert eintraege(conn) == [('2026-03-01', '2026-03-07', 'Urlaub'), ('2026-03-08', '2026-03-10', 'Krank'), ('2026-03-11', '2026-03-20', 'Urlaub')]
+    assert tage(conn) == {'Urlaub': 17, 'Krank': 3}
+
+def test_anderer_status_kuerzt_und_ersetzt(conn):
+    save_abwesenheit(conn, 'Anna', d(5), d(9), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(12), d(13), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(8), d(14), 'Krank')
+    assert eintraege(conn) == [('2026-03-05', '2026-03-07', 'Urlaub'), ('2026-03-08', '2026-03-14', 'Krank')]
+
+def test_angrenzend_mit_anderem_status_unveraendert(conn):
+    save_abwesenheit(conn, 'Anna', d(1), d(4), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(5), d(6), 'Krank')
+    assert eintraege(conn) == [('2026-03-01', '2026-03-04', 'Urlaub'), ('2026-03-05', '2026-03-06', 'Krank')]
+
+def test_andere_mitarbeiter_unberuehrt(conn):
+    save_abwesenheit(conn, 'Bert', d(1), d(20), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(8), d(10), 'Krank')
+    assert eintraege(conn, 'Bert') == [('2026-03-01', '2026-03-20', 'Urlaub')]
+
+def test_monatsuebergreifend(conn):
+    save_abwesenheit(conn, 'Anna', d(30), d(2, 4), 'Urlaub')
+    assert tage(conn, '2026-03') == {'Urlaub': 2} and tage(conn, '2026-04') == {'Urlaub': 2}
+    assert abfrage(conn, "SELECT Monat FROM monatskatalog ORDER BY Monat") == [('2026-03',), ('2026-04',)]
+
+def test_loeschen_aktualisiert_aggregat(conn):
+    save_abwesenheit(conn, 'Anna', d(1), d(20), 'Urlaub')
+    save_abwesenheit(conn, 'Anna', d(8), d(10), 'Krank')
+    ids = [i for (i,) in abfrage(conn, "SELECT ID FROM urlaub_krank WHERE Status = 'Urlaub'")]
+    delete_abwesenheiten(conn, ids)
+    assert eintraege(conn) == [('2026-03-08', '2026-03-10', 'Krank')]
+    assert tage(conn) == {'Krank': 3}